@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import sys
 from textwrap import dedent
-
 from runtime.orchestrator import run_pipeline
+from runtime.serialization import PipelineResult
 
 
 def main() -> None:
@@ -12,12 +12,33 @@ def main() -> None:
 
     Použití:
       python -m api.cli "Můj dotaz..."
+      python -m api.cli --json "Můj dotaz..."   (celý výsledek jako JSON)
+      python -m api.cli --session ID [--reset]  (chat: každý řádek je další
+      zpráva téže konverzace, prázdný řádek konec)
     nebo bez argumentu:
       python -m api.cli
       (dotaz se zadá přes input() a ukončí Enterem)
     """
-    if len(sys.argv) > 1:
-        user_query = " ".join(sys.argv[1:])
+    args = sys.argv[1:]
+    as_json = "--json" in args
+    session_reset = "--reset" in args
+    args = [a for a in args if a not in ("--json", "--reset")]
+
+    session_id = None
+    if "--session" in args:
+        pos = args.index("--session")
+        if pos + 1 >= len(args):
+            print("⚠️ --session potřebuje id konverzace.")
+            sys.exit(1)
+        session_id = args[pos + 1]
+        del args[pos : pos + 2]
+
+    if session_id and not args:
+        _chat(session_id, session_reset, as_json)
+        return
+
+    if args:
+        user_query = " ".join(args)
     else:
         user_query = input("Zadej právní dotaz: ").strip()
 
@@ -25,7 +46,26 @@ def main() -> None:
         print("⚠️ Nebyl zadán žádný dotaz.")
         sys.exit(1)
 
-    res = run_pipeline(user_query)
+    res = run_pipeline(user_query, session_id=session_id, session_reset=session_reset)
+    _print_result(res, as_json)
+
+
+def _chat(session_id: str, session_reset: bool, as_json: bool) -> None:
+    """Vícekolový chat – intent se určuje z celé konverzace."""
+    while True:
+        message = input("> ").strip()
+        if not message:
+            return
+        res = run_pipeline(message, session_id=session_id, session_reset=session_reset)
+        session_reset = False
+        _print_result(res, as_json)
+
+
+def _print_result(res: PipelineResult, as_json: bool) -> None:
+    if as_json:
+        print(res.to_json())
+        return
+
     answer = res.get("final_answer", "").strip()
 
     header = dedent(
@@ -2,10 +2,39 @@
 Tenká API vrstva (např. FastAPI/Flask) pro volání runtime orchestrátoru.
 
 Zatím jen skeleton – můžeš sem později doplnit:
-- endpoint /legal/advice
+- endpoint /legal/advice (mapování těla requestu je v `legal_advice`)
 - endpoint /legal/document
 - mapování requestu na CaseContext
 """
 
+from typing import Any, Dict
+
+from runtime.orchestrator import run_pipeline
+
+
 def health_check() -> dict:
     return {"status": "ok", "component": "e-advokat-core"}
+
+
+def legal_advice(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tělo requestu /legal/advice → run_pipeline.
+
+    {"user_query": "...", "use_llm": bool, "mode": "full"|"short",
+     "sections": [...], "session_id": "...", "session_reset": bool}
+
+    `session_id` (id chatu) zapne vícekolovou klasifikaci intentu –
+    `user_query` je pak jen nová zpráva konverzace.
+    """
+    user_query = str(body.get("user_query") or "").strip()
+    if not user_query:
+        raise ValueError("Chybí user_query")
+    result = run_pipeline(
+        user_query,
+        use_llm=body.get("use_llm"),
+        mode=str(body.get("mode") or "full"),
+        sections=body.get("sections"),
+        session_id=body.get("session_id") or None,
+        session_reset=bool(body.get("session_reset", False)),
+    )
+    return dict(result)
@@ -19,22 +19,25 @@ from __future__ import annotations
 import os
 from typing import Any, Dict, List, Optional
 
-from runtime.config_loader import load_yaml, BASE_DIR
+from runtime.config_loader import load_yaml_cached
 from engines.domain_rules.loader import load_domain_profile
 from engines.shared_types import EngineInput, EngineOutput
 
 # V testech je LLMClient mockovaný – proto se importuje přímo.
 from llm.client import LLMClient, LLMMessage
+from llm.prompt_registry import get_prompt_registry
 
 # Konstanty názvů enginů – aby se předešlo překlepům
 ENGINE_NAME_LLM = "core_legal_engine_v1"
 ENGINE_NAME_SKELETON = "core_legal_engine_skeleton"
 
-# Konfigurace – ideálně existuje, ale když ne, engine nesmí spadnout
-try:
-    _CONFIG: Dict[str, Any] = load_yaml("engines/core_legal/config.yaml")
-except Exception:
-    _CONFIG = {}
+# Konfigurace – ideálně existuje, ale když ne, engine nesmí spadnout.
+# Načítá se až při prvním použití, ne při importu.
+def _config() -> Dict[str, Any]:
+    try:
+        return load_yaml_cached("engines/core_legal/config.yaml")
+    except Exception:
+        return {}
 
 
 # -----------------------------
@@ -44,12 +47,21 @@ except Exception:
 
 def _load_prompt(name: str) -> str:
     """
-    Načte prompt pro daný krok z:
-    engines/core_legal/prompts/<name>.md
+    Vrátí prompt pro daný krok (engines/core_legal/prompts/<name>.md)
+    z registru promptů – načtený jednou, včetně global + core_legal policy.
     """
-    path = BASE_DIR / "engines" / "core_legal" / "prompts" / f"{name}.md"
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    return get_prompt_registry().get("core_legal", name).text
+
+
+def _prompt_versions(steps: List[str]) -> Dict[str, str]:
+    registry = get_prompt_registry()
+    versions: Dict[str, str] = {}
+    for step in steps:
+        try:
+            versions[step] = registry.get("core_legal", step).version
+        except KeyError:
+            continue
+    return versions
 
 
 def _ask_step(llm: LLMClient, step: str, user_query: str) -> str:
@@ -59,11 +71,13 @@ def _ask_step(llm: LLMClient, step: str, user_query: str) -> str:
     Načte:
     - správný prompt
     - temperature a max_tokens z configu (pokud existují)
+
+    Model vybírá router podle kroku (`step`) a model_defaults z configu.
     """
     prompt = _load_prompt(step)
 
-    temp_cfg = _CONFIG.get("temperature", {}) or {}
-    max_cfg = _CONFIG.get("max_tokens", {}) or {}
+    temp_cfg = _config().get("temperature", {}) or {}
+    max_cfg = _config().get("max_tokens", {}) or {}
 
     temperature = temp_cfg.get(step)
     max_tokens = max_cfg.get(step)
@@ -78,6 +92,8 @@ def _ask_step(llm: LLMClient, step: str, user_query: str) -> str:
         messages=messages,
         temperature=temperature,
         max_tokens=max_tokens,
+        step=step,
+        model_defaults=_config().get("model_defaults"),
     ).strip()
 
 
@@ -144,7 +160,7 @@ def _skeleton_irac(case: Dict[str, Any], error: Optional[str] = None) -> EngineO
             "domain": case.get("domain", "unknown"),
             "risk_level": case.get("risk_level", "unknown"),
             "intent": case.get("intent", "unknown"),
-            "config_domains": _CONFIG.get("domains", []),
+            "config_domains": _config().get("domains", []),
         },
     }
 
@@ -271,8 +287,9 @@ def run(engine_input: EngineInput) -> EngineOutput:
             "domain": domain,
             "risk_level": case.get("risk_level", "unknown"),
             "intent": case.get("intent", "unknown"),
-            "config_domains": _CONFIG.get("domains", []),
+            "config_domains": _config().get("domains", []),
             "llm_mode": "conclusion_only",
+            "prompt_versions": _prompt_versions(["conclusion", "certainty"]),
         },
     }
 
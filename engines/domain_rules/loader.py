@@ -13,6 +13,7 @@ from __future__ import annotations
 
 from typing import Dict, Any, Optional
 
+from engines.text_normalize import normalize_text
 from runtime.config_loader import load_yaml
 
 
@@ -36,28 +37,29 @@ def normalize_domain_name(raw: Optional[str]) -> str:
     if not raw:
         return "civil"
 
-    text = raw.strip().lower()
+    # bez diakritiky – "správní" i "spravni" vypadají stejně
+    text = normalize_text(raw)
 
     # hrubé heuristiky podle podřetězců
     if "trest" in text:
         return "trestni"
     if "rodin" in text:
         return "rodinne"
-    if "správn" in text or "spravn" in text:
+    if "spravn" in text:
         return "spravni"
-    if "škol" in text or "skol" in text:
+    if "skol" in text:
         return "skolske"
     if "pracovn" in text:
         return "pracovni"
-    if "notář" in text or "notar" in text:
+    if "notar" in text:
         return "notarska"
     if "zdravotn" in text:
         return "zdravotnicke"
-    if "spotřebit" in text or "spotreb" in text:
+    if "spotreb" in text:
         return "spotrebitel"
 
     # civilní právo / obecné občanské
-    if "občans" in text or "obcans" in text:
+    if "obcans" in text:
         return "civil"
 
     # fallback – raději civil než nic
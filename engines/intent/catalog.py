@@ -0,0 +1,310 @@
+# engines/intent/catalog.py
+"""
+Katalog intentů rozdělený na doménové shardy (podsložky data/intents/).
+
+Klasifikace je dvoustupňová:
+
+1. levný doménový pre-pass nad klíčovými slovy domén
+   (data/intents/<doména>/_domain.json, volitelně doplněná o
+   legal_issues / risk_keywords z engines/domain_rules/<klíč>.yaml),
+2. skórování intentů jen v nejlepších `top_domains` doménách.
+
+Definice i index shardu se načtou až při prvním použití, takže práce na
+dotaz roste s relevantními doménami, ne s celým katalogem. Váhy klíčových
+slov (weighted=True) potřebují IDF přes celý katalog – to se skládá z
+četností kmenů (`stem_df`) předpočítaných v manifestech domén. Jen shard,
+jehož manifest četnosti nemá nebo neodpovídá souborům intentů ve složce,
+se kvůli IDF načte celý.
+Doména bez manifestu se prochází vždy. Když vybrané domény nedají
+výsledek aspoň `second_chance_below` (výchozí = jedno plnohodnotné přesné
+klíčové slovo; tedy i když nedají nic nebo jen opravu překlepu), prohledá
+se zbytek katalogu (druhá šance). Silný, ale špatný zásah ve vybrané
+doméně druhou šanci nespustí – top-1 se proto od plného průchodu může
+lišit, výsledek pod prahem ne.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+from engines.domain_rules.loader import load_domain_profile
+from engines.text_normalize import normalize_all
+
+from .definition import IntentDefinition
+from .index import IntentIndex, KeywordEntry, definitions_df, idf_from_df
+from .loader import BASE_DIR, intent_files, list_intent_domains, load_intents
+from .stemmer import stem_tokens
+
+DOMAIN_MANIFEST = "_domain.json"
+DEFAULT_TOP_DOMAINS = 2
+# nejlepší skóre ve vybraných doménách pod touto hranicí → prohledá se zbytek
+SECOND_CHANCE_BELOW = 1.0
+
+
+@dataclass
+class DomainManifest:
+    domain: str
+    label_cs: str = ""
+    keywords: List[str] = field(default_factory=list)
+    negative_keywords: List[str] = field(default_factory=list)
+    domain_rules: Optional[str] = None
+    keyword_weights: Dict[str, float] = field(default_factory=dict)
+    # předpočítané četnosti kmenů přes intenty domény a soubory, ze kterých vznikly
+    stem_df: Optional[Dict[str, int]] = None
+    intent_count: int = 0
+    intent_files: Tuple[str, ...] = ()
+
+    keywords_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    negative_keywords_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.keywords_norm = normalize_all(self.keywords)
+        self.negative_keywords_norm = normalize_all(self.negative_keywords)
+
+
+def load_domain_manifest(domain: str, base_dir: str = BASE_DIR) -> DomainManifest:
+    """
+    Manifest domény. Chybějící nebo rozbitý soubor = prázdný manifest
+    (doména se pak prochází vždy).
+    """
+    path = os.path.join(base_dir, domain, DOMAIN_MANIFEST)
+    raw: Dict = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f) or {}
+        except Exception as e:
+            print(f"[intent_catalog] Error loading {path}: {e}")
+            raw = {}
+
+    keywords = list(raw.get("keywords") or [])
+    rules = raw.get("domain_rules")
+    if rules:
+        profile = load_domain_profile(rules)
+        keywords += list(profile.get("legal_issues") or [])
+        keywords += list(profile.get("risk_keywords") or [])
+
+    return DomainManifest(
+        domain=domain,
+        label_cs=raw.get("label_cs", ""),
+        keywords=keywords,
+        negative_keywords=list(raw.get("negative_keywords") or []),
+        domain_rules=rules,
+        keyword_weights=dict(raw.get("keyword_weights") or {}),
+        stem_df=dict(raw["stem_df"]) if isinstance(raw.get("stem_df"), dict) else None,
+        intent_count=int(raw.get("intent_count") or 0),
+        intent_files=tuple(raw.get("intent_files") or ()),
+    )
+
+
+class IntentShard:
+    """
+    Intenty jedné domény; definice i index se načtou líně při prvním
+    přístupu. `load_definitions()` přečte JSONy hned (index zůstává líný).
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        base_dir: str = BASE_DIR,
+        weighted: bool = True,
+        idf_provider: Optional[Callable[[], Dict[str, float]]] = None,
+    ) -> None:
+        self.domain = domain
+        self.base_dir = base_dir
+        self.weighted = weighted
+        # IDF přes celý katalog (bez něj IDF jen přes intenty shardu)
+        self._idf_provider = idf_provider
+        self._definitions: Optional[List[IntentDefinition]] = None
+        self._index: Optional[IntentIndex] = None
+        self._by_id: Dict[str, IntentDefinition] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+
+    def load_definitions(self) -> List[IntentDefinition]:
+        if self._definitions is None:
+            with self._lock:
+                if self._definitions is None:
+                    self._definitions = load_intents(self.domain, self.base_dir)
+        return self._definitions
+
+    @property
+    def index(self) -> IntentIndex:
+        if self._index is None:
+            definitions = self.load_definitions()
+            idf = self._idf_provider() if self.weighted and self._idf_provider else None
+            with self._lock:
+                if self._index is None:
+                    self._by_id = {d.intent_id: d for d in definitions}
+                    self._index = IntentIndex(definitions, weighted=self.weighted, idf=idf)
+        return self._index
+
+    def definitions(self) -> List[IntentDefinition]:
+        return list(self.index.definitions)
+
+    def get(self, intent_id: str) -> Optional[IntentDefinition]:
+        _ = self.index  # zajistí načtení shardu
+        return self._by_id.get(intent_id)
+
+
+@dataclass
+class CatalogMatch:
+    # (definice, skóre) v pořadí katalogu – shody se rozhodují pořadím
+    scores: List[Tuple[IntentDefinition, float]] = field(default_factory=list)
+    matched: List[KeywordEntry] = field(default_factory=list)
+    fuzzy: List[KeywordEntry] = field(default_factory=list)
+    # výsledek doménového pre-passu (jen kladná skóre)
+    domain_scores: Dict[str, float] = field(default_factory=dict)
+    # domény, jejichž intenty se skutečně skórovaly
+    scanned: List[str] = field(default_factory=list)
+
+
+class IntentCatalog:
+    def __init__(
+        self,
+        base_dir: str = BASE_DIR,
+        top_domains: int = DEFAULT_TOP_DOMAINS,
+        fuzzy: bool = True,
+        weighted: bool = True,
+        second_chance_below: float = SECOND_CHANCE_BELOW,
+    ) -> None:
+        self.base_dir = base_dir
+        self.top_domains = max(1, top_domains)
+        self.second_chance_below = second_chance_below
+        self.fuzzy = fuzzy
+        self.weighted = weighted
+        self.domains: List[str] = list_intent_domains(base_dir)
+        self._idf: Optional[Dict[str, float]] = None
+        self._idf_lock = threading.Lock()
+        self.shards: Dict[str, IntentShard] = {
+            d: IntentShard(d, base_dir, weighted, self.idf) for d in self.domains
+        }
+
+        manifests = [load_domain_manifest(d, base_dir) for d in self.domains]
+        self.manifests: Dict[str, DomainManifest] = {m.domain: m for m in manifests}
+        routed = [m for m in manifests if m.keywords]
+        self.unrouted: List[str] = [m.domain for m in manifests if not m.keywords]
+        self.domain_index = IntentIndex(routed, weighted=weighted)
+
+    # --- 1. stupeň: domény ---
+
+    def select_domains(self, query_stems: FrozenSet[str]) -> Tuple[List[str], Dict[str, float]]:
+        match = self.domain_index.match_stems(query_stems, fuzzy=self.fuzzy)
+        prepass = {
+            self.domain_index.definitions[pos].domain: score
+            for pos, score in match.scores.items()
+            if score > 0
+        }
+        return self.rank_domains(prepass), prepass
+
+    def rank_domains(self, prepass: Dict[str, float]) -> List[str]:
+        """Nejlepší `top_domains` domén z pre-passu + domény bez manifestu."""
+        ranked = sorted(prepass, key=lambda d: (-prepass[d], d))[: self.top_domains]
+        return ranked + self.unrouted
+
+    # --- 2. stupeň: intenty ve vybraných shardech ---
+
+    def _scan(self, domains: Sequence[str], query_stems: FrozenSet[str], result: CatalogMatch) -> None:
+        wanted = set(domains)
+        for domain in self.domains:
+            if domain not in wanted:
+                continue
+            index = self.shards[domain].index
+            match = index.match_stems(query_stems, fuzzy=self.fuzzy)
+            for pos in sorted(match.scores):
+                result.scores.append((index.definitions[pos], match.scores[pos]))
+            result.matched.extend(match.matched)
+            result.fuzzy.extend(match.fuzzy)
+            result.scanned.append(domain)
+
+    def match(self, query: str) -> CatalogMatch:
+        query_stems = frozenset(stem_tokens(query))
+        selected, prepass = self.select_domains(query_stems)
+
+        result = CatalogMatch(domain_scores=prepass)
+        self._scan(selected, query_stems, result)
+        if self.needs_second_chance(result):
+            self._scan([d for d in self.domains if d not in selected], query_stems, result)
+        return result
+
+    def needs_second_chance(self, result: CatalogMatch) -> bool:
+        """Vybrané domény nedaly nic kladného, nebo jen slabý zásah."""
+        best = max((score for _, score in result.scores), default=0.0)
+        return best <= 0 or best < self.second_chance_below
+
+    def idf(self) -> Dict[str, float]:
+        """
+        IDF kmenů přes intenty všech shardů – váhy klíčových slov jsou tak
+        srovnatelné napříč doménami. Četnosti se berou z manifestů; shard
+        bez platných předpočítaných četností se načte a spočítá na místě.
+        """
+        if self._idf is None:
+            with self._idf_lock:
+                if self._idf is None:
+                    df: Dict[str, int] = {}
+                    total = 0
+                    for domain in self.domains:
+                        count, domain_df = self._domain_df(domain)
+                        total += count
+                        for s, n in domain_df.items():
+                            df[s] = df.get(s, 0) + n
+                    self._idf = idf_from_df(df, total)
+        return self._idf
+
+    def _domain_df(self, domain: str) -> Tuple[int, Dict[str, int]]:
+        """(počet intentů, df kmenů) domény – z manifestu, nebo z definic."""
+        manifest = self.manifests[domain]
+        if manifest.stem_df is not None and manifest.intent_files == intent_files(
+            domain, self.base_dir
+        ):
+            return manifest.intent_count, manifest.stem_df
+        definitions = self.shards[domain].load_definitions()
+        return len(definitions), definitions_df(definitions)
+
+    # --- přístup k definicím ---
+
+    def load_definitions(self) -> None:
+        """Přečte JSONy všech shardů hned (indexy zůstávají líné)."""
+        for shard in self.shards.values():
+            shard.load_definitions()
+
+    def iter_definitions(self) -> Iterator[IntentDefinition]:
+        """Všechny definice; shardy se načítají až při iteraci."""
+        for domain in self.domains:
+            yield from self.shards[domain].definitions()
+
+    def definitions(self) -> List[IntentDefinition]:
+        """Všechny definice (načte všechny shardy)."""
+        return list(self.iter_definitions())
+
+    def find(self, intent_id: str, domain: Optional[str] = None) -> Optional[IntentDefinition]:
+        """
+        Definice podle id. Nejdřív se zkusí doména z payloadu intent enginu
+        a doména z prefixu id, teprve pak ostatní shardy.
+        """
+        first = [d for d in self.domains if d == domain or intent_id.startswith(f"{d}_")]
+        for name in first + [d for d in self.domains if d not in first]:
+            found = self.shards[name].get(intent_id)
+            if found is not None:
+                return found
+        return None
+
+    def loaded_domains(self) -> List[str]:
+        return [d for d in self.domains if self.shards[d].loaded]
+
+
+__all__ = [
+    "CatalogMatch",
+    "DomainManifest",
+    "IntentCatalog",
+    "IntentShard",
+    "SECOND_CHANCE_BELOW",
+    "load_domain_manifest",
+]
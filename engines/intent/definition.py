@@ -1,7 +1,36 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from engines.text_normalize import normalize_all
+
+
+@dataclass(frozen=True)
+class CompiledRiskPattern:
+    pattern: str
+    regex: Pattern[str]
+    dimensions: Tuple[str, ...]
+
+
+def compile_risk_patterns(risk_patterns: List[Any]) -> Tuple[CompiledRiskPattern, ...]:
+    """
+    Zkompiluje risk patterny ({"pattern": ..., "dimensions": [...]}).
+    Chybný regex se přeskočí – nesmí shodit načtení intentu.
+    """
+    compiled: List[CompiledRiskPattern] = []
+    for rp in risk_patterns or []:
+        pattern = rp.get("pattern") if isinstance(rp, dict) else getattr(rp, "pattern", None)
+        dimensions = (rp.get("dimensions") if isinstance(rp, dict) else getattr(rp, "dimensions", None)) or []
+        if not pattern:
+            continue
+        try:
+            regex = re.compile(pattern)
+        except re.error:
+            continue
+        compiled.append(CompiledRiskPattern(pattern, regex, tuple(dimensions)))
+    return tuple(compiled)
 
 
 @dataclass
@@ -23,4 +52,17 @@ class IntentDefinition:
     notes: str = ""
     version: str = "1.0.0"
     intent_group: str = "general"
-    examples: List[str] = field(default_factory=list)
\ No newline at end of file
+    examples: List[str] = field(default_factory=list)
+    # ruční váhy klíčových slov (přebijí vypočtené IDF, viz index.py)
+    keyword_weights: Dict[str, float] = field(default_factory=dict)
+
+    # normalizovaná klíčová slova – počítají se jednou při načtení,
+    # ne při každém requestu
+    keywords_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    negative_keywords_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    compiled_risk_patterns: Tuple[CompiledRiskPattern, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.keywords_norm = normalize_all(self.keywords or [])
+        self.negative_keywords_norm = normalize_all(self.negative_keywords or [])
+        self.compiled_risk_patterns = compile_risk_patterns(self.risk_patterns)
@@ -1,43 +1,92 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
 from engines.shared_types import EngineInput, EngineOutput
-from .loader import load_intents, IntentDefinition
+from .catalog import CatalogMatch, IntentCatalog
+from .llm_fallback import IntentLLMFallback, LLMVote, merge_vote, vote_to_dict
+from .loader import IntentDefinition
+from .session import SessionStore
+from .snapshot import (
+    IntentSnapshot,
+    IntentSnapshotHolder,
+    pin_snapshot,
+    pinned_snapshot,
+    reload_interval_from_env,
+)
 from llm.client import LLMClient, LLMMessage
-import unicodedata
 
-def _lower(s: str | None) -> str:
-    return (s or "").lower()
 
+# -----------------------------
+# 1) Snapshot intent dat (katalog s doménovými shardy, hot reload)
+# -----------------------------
 
+_SNAPSHOTS: Optional[IntentSnapshotHolder] = None
+_SNAPSHOTS_LOCK = threading.Lock()
 
-def _normalize(s: str) -> str:
-    """lowercase + remove diacritics"""
-    if not s:
-        return ""
-    s = s.lower()
-    return "".join(
-        c for c in unicodedata.normalize("NFD", s)
-        if unicodedata.category(c) != "Mn"
-    )
+
+def get_snapshot_holder() -> IntentSnapshotHolder:
+    """
+    Držák aktuálního snapshotu. Env INTENT_RELOAD_INTERVAL_S > 0 spustí
+    watcher, který při změně data/intents snapshot vymění bez restartu.
+    """
+    global _SNAPSHOTS
+    if _SNAPSHOTS is None:
+        with _SNAPSHOTS_LOCK:
+            if _SNAPSHOTS is None:
+                holder = IntentSnapshotHolder()
+                interval = reload_interval_from_env()
+                if interval > 0:
+                    holder.start_watcher(interval)
+                _SNAPSHOTS = holder
+    return _SNAPSHOTS
+
+
+def get_intent_snapshot() -> IntentSnapshot:
+    """Snapshot připnutý requestu (request_snapshot), jinak aktuální."""
+    pinned = pinned_snapshot()
+    return pinned if pinned is not None else get_snapshot_holder().current()
+
+
+@contextmanager
+def request_snapshot() -> Iterator[IntentSnapshot]:
+    """
+    Připne jeden snapshot na celý request (run_pipeline) – intent, risk i
+    short odpověď pak čtou stejnou verzi dat. Vnořené volání ponechá
+    už připnutý snapshot.
+    """
+    with pin_snapshot(get_intent_snapshot()) as snapshot:
+        yield snapshot
 
 
-# -----------------------------
-# 1) Cache intent definic
-# -----------------------------
+def get_intent_catalog() -> IntentCatalog:
+    """
+    Katalog aktuálního snapshotu – shardy domén se načtou až při prvním
+    dotazu, který do nich doménový pre-pass pošle.
+    """
+    return get_intent_snapshot().catalog
+
+
+_SESSIONS: Optional[SessionStore] = None
 
-_INTENTS_CACHE: Optional[List[IntentDefinition]] = None
+
+def get_session_store() -> SessionStore:
+    """Inkrementální klasifikátory vícekolových chatů (podle session_id)."""
+    global _SESSIONS
+    if _SESSIONS is None:
+        with _SNAPSHOTS_LOCK:
+            if _SESSIONS is None:
+                _SESSIONS = SessionStore(get_intent_catalog)
+    return _SESSIONS
 
 
 def get_intent_definitions() -> List[IntentDefinition]:
     """
-    Načte a cacheuje definice intentů z data/intents/*.json.
+    Všechny definice intentů z data/intents/**/*.json (načte všechny shardy).
     """
-    global _INTENTS_CACHE
-    if _INTENTS_CACHE is None:
-        _INTENTS_CACHE = load_intents()
-    return _INTENTS_CACHE
+    return get_intent_catalog().definitions()
 
 
 # -----------------------------
@@ -55,13 +104,55 @@ def get_llm() -> LLMClient:
     global _LLM
     if _LLM is None:
         _LLM = LLMClient()
+        if getattr(_LLM, "backend", "mock") != "mock":
+            # s reálným backendem se prompt fallbacku zkompiluje hned
+            get_llm_fallback()
     return _LLM
 
 
+_LLM_FALLBACK: Optional[IntentLLMFallback] = None
+
+
+def get_llm_fallback() -> IntentLLMFallback:
+    """LLM fallback klasifikace s cache podle normalizovaného dotazu."""
+    global _LLM_FALLBACK
+    if _LLM_FALLBACK is None:
+        with _SNAPSHOTS_LOCK:
+            if _LLM_FALLBACK is None:
+                fallback = IntentLLMFallback()
+                fallback.warm()
+                _LLM_FALLBACK = fallback
+    return _LLM_FALLBACK
+
+
 # -----------------------------
 # 3) Heuristická klasifikace
 # -----------------------------
 
+# pod touto jistotou heuristiky se (s openai backendem) ptáme LLM
+LLM_FALLBACK_CONFIDENCE = 0.4
+
+
+def heuristic_confidence(h: Dict[str, Any]) -> float:
+    """
+    Hrubý odhad confidence ze součtu vah tref (engines/intent/index.py) –
+    specifická fráze dá víc než obecné slovo sdílené mnoha intenty.
+    """
+    raw_score = max(h["max_intent_score"], h["max_domain_score"])
+    return min(1.0, raw_score / 5.0) if raw_score > 0 else 0.0
+
+
+def classify_query(user_query: str, catalog: Optional[IntentCatalog] = None) -> Dict[str, Any]:
+    """
+    Bezstavová heuristická klasifikace nad daným (nebo aktuálním)
+    katalogem – výstup _heuristic_classify doplněný o "confidence".
+    Slouží i offline nástrojům (tools/evaluate_intents.py).
+    """
+    h = _summarize_match((catalog or get_intent_catalog()).match(user_query))
+    h["confidence"] = heuristic_confidence(h)
+    return h
+
+
 def _heuristic_classify(user_query: str) -> Dict[str, Any]:
     """
     Heuristické přiřazení intentu a domény na základě
@@ -76,36 +167,25 @@ def _heuristic_classify(user_query: str) -> Dict[str, Any]:
         "intent_scores": {id: score},
         "domain_scores": {domain: score},
         "matched_keywords": [...],
-        "max_intent_score": int,
-        "max_domain_score": int,
+        "fuzzy_keywords": [...],   # trefená jen přes opravu překlepu
+        "scanned_domains": [...],  # shardy, které se skutečně skórovaly
+        "max_intent_score": float,
+        "max_domain_score": float,
     }
     """
-    text = _normalize(user_query)
-
-    intent_scores: Dict[str, int] = {}
-    domain_scores: Dict[str, int] = {}
-    intent_groups: Dict[str, str] = {}
-    matched_keywords: List[str] = []
+    # doménový pre-pass → skórování intentů jen ve vybraných shardech
+    return _summarize_match(get_intent_catalog().match(user_query))
 
-    for intent_def in get_intent_definitions():
-        score = 0
 
-        # bezpečný přístup – starší JSONy nemusí mít keywords / negative_keywords
-        keywords = getattr(intent_def, "keywords", None) or []
-        negative_keywords = getattr(intent_def, "negative_keywords", None) or []
-
-        # pozitivní klíčová slova
-        for kw in intent_def.keywords:
-            kw_norm = _normalize(kw)
-            if kw_norm in text:
-                score += 1
-                matched_keywords.append(kw)
-
-        # negativní klíčová slova – penalizace, aby se intent nechytil omylem
-        for neg in intent_def.negative_keywords:
-            if _normalize(neg) in text:
-                score -= 2
+def _summarize_match(match: CatalogMatch) -> Dict[str, Any]:
+    """Výsledek katalogu (bezstavový i session) → dict _heuristic_classify."""
+    intent_scores: Dict[str, float] = {}
+    domain_scores: Dict[str, float] = {}
+    intent_groups: Dict[str, str] = {}
+    matched_keywords: List[str] = [entry.keyword for entry in match.matched]
 
+    # pořadí katalogu zachováno – shody se rozhodují pořadím
+    for intent_def, score in match.scores:
         if score <= 0:
             continue
 
@@ -124,8 +204,8 @@ def _heuristic_classify(user_query: str) -> Dict[str, Any]:
     dominant_intent = "general"
     dominant_intent_group = "info"
     dominant_domain = "unknown"
-    max_intent_score = 0
-    max_domain_score = 0
+    max_intent_score = 0.0
+    max_domain_score = 0.0
 
     for k, v in intent_scores.items():
         if v > max_intent_score:
@@ -148,11 +228,50 @@ def _heuristic_classify(user_query: str) -> Dict[str, Any]:
         "intent_scores": intent_scores,
         "domain_scores": domain_scores,
         "matched_keywords": matched_keywords,
+        "fuzzy_keywords": [entry.keyword for entry in match.fuzzy],
+        "scanned_domains": match.scanned,
         "max_intent_score": max_intent_score,
         "max_domain_score": max_domain_score,
     }
 
 
+def _apply_vote(h: Dict[str, Any], vote: Optional[LLMVote], catalog: IntentCatalog) -> Dict[str, Any]:
+    """Přičte hlas LLM ke skóre heuristiky a znovu vybere vítězný intent."""
+    intent_scores = merge_vote(h["intent_scores"], vote)
+    if vote is None or intent_scores == h["intent_scores"]:
+        return h
+
+    domain_scores = dict(h["domain_scores"])
+    domain_scores[vote.domain] = domain_scores.get(vote.domain, 0.0) + (
+        intent_scores[vote.intent] - h["intent_scores"].get(vote.intent, 0.0)
+    )
+
+    best_intent, best_score = h["intent"], 0.0
+    for k, v in intent_scores.items():
+        if v > best_score:
+            best_intent, best_score = k, v
+    best_domain, best_domain_score = h["domain"], 0.0
+    for k, v in domain_scores.items():
+        if v > best_domain_score:
+            best_domain, best_domain_score = k, v
+
+    intent_group = h["intent_group"]
+    if best_intent != h["intent"]:
+        definition = catalog.find(best_intent, vote.domain)
+        intent_group = getattr(definition, "intent_group", None) or "info"
+
+    return {
+        **h,
+        "intent": best_intent,
+        "domain": best_domain,
+        "intent_group": intent_group,
+        "intent_scores": intent_scores,
+        "domain_scores": domain_scores,
+        "max_intent_score": best_score,
+        "max_domain_score": best_domain_score,
+    }
+
+
 # -----------------------------
 # 4) Veřejný vstup enginu
 # -----------------------------
@@ -163,6 +282,12 @@ def run(engine_input: EngineInput) -> EngineOutput:
 
     Vstup:
       context["case"]["user_query"] – text dotazu
+      context["use_llm"]            – True = povolit LLM doplněk (jinak jen heuristika)
+      context["heuristic_only"]     – volitelně True = bez LLM doplňku i s use_llm
+      context["session_id"]         – volitelně id chatu: user_query je jen nová
+                                      zpráva, klasifikuje se celá konverzace
+                                      inkrementálně (engines/intent/session.py)
+      context["session_reset"]      – True = zahodit dosavadní stav session
 
     Výstup v payload:
       {
@@ -170,58 +295,77 @@ def run(engine_input: EngineInput) -> EngineOutput:
         "domain": "...",
         "intent_group": "...",
         "keywords": [...],
+        "fuzzy_keywords": [...],  # podmnožina keywords trefená přes překlep
+        "scanned_domains": [...],
+        "session_turns": int | None,  # počet zpráv session (jen se session_id)
         "confidence": float 0.0–1.0,
         "raw_intent_scores": {...},
         "raw_domain_scores": {...},
-        "llm_raw": str | None,   # volitelný LLM názor
+        "llm_raw": str | None,   # surová odpověď LLM fallbacku
+        "llm_vote": {...} | None,  # rozparsovaný hlas LLM (intent, confidence, cached)
       }
     """
     ctx = engine_input.context or {}
     case = ctx.get("case", {}) or {}
     user_query = case.get("user_query", "") or ""
-
-    # 1) heuristika nad data/intents/*
-    h = _heuristic_classify(user_query)
-
-    max_intent_score: int = h["max_intent_score"]
-    max_domain_score: int = h["max_domain_score"]
-    raw_intent_scores: Dict[str, int] = h["intent_scores"]
-    raw_domain_scores: Dict[str, int] = h["domain_scores"]
-    matched_keywords: List[str] = h["matched_keywords"]
-
-    # hrubý odhad confidence – čím víc tref, tím vyšší
-    raw_score = max(max_intent_score, max_domain_score)
-    confidence = min(1.0, raw_score / 5.0) if raw_score > 0 else 0.0
-
-    # 2) volitelný LLM doplněk – jen když je jistota nízká a backend je openai
+    # jeden snapshot na celý request (katalog i verze dat pro cache LLM)
+    snapshot = get_intent_snapshot()
+
+    # 1) heuristika nad data/intents/* (v chatu inkrementálně za celou session)
+    session_id = ctx.get("session_id")
+    session_turns: Optional[int] = None
+    context_stems: List[str] = []
+    if session_id:
+        store = get_session_store()
+        if ctx.get("session_reset"):
+            store.reset(session_id)
+        session = store.get(session_id, snapshot.catalog)
+        h = _summarize_match(session.add(user_query, snapshot.catalog))
+        session_turns = session.turns
+        context_stems = session.stems
+    else:
+        h = _summarize_match(snapshot.catalog.match(user_query))
+
+    confidence = heuristic_confidence(h)
+
+    # 2) volitelný LLM fallback – jen s context["use_llm"], když je jistota
+    #    nízká a backend není mock (context["heuristic_only"] ho vypne –
+    #    short režim, skeleton degradace). Hlas LLM se přičte ke skóre;
+    #    výsledek se cachuje podle dotazu (v chatu i podle konverzace).
     llm_raw: Optional[str] = None
+    llm_vote: Optional[Dict[str, Any]] = None
     try:
-        llm = get_llm()
-        if getattr(llm, "backend", "mock") == "openai" and confidence < 0.4:
-            # TODO: ideálně načíst prompt z intent_classification.md
-            system_prompt = (
-                "Jsi právní klasifikační modul. Na základě dotazu urči "
-                "pravděpodobný právní intent a doménu. Odpovídej stručně, "
-                "ideálně ve strukturovaném JSON."
+        use_llm = bool(ctx.get("use_llm")) and not ctx.get("heuristic_only")
+        llm = get_llm() if use_llm else None
+        if llm is not None and getattr(llm, "backend", "mock") != "mock" and confidence < LLM_FALLBACK_CONFIDENCE:
+            h = {**h, "confidence": confidence}
+            vote, llm_raw, cached = get_llm_fallback().classify(
+                llm, user_query, h, snapshot.catalog, snapshot.version, context_stems
             )
-            messages = [
-                LLMMessage(role="system", content=system_prompt),
-                LLMMessage(role="user", content=user_query),
-            ]
-            llm_raw = llm.chat(use_case="helper", messages=messages)
+            h = _apply_vote(h, vote, snapshot.catalog)
+            llm_vote = vote_to_dict(vote, cached)
+            confidence = heuristic_confidence(h)
     except Exception:
         # Jakýkoliv problém s LLM nesmí shodit engine – prostě LLM ignorujeme
-        llm_raw = None
+        llm_vote = None
+
+    raw_intent_scores: Dict[str, float] = h["intent_scores"]
+    raw_domain_scores: Dict[str, float] = h["domain_scores"]
+    matched_keywords: List[str] = h["matched_keywords"]
 
     payload: Dict[str, Any] = {
         "intent": h["intent"],
         "domain": h["domain"],
         "intent_group": h["intent_group"],
         "keywords": matched_keywords,
+        "fuzzy_keywords": h["fuzzy_keywords"],
+        "scanned_domains": h["scanned_domains"],
+        "session_turns": session_turns,
         "confidence": confidence,
         "raw_intent_scores": raw_intent_scores,
         "raw_domain_scores": raw_domain_scores,
         "llm_raw": llm_raw,
+        "llm_vote": llm_vote,
     }
 
     notes: List[str] = [
@@ -230,6 +374,11 @@ def run(engine_input: EngineInput) -> EngineOutput:
         f"intent_group={h['intent_group']}, "
         f"confidence={confidence}"
     ]
+    if llm_vote is not None:
+        notes.append(
+            f"intent_engine: LLM vote intent={llm_vote['intent']}, "
+            f"confidence={llm_vote['confidence']}, cached={llm_vote['cached']}"
+        )
 
     return EngineOutput(
         name="intent_engine",
@@ -0,0 +1,106 @@
+# engines/intent/fuzzy.py
+"""
+Tolerance překlepů pro index klíčových slov.
+
+Slovník tvoří kmeny klíčových slov všech intentů. Kmen z dotazu, který
+ve slovníku není ("rycjlost"), se dohledá přes trigramový invertovaný
+index: kandidáti musí mít podobnou délku a sdílet dost trigramů (každá
+editace zničí nejvýš 3 trigramy), teprve na ně se pouští omezená
+Levenshteinova vzdálenost. Práce tak roste s počtem kandidátů, ne s
+velikostí katalogu.
+
+Běžná slova češtiny (COMMON_WORDS – spojky, zájmena, pomocná slovesa) se
+neopravují nikdy: "pokud" není překlep slova "pokut(a)".
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .stemmer import stem
+
+FUZZY_MIN_LEN = 4
+
+# normalizované tvary (bez diakritiky); do slovníku se ukládají jejich kmeny
+COMMON_WORDS = frozenset(
+    stem(w)
+    for w in (
+        "pokud jestli jestlize kdyz kdyby protoze proto aby nebo anebo ale "
+        "ktery ktera ktere kterou kterych kteri jaky jaka jake jakou kde kdy "
+        "proc jak kdo neco nic nikdo nejaky nejaka nejake takze take taky "
+        "jeste jenom pouze podle proti mezi pred behem pres kvuli bude budu "
+        "byl byla bylo byli jsme jste mam mame mate maji muze muzu mohu "
+        "muzeme musim musi musime chci chce chteji delat udelat mohl mohla "
+        "tento tato tyto tuto tohle toho tomu jeho jeji jejich moje muj "
+        "svuj sve svou nas vas prosim dekuji velmi hodne dnes vcera zitra"
+    ).split()
+)
+
+
+def max_distance(length: int) -> int:
+    """Povolený počet překlepů podle délky kmene."""
+    if length < FUZZY_MIN_LEN:
+        return 0
+    return 1 if length <= 7 else 2
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> Optional[int]:
+    """Editační vzdálenost, nebo None, když přesáhne `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return None
+        prev = cur
+    return prev[-1] if prev[-1] <= limit else None
+
+
+class FuzzyStemIndex:
+    def __init__(self, vocabulary: Iterable[str]) -> None:
+        self.vocabulary: Set[str] = set(vocabulary)
+        self._grams: Dict[str, List[str]] = {}
+        for word in sorted(self.vocabulary):
+            if len(word) < FUZZY_MIN_LEN:
+                continue
+            for gram in trigrams(word):
+                self._grams.setdefault(gram, []).append(word)
+        # index je po sestavení neměnný → výsledky lze memoizovat
+        self.lookup = lru_cache(maxsize=8192)(self._lookup)
+
+    def _lookup(self, word: str) -> Tuple[Tuple[str, int], ...]:
+        """
+        Kmeny ze slovníku do povolené vzdálenosti od `word`, od nejbližšího.
+        Přesná shoda ani běžná slova se nehledají.
+        """
+        limit = max_distance(len(word))
+        if limit == 0 or word in self.vocabulary or word in COMMON_WORDS:
+            return ()
+
+        grams = trigrams(word)
+        min_shared = len(grams) - 3 * limit
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        found: List[Tuple[str, int]] = []
+        for candidate, count in shared.items():
+            if count < min_shared:
+                continue
+            dist = bounded_levenshtein(word, candidate, limit)
+            if dist is not None:
+                found.append((candidate, dist))
+        return tuple(sorted(found, key=lambda item: (item[1], item[0])))
+
+
+__all__ = ["COMMON_WORDS", "FUZZY_MIN_LEN", "FuzzyStemIndex", "bounded_levenshtein", "max_distance", "trigrams"]
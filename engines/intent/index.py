@@ -0,0 +1,273 @@
+# engines/intent/index.py
+"""
+Předpočítaný index klíčových slov intentů (kmen → klíčová slova).
+
+Každé klíčové slovo se při sestavení indexu rozloží na množinu kmenů
+(engines/intent/stemmer.py). Klíčové slovo "trefí" dotaz, když dotaz
+obsahuje všechny jeho kmeny (pořadí slov v češtině je volné). Slovo je
+v indexu zavěšené jen pod jedním kmenem – nejdelším, tedy obvykle
+nejvzácnějším – takže se při dotazu prochází jen klíčová slova, jejichž
+kotva se v dotazu vyskytla, ne celý katalog.
+
+Duplicitní klíčová slova jednoho intentu (stejné kmeny, např. varianta
+s diakritikou a bez ní) se započítají jen jednou.
+
+Váha klíčového slova se počítá jednou při sestavení indexu: IDF jeho
+kmenů přes intenty (slovo, které má víc intentů, rozlišuje méně) plus
+bonus za víceslovnou frázi. IDF se bere přes celý korpus – katalog ho
+složí z četností kmenů předpočítaných offline do manifestů domén
+(`definitions_df`, tools/generate_intents_from_yaml.py) a předá indexu
+každého shardu, takže skóre z různých shardů jsou srovnatelná; bez
+předaného `idf` se počítá přes intenty samotného indexu. `keyword_weights` v JSONu intentu
+(klíčové slovo → váha) vypočtenou váhu přebije. S `weighted=False` má
+každé slovo váhu 1.0 (původní "+1 za zásah").
+
+Kmeny dotazu, které ve slovníku nejsou, se zkusí opravit přes
+engines/intent/fuzzy.py – ale jen když přesné párování nenašlo žádného
+kandidáta (žádné kladné skóre); jinak by oprava jen přidávala šum k
+dotazu, který už index zná. Klíčové slovo trefené jen díky opravě překlepu
+se počítá se slevou (FUZZY_DISCOUNT); negativní klíčová slova se
+přes překlepy nepárují, aby odhad nepotopil správný intent.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Protocol, Sequence, Set, Tuple
+
+from engines.text_normalize import normalize_text
+
+from .fuzzy import FuzzyStemIndex
+from .stemmer import stem_tokens
+
+POSITIVE_SCORE = 1.0
+NEGATIVE_SCORE = -2.0
+FUZZY_DISCOUNT = 0.5
+
+# bonus za každý další kmen fráze a strop vypočtené (ne ručně zadané) váhy
+PHRASE_BONUS = 0.25
+MAX_COMPUTED_WEIGHT = 3.0
+
+
+class KeywordSource(Protocol):
+    """Cokoliv s klíčovými slovy – IntentDefinition nebo manifest domény."""
+
+    keywords: List[str]
+    negative_keywords: List[str]
+    keyword_weights: Dict[str, float]
+    keywords_norm: Tuple[str, ...]
+    negative_keywords_norm: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class KeywordEntry:
+    intent_pos: int          # pozice intentu v IntentIndex.definitions
+    keyword: str             # původní znění (do matched_keywords)
+    stems: FrozenSet[str]
+    negative: bool = False
+    weight: float = 1.0
+
+    @property
+    def score(self) -> float:
+        return (NEGATIVE_SCORE if self.negative else POSITIVE_SCORE) * self.weight
+
+
+@dataclass
+class IndexMatch:
+    # intent_pos → součet skóre (včetně záporných)
+    scores: Dict[int, float] = field(default_factory=dict)
+    # pozitivní zásahy v pořadí indexu
+    matched: List[KeywordEntry] = field(default_factory=list)
+    # podmnožina `matched` trefená jen přes opravu překlepu
+    fuzzy: List[KeywordEntry] = field(default_factory=list)
+    # kmen z dotazu → opravený kmen ze slovníku
+    corrections: Dict[str, str] = field(default_factory=dict)
+
+
+def stem_df(intent_stems: Sequence[Sequence[FrozenSet[str]]]) -> Dict[str, int]:
+    """
+    Počet intentů, jejichž pozitivní klíčová slova kmen obsahují.
+    `intent_stems[i]` = množiny kmenů klíčových slov i-tého intentu.
+    """
+    df: Dict[str, int] = {}
+    for keyword_stems in intent_stems:
+        for s in frozenset().union(*keyword_stems):
+            df[s] = df.get(s, 0) + 1
+    return df
+
+
+def idf_from_df(df: Dict[str, int], total: int) -> Dict[str, float]:
+    """IDF kmene: 1 + ln(N / df)."""
+    total = max(1, total)
+    return {s: 1.0 + math.log(total / count) for s, count in df.items()}
+
+
+def stem_idf(intent_stems: Sequence[Sequence[FrozenSet[str]]]) -> Dict[str, float]:
+    """IDF kmenů přes intenty (viz `stem_df`)."""
+    return idf_from_df(stem_df(intent_stems), len(intent_stems))
+
+
+def keyword_weight(stems: FrozenSet[str], idf: Dict[str, float]) -> float:
+    """Průměrné IDF kmenů × bonus za délku fráze, shora omezené."""
+    mean_idf = sum(idf.get(s, 1.0) for s in stems) / len(stems)
+    return min(MAX_COMPUTED_WEIGHT, mean_idf * (1.0 + PHRASE_BONUS * (len(stems) - 1)))
+
+
+# (pos, keyword, normalizované znění, kmeny, negativní)
+_Parsed = Tuple[int, str, str, FrozenSet[str], bool]
+
+
+def _parse_keywords(definitions: Sequence[KeywordSource]) -> List[_Parsed]:
+    """Klíčová slova rozložená na kmeny; duplicity v rámci intentu pryč."""
+    parsed: List[_Parsed] = []
+    for pos, intent_def in enumerate(definitions):
+        seen: Set[Tuple[FrozenSet[str], bool]] = set()
+        for keywords, normalized, negative in (
+            (intent_def.keywords, intent_def.keywords_norm, False),
+            (intent_def.negative_keywords, intent_def.negative_keywords_norm, True),
+        ):
+            for kw, kw_norm in zip(keywords or [], normalized):
+                stems = frozenset(stem_tokens(kw_norm))
+                if not stems or (stems, negative) in seen:
+                    continue
+                seen.add((stems, negative))
+                parsed.append((pos, kw, kw_norm, stems, negative))
+    return parsed
+
+
+def _positive_stems(count: int, parsed: Sequence[_Parsed]) -> List[List[FrozenSet[str]]]:
+    positives: List[List[FrozenSet[str]]] = [[] for _ in range(count)]
+    for pos, _, _, stems, negative in parsed:
+        if not negative:
+            positives[pos].append(stems)
+    return positives
+
+
+def _idf_of(count: int, parsed: Sequence[_Parsed]) -> Dict[str, float]:
+    return stem_idf(_positive_stems(count, parsed))
+
+
+def definitions_df(definitions: Sequence[KeywordSource]) -> Dict[str, int]:
+    """df kmenů přes předané intenty (např. jeden shard – sčítá se)."""
+    return stem_df(_positive_stems(len(definitions), _parse_keywords(definitions)))
+
+
+def catalog_idf(definitions: Sequence[KeywordSource]) -> Dict[str, float]:
+    """IDF kmenů přes všechny předané intenty (např. celý katalog)."""
+    return _idf_of(len(definitions), _parse_keywords(definitions))
+
+
+class IntentIndex:
+    def __init__(
+        self,
+        definitions: Sequence[KeywordSource],
+        weighted: bool = True,
+        idf: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.definitions: Tuple[KeywordSource, ...] = tuple(definitions)
+        self.weighted = weighted
+        self.entries: List[KeywordEntry] = []
+        # kotva → klíčová slova (dotaz bez stavu)
+        self.postings: Dict[str, List[int]] = {}
+        # každý kmen → klíčová slova, která ho obsahují (inkrementální párování)
+        self.members: Dict[str, List[int]] = {}
+
+        parsed = _parse_keywords(self.definitions)
+        if not weighted:
+            idf = {}
+        elif idf is None:
+            idf = _idf_of(len(self.definitions), parsed)
+        overrides = [
+            {normalize_text(k): float(v) for k, v in (d.keyword_weights or {}).items()}
+            for d in self.definitions
+        ]
+
+        for pos, kw, kw_norm, stems, negative in parsed:
+            weight = overrides[pos].get(kw_norm)
+            if weight is None:
+                # negativní slova drží pevnou penalizaci, váží se jen ručně
+                weight = keyword_weight(stems, idf) if weighted and not negative else 1.0
+            self._add(KeywordEntry(pos, kw, stems, negative, weight))
+
+        self.fuzzy = FuzzyStemIndex(s for entry in self.entries for s in entry.stems)
+
+    def _add(self, entry: KeywordEntry) -> None:
+        entry_id = len(self.entries)
+        anchor = max(sorted(entry.stems), key=len)
+        self.postings.setdefault(anchor, []).append(entry_id)
+        for s in entry.stems:
+            self.members.setdefault(s, []).append(entry_id)
+        self.entries.append(entry)
+
+    def correct(self, stem: str) -> Optional[str]:
+        """Nejbližší kmen ze slovníku pro překlep, nebo None."""
+        candidates = self.fuzzy.lookup(stem)
+        return candidates[0][0] if candidates else None
+
+    def _expand(self, query_stems: FrozenSet[str], result: IndexMatch) -> FrozenSet[str]:
+        """Doplní k dotazu opravené kmeny (nejbližší kandidát z fuzzy indexu)."""
+        expanded = set(query_stems)
+        for s in query_stems:
+            corrected = self.correct(s)
+            if corrected is not None:
+                result.corrections[s] = corrected
+                expanded.add(corrected)
+        return frozenset(expanded)
+
+    def match_stems(self, query_stems: FrozenSet[str], fuzzy: bool = True) -> IndexMatch:
+        result = self._match(query_stems, query_stems, IndexMatch())
+        if not fuzzy or any(score > 0 for score in result.scores.values()):
+            return result
+        # přesně nic – teprve teď opravy překlepů
+        expanded = IndexMatch()
+        stems = self._expand(query_stems, expanded)
+        if stems == query_stems:
+            return result
+        return self._match(query_stems, stems, expanded)
+
+    def _match(self, query_stems: FrozenSet[str], stems: FrozenSet[str], result: IndexMatch) -> IndexMatch:
+        hits: List[int] = []
+        for s in stems:
+            for entry_id in self.postings.get(s, ()):
+                if self.entries[entry_id].stems <= stems:
+                    hits.append(entry_id)
+
+        for entry_id in sorted(hits):
+            entry = self.entries[entry_id]
+            score = entry.score
+            if not entry.stems <= query_stems:
+                if entry.negative:
+                    continue
+                score *= FUZZY_DISCOUNT
+                result.fuzzy.append(entry)
+            result.scores[entry.intent_pos] = result.scores.get(entry.intent_pos, 0.0) + score
+            if not entry.negative:
+                result.matched.append(entry)
+        return result
+
+    def match(self, query: str, fuzzy: bool = True) -> IndexMatch:
+        return self.match_stems(frozenset(stem_tokens(query)), fuzzy=fuzzy)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "intents": len(self.definitions),
+            "keywords": len(self.entries),
+            "weighted": int(self.weighted),
+            "anchors": len(self.postings),
+            "vocabulary": len(self.fuzzy.vocabulary),
+        }
+
+
+__all__ = [
+    "IndexMatch",
+    "IntentIndex",
+    "KeywordEntry",
+    "KeywordSource",
+    "catalog_idf",
+    "definitions_df",
+    "idf_from_df",
+    "keyword_weight",
+    "stem_df",
+    "stem_idf",
+]
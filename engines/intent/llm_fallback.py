@@ -0,0 +1,254 @@
+# engines/intent/llm_fallback.py
+"""
+LLM doplněk klasifikace intentu pro dotazy s nízkou jistotou heuristiky.
+
+- prompt engines/intent/prompts/intent_classification.md z registru promptů
+  (načtený jednou, s global + intent policy); `warm()` ho načte předem,
+  aby první dotaz s fallbackem nečekal na kompilaci promptů,
+- LLM dostane kandidáty (intenty prohledaných shardů, nejlepší napřed) a
+  musí vrátit JSON s `intent` z `allowed_intent_ids` – jiné id se zahodí,
+- hlas LLM (intent × confidence) se přičte ke skóre heuristiky, takže
+  zaplacená latence skutečně změní výsledek,
+- výsledek se cachuje podle normalizovaného dotazu, verze intent dat a
+  verze promptu – opakovaný dotaz LLM znovu nevolá. V chatu hlas závisí
+  i na dřívějších zprávách (heuristika běží za celou konverzaci), proto
+  klíč obsahuje i kmeny konverzace (`context_stems`).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from engines.text_normalize import normalize_text
+from llm.client import LLMClient, LLMMessage
+from llm.prompt_registry import get_prompt_registry
+
+from .catalog import IntentCatalog
+from .definition import IntentDefinition
+
+PROMPT_GROUP = "intent"
+PROMPT_NAME = "intent_classification"
+
+GENERAL_INTENT = "general"
+MAX_CANDIDATES = 30
+DEFAULT_MAX_ENTRIES = 1024
+
+# hlas s confidence 1.0 váží jako pět plnohodnotných tref klíčových slov
+# (stejné měřítko jako heuristic_confidence v engine.py)
+LLM_VOTE_SCORE = 5.0
+
+# stačí na JSON s jednou větou zdůvodnění
+FALLBACK_MAX_TOKENS = 200
+
+FALLBACK_PROMPT = """
+Jsi klasifikátor právního intentu. Z dotazu uživatele a kandidátních intentů
+vyber nejvhodnější intent.
+
+Odpovídej výhradně jedním JSON objektem:
+{"intent": "id z allowed_intent_ids nebo general", "domain": "...", "confidence": 0.0, "reasoning": "..."}
+""".strip()
+
+
+@dataclass(frozen=True)
+class LLMVote:
+    intent: str
+    domain: str
+    confidence: float
+    reasoning: str = ""
+
+
+def load_prompt() -> Tuple[str, str]:
+    """(text, verze) promptu z registru; chybějící prompt → nouzová verze."""
+    try:
+        prompt = get_prompt_registry().get(PROMPT_GROUP, PROMPT_NAME)
+        return prompt.text, prompt.version
+    except Exception:
+        return FALLBACK_PROMPT, "fallback"
+
+
+def select_candidates(
+    h: Dict[str, Any],
+    catalog: IntentCatalog,
+    limit: int = MAX_CANDIDATES,
+) -> List[IntentDefinition]:
+    """
+    Intenty prohledaných shardů (jinak celý katalog) – podle skóre
+    heuristiky, shody v pořadí katalogu.
+    """
+    scanned = h.get("scanned_domains") or catalog.domains
+    definitions = [d for domain in scanned for d in catalog.shards[domain].definitions()]
+    scores = h.get("intent_scores") or {}
+    order = {d.intent_id: i for i, d in enumerate(definitions)}
+    definitions.sort(key=lambda d: (-scores.get(d.intent_id, 0.0), order[d.intent_id]))
+    return definitions[:limit]
+
+
+def build_messages(
+    prompt: str,
+    user_query: str,
+    h: Dict[str, Any],
+    candidates: Sequence[IntentDefinition],
+) -> List[LLMMessage]:
+    context = {
+        "user_query": user_query,
+        "language": "cs",
+        "heuristic_result": {
+            "intent": h.get("intent"),
+            "domain": h.get("domain"),
+            "confidence": h.get("confidence"),
+            "raw_intent_scores": h.get("intent_scores") or {},
+            "keywords": h.get("matched_keywords") or [],
+        },
+        "candidate_intents": [
+            {
+                "id": d.intent_id,
+                "domain": d.domain,
+                "labels": {"cs": d.label_cs},
+                "description_cs": d.description_cs,
+                "keywords": list(d.keywords),
+            }
+            for d in candidates
+        ],
+        "allowed_intent_ids": [d.intent_id for d in candidates] + [GENERAL_INTENT],
+    }
+    return [
+        LLMMessage(role="system", content=prompt),
+        LLMMessage(role="user", content=json.dumps(context, ensure_ascii=False)),
+    ]
+
+
+def _extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """První JSON objekt v odpovědi (snese ```json bloky i text okolo)."""
+    start = text.find("{")
+    while start != -1:
+        try:
+            data, _ = json.JSONDecoder().raw_decode(text, start)
+        except ValueError:
+            start = text.find("{", start + 1)
+            continue
+        return data if isinstance(data, dict) else None
+    return None
+
+
+def parse_vote(text: str, candidates: Sequence[IntentDefinition]) -> Optional[LLMVote]:
+    """
+    Hlas z odpovědi LLM. Neznámé intent id, chybějící JSON nebo chybová
+    odpověď klienta → None (hlas se ignoruje).
+    """
+    data = _extract_json(text or "")
+    if data is None:
+        return None
+
+    intent = str(data.get("intent") or "").strip()
+    domains = {d.intent_id: d.domain for d in candidates}
+    if intent != GENERAL_INTENT and intent not in domains:
+        return None
+
+    try:
+        confidence = float(data.get("confidence", 0.0))
+    except (TypeError, ValueError):
+        confidence = 0.0
+    confidence = min(1.0, max(0.0, confidence))
+
+    return LLMVote(
+        intent=intent,
+        domain=domains.get(intent, "unknown"),
+        confidence=confidence,
+        reasoning=str(data.get("reasoning") or ""),
+    )
+
+
+def merge_vote(intent_scores: Dict[str, float], vote: Optional[LLMVote]) -> Dict[str, float]:
+    """Skóre heuristiky + hlas LLM (`general` skóre nemění)."""
+    merged = dict(intent_scores)
+    if vote is not None and vote.intent != GENERAL_INTENT and vote.confidence > 0:
+        merged[vote.intent] = merged.get(vote.intent, 0.0) + LLM_VOTE_SCORE * vote.confidence
+    return merged
+
+
+class IntentLLMFallback:
+    """LLM klasifikace s LRU cache podle normalizovaného dotazu."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        self._cache: "OrderedDict[Tuple[str, str, str, FrozenSet[str]], Tuple[Optional[LLMVote], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self) -> str:
+        """Načte a zkompiluje prompt předem; vrací jeho verzi."""
+        return load_prompt()[1]
+
+    def classify(
+        self,
+        llm: LLMClient,
+        user_query: str,
+        h: Dict[str, Any],
+        catalog: IntentCatalog,
+        data_version: str = "",
+        context_stems: Sequence[str] = (),
+    ) -> Tuple[Optional[LLMVote], Optional[str], bool]:
+        """
+        Vrací (hlas, surová odpověď, z cache?). Cachuje se i "LLM nic
+        nevybral" (None), ne však chyba volání – ta se příště zkusí znovu.
+        `context_stems` = kmeny celé konverzace, ze které vzniklo `h`.
+        """
+        prompt, prompt_version = load_prompt()
+        key = (normalize_text(user_query), data_version, prompt_version, frozenset(context_stems))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[0], cached[1], True
+            self.misses += 1
+
+        candidates = select_candidates(h, catalog)
+        messages = build_messages(prompt, user_query, h, candidates)
+        raw = llm.chat(
+            use_case="helper",
+            messages=messages,
+            temperature=0.0,
+            max_tokens=FALLBACK_MAX_TOKENS,
+            step="intent_fallback",
+        )
+        vote = parse_vote(raw, candidates)
+        if vote is None and _extract_json(raw or "") is None:
+            # chyba / nestrukturovaná odpověď – necachovat
+            return None, raw, False
+
+        with self._lock:
+            self._cache[key] = (vote, raw)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return vote, raw, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def vote_to_dict(vote: Optional[LLMVote], cached: bool) -> Optional[Dict[str, Any]]:
+    if vote is None:
+        return None
+    return {**asdict(vote), "cached": cached}
+
+
+__all__ = [
+    "IntentLLMFallback",
+    "LLMVote",
+    "build_messages",
+    "load_prompt",
+    "merge_vote",
+    "parse_vote",
+    "select_candidates",
+    "vote_to_dict",
+]
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import os
 import json
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
 
 from .definition import IntentDefinition
 
@@ -51,6 +51,8 @@ def _normalize_raw(raw: Dict[str, Any]) -> Dict[str, Any]:
         "conclusion_skeletons",
         "notes",
         "version",
+        "examples",
+        "keyword_weights",
     }
 
     # odfiltruje klíče, které dataclass nezná (jinak selže **raw → IntentDefinition**)
@@ -61,16 +63,48 @@ def _normalize_raw(raw: Dict[str, Any]) -> Dict[str, Any]:
     return raw
 
 
-def load_intents() -> List[IntentDefinition]:
+def list_intent_domains(base_dir: str = BASE_DIR) -> List[str]:
+    """Domény (podsložky data/intents/), které obsahují aspoň jeden intent."""
+    if not os.path.isdir(base_dir):
+        return []
+    domains: List[str] = []
+    for name in sorted(os.listdir(base_dir)):
+        path = os.path.join(base_dir, name)
+        if os.path.isdir(path) and any(_is_intent_file(f) for f in os.listdir(path)):
+            domains.append(name)
+    return domains
+
+
+def _is_intent_file(fname: str) -> bool:
+    # soubory s "_" na začátku jsou metadata (např. _domain.json)
+    return fname.endswith(".json") and not fname.startswith("_")
+
+
+def intent_files(domain: str, base_dir: str = BASE_DIR) -> Tuple[str, ...]:
+    """Relativní cesty JSONů intentů domény (bez čtení obsahu)."""
+    top = os.path.join(base_dir, domain)
+    found: List[str] = []
+    for root, dirs, files in os.walk(top):
+        dirs.sort()
+        for fname in sorted(files):
+            if _is_intent_file(fname):
+                found.append(os.path.relpath(os.path.join(root, fname), top).replace(os.sep, "/"))
+    return tuple(found)
+
+
+def load_intents(domain: Optional[str] = None, base_dir: str = BASE_DIR) -> List[IntentDefinition]:
     """
-    Načte všechny intent definice z data/intents/**.
+    Načte intent definice z data/intents/** (nebo jen z jedné domény,
+    data/intents/<domain>/).
     Bezpečné: chybný JSON neshodí celý engine.
     """
     results: List[IntentDefinition] = []
+    top = os.path.join(base_dir, domain) if domain else base_dir
 
-    for root, dirs, files in os.walk(BASE_DIR):
-        for fname in files:
-            if not fname.endswith(".json"):
+    for root, dirs, files in os.walk(top):
+        dirs.sort()
+        for fname in sorted(files):
+            if not _is_intent_file(fname):
                 continue
 
             full_path = os.path.join(root, fname)
@@ -89,4 +123,4 @@ def load_intents() -> List[IntentDefinition]:
     return results
 
 
-__all__ = ["load_intents", "IntentDefinition"]
\ No newline at end of file
+__all__ = ["load_intents", "list_intent_domains", "intent_files", "IntentDefinition"]
\ No newline at end of file
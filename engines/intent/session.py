@@ -0,0 +1,254 @@
+# engines/intent/session.py
+"""
+Inkrementální klasifikace intentu pro vícekolový chat.
+
+Uživatel doplňuje detaily postupně; místo opakované klasifikace celé
+historie si SessionClassifier drží stav párování (kolik kmenů každému
+klíčovému slovu ještě chybí) a průběžná skóre. Nová zpráva se jen
+rozloží na kmeny a každý dosud neviděný kmen posune stav klíčových slov,
+která ho obsahují – práce na kolo závisí na délce nové zprávy, ne na
+délce konverzace.
+
+Výsledek po každém kole odpovídá bezstavové klasifikaci celé historie
+(IntentCatalog.match nad spojeným textem): stejný pre-pass domén, stejná
+oprava překlepů (jen když přesné párování indexu nic nenašlo) i stejná
+druhá šance. Shard, který se do výběru dostane
+až v pozdějším kole, se jednorázově dožene přehráním dosavadních kmenů.
+
+Po hot reloadu intent dat (jiný katalog) se session při dalším kole
+přestaví nad novým katalogem přehráním dosavadních kmenů (`rebase`).
+
+`reset()` (nebo context["session_reset"] v intent enginu) stav zahodí.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .catalog import CatalogMatch, IntentCatalog
+from .index import FUZZY_DISCOUNT, IntentIndex, KeywordEntry
+from .stemmer import stem_tokens
+
+DEFAULT_MAX_SESSIONS = 1024
+
+
+class IndexState:
+    """Stav párování jednoho indexu přes celou konverzaci."""
+
+    def __init__(self, index: IntentIndex, fuzzy: bool = True) -> None:
+        self.index = index
+        self.fuzzy = fuzzy
+        self.exact: Set[str] = set()
+        self.expanded: Set[str] = set()
+        self.corrections: Dict[str, str] = {}
+        # entry_id → počet chybějících kmenů (s opravami / jen přesně)
+        self._missing: Dict[int, int] = {}
+        self._missing_exact: Dict[int, int] = {}
+        # příspěvky a skóre s opravami překlepů / jen z přesných shod
+        self._contrib: Dict[int, float] = {}
+        self._exact_contrib: Dict[int, float] = {}
+        self._scores: Dict[int, float] = {}
+        self._exact_scores: Dict[int, float] = {}
+
+    @property
+    def exact_only(self) -> bool:
+        """Přesné párování má kandidáta → opravy se nepoužijí (jako IntentIndex)."""
+        return not self.fuzzy or any(score > 0 for score in self._exact_scores.values())
+
+    @property
+    def scores(self) -> Dict[int, float]:
+        return self._exact_scores if self.exact_only else self._scores
+
+    def feed(self, stems: Iterable[str]) -> None:
+        for s in stems:
+            if s in self.exact:
+                continue
+            self.exact.add(s)
+            self._cover(s, exact=True)
+            corrected = self.index.correct(s) if self.fuzzy else None
+            if corrected is not None:
+                self.corrections[s] = corrected
+                self._cover(corrected, exact=False)
+
+    def _cover(self, stem: str, exact: bool) -> None:
+        new_expanded = stem not in self.expanded
+        if not (exact or new_expanded):
+            return
+        self.expanded.add(stem)
+        entries = self.index.entries
+        for entry_id in self.index.members.get(stem, ()):
+            size = len(entries[entry_id].stems)
+            if new_expanded:
+                self._missing[entry_id] = self._missing.get(entry_id, size) - 1
+            if exact:
+                self._missing_exact[entry_id] = self._missing_exact.get(entry_id, size) - 1
+            self._update(entry_id)
+
+    def _update(self, entry_id: int) -> None:
+        entry = self.index.entries[entry_id]
+        size = len(entry.stems)
+        exact = entry.score if self._missing_exact.get(entry_id, size) == 0 else 0.0
+        if self._missing.get(entry_id, size) > 0:
+            contrib = 0.0
+        elif exact or entry.negative:
+            # negativní slova se přes překlepy nepárují
+            contrib = exact
+        else:
+            contrib = entry.score * FUZZY_DISCOUNT
+        self._apply(self._contrib, self._scores, entry, entry_id, contrib)
+        self._apply(self._exact_contrib, self._exact_scores, entry, entry_id, exact)
+
+    @staticmethod
+    def _apply(
+        contribs: Dict[int, float],
+        scores: Dict[int, float],
+        entry: KeywordEntry,
+        entry_id: int,
+        contrib: float,
+    ) -> None:
+        old = contribs.get(entry_id, 0.0)
+        if contrib != old:
+            contribs[entry_id] = contrib
+            scores[entry.intent_pos] = scores.get(entry.intent_pos, 0.0) + contrib - old
+
+    def collect(self, result: CatalogMatch) -> None:
+        definitions = self.index.definitions
+        scores = self.scores
+        contribs = self._exact_contrib if self.exact_only else self._contrib
+        for pos in sorted(scores):
+            result.scores.append((definitions[pos], scores[pos]))
+        for entry_id in sorted(contribs):
+            entry = self.index.entries[entry_id]
+            if entry.negative or not contribs[entry_id]:
+                continue
+            result.matched.append(entry)
+            if self._missing_exact.get(entry_id, len(entry.stems)) > 0:
+                result.fuzzy.append(entry)
+
+
+class SessionClassifier:
+    def __init__(self, catalog: IntentCatalog) -> None:
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.turns = 0
+        self._stems: List[str] = []
+        self._seen: Set[str] = set()
+        self._domains = IndexState(self.catalog.domain_index, self.catalog.fuzzy)
+        self._shards: Dict[str, IndexState] = {}
+
+    @property
+    def stems(self) -> List[str]:
+        """Kmeny celé konverzace (bez opakování, v pořadí výskytu)."""
+        return list(self._stems)
+
+    def rebase(self, catalog: IntentCatalog) -> None:
+        """Přestaví stav nad jiným katalogem; konverzace (kmeny, kola) zůstává."""
+        with self._lock:
+            self._rebase(catalog)
+
+    def _rebase(self, catalog: IntentCatalog) -> None:
+        # jen pod self._lock – kontrola i přestavba musí být atomické
+        if catalog is self.catalog:
+            return
+        turns, stems = self.turns, self._stems
+        self.catalog = catalog
+        self.reset()
+        self.turns = turns
+        self._stems = stems
+        self._seen.update(stems)
+        self._domains.feed(stems)
+
+    def _shard_state(self, domain: str) -> IndexState:
+        state = self._shards.get(domain)
+        if state is None:
+            state = IndexState(self.catalog.shards[domain].index, self.catalog.fuzzy)
+            # doběhnutí: shard vybraný až teď dostane dosavadní kmeny
+            state.feed(self._stems)
+            self._shards[domain] = state
+        return state
+
+    def _collect(self, domains: Iterable[str], result: CatalogMatch) -> None:
+        wanted = set(domains)
+        for domain in self.catalog.domains:
+            if domain in wanted:
+                self._shard_state(domain).collect(result)
+                result.scanned.append(domain)
+
+    def add(self, text: str, catalog: Optional[IntentCatalog] = None) -> CatalogMatch:
+        """
+        Zpracuje novou zprávu a vrátí klasifikaci celé konverzace. Je-li
+        předán jiný `catalog` (hot reload), session se nad ním nejdřív
+        přestaví – pod stejným zámkem jako samotné kolo.
+        """
+        with self._lock:
+            if catalog is not None:
+                self._rebase(catalog)
+            self.turns += 1
+            new = [s for s in dict.fromkeys(stem_tokens(text)) if s not in self._seen]
+            self._seen.update(new)
+            self._stems.extend(new)
+
+            self._domains.feed(new)
+            for state in self._shards.values():
+                state.feed(new)
+
+            definitions = self.catalog.domain_index.definitions
+            prepass = {
+                definitions[pos].domain: score
+                for pos, score in self._domains.scores.items()
+                if score > 0
+            }
+            selected = self.catalog.rank_domains(prepass)
+
+            result = CatalogMatch(domain_scores=prepass)
+            self._collect(selected, result)
+            if self.catalog.needs_second_chance(result):
+                self._collect([d for d in self.catalog.domains if d not in selected], result)
+            return result
+
+
+class SessionStore:
+    """LRU úložiště session klasifikátorů podle session_id."""
+
+    def __init__(
+        self,
+        catalog_factory: Callable[[], IntentCatalog],
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+    ) -> None:
+        self._catalog_factory = catalog_factory
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SessionClassifier]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, catalog: Optional[IntentCatalog] = None) -> SessionClassifier:
+        """
+        Session nad `catalog` (výchozí z catalog_factory); session založená
+        nad starším katalogem se přestaví (rebase).
+        """
+        catalog = catalog if catalog is not None else self._catalog_factory()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionClassifier(catalog)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+        session.rebase(catalog)
+        return session
+
+    def reset(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+__all__ = ["IndexState", "SessionClassifier", "SessionStore"]
@@ -0,0 +1,163 @@
+# engines/intent/snapshot.py
+"""
+Neměnný snapshot intent dat a jeho výměna za běhu (hot reload).
+
+IntentSnapshot drží katalog (definice, indexy klíčových slov, předem
+zkompilované risk patterny) a otisk data/intents, ze kterého vznikl.
+Sestavení čte jen manifesty domén (včetně předpočítaných četností pro
+IDF); definice a indexy shardů se načtou líně až při prvním použití.
+Shard, který starý snapshot načte teprve po změně souborů, proto dostane
+už nová data – watcher ale snapshot mezitím vymění, takže se to týká
+jen requestů rozběhnutých těsně před výměnou.
+
+Request si na začátku snapshot připne (`pinned_snapshot`, ContextVar –
+stejně jako ledger v llm/ledger.py) a všechny enginy, i ve vláknech
+executoru, pak čtou tentýž – i když mezitím přijde nová verze dat.
+
+Zápis je jediná výměna reference (`self._current = snapshot`), čtení je
+obyčejné čtení atributu – čtenáři nikdy neberou zámek. Nový snapshot se
+sestaví stranou (watcher ve vlákně nebo `refresh()`), a než se zveřejní,
+načtou se v něm shardy, které už používal ten starý, aby první requesty
+po výměně nečekaly na načítání JSONů.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from .catalog import IntentCatalog
+from .loader import BASE_DIR
+
+DEFAULT_RELOAD_INTERVAL_S = 5.0
+
+
+def intents_fingerprint(base_dir: str = BASE_DIR) -> str:
+    """Otisk JSONů v data/intents (cesta, mtime, velikost)."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(base_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            if not fname.endswith(".json"):
+                continue
+            path = os.path.join(root, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, base_dir)
+            digest.update(f"{rel}:{st.st_mtime_ns}:{st.st_size};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class IntentSnapshot:
+    catalog: IntentCatalog
+    version: str
+    loaded_at: float
+
+
+class IntentSnapshotHolder:
+    def __init__(
+        self,
+        base_dir: str = BASE_DIR,
+        catalog_factory: Callable[[str], IntentCatalog] = IntentCatalog,
+    ) -> None:
+        self.base_dir = base_dir
+        self._catalog_factory = catalog_factory
+        # sériově jen zapisovatelé (refresh/watcher), čtenáři zámek neberou
+        self._reload_lock = threading.Lock()
+        self._current = self._build(intents_fingerprint(base_dir))
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+
+    def _build(self, version: str, warm_from: Optional[IntentSnapshot] = None) -> IntentSnapshot:
+        catalog = self._catalog_factory(self.base_dir)
+        if warm_from is not None:
+            for domain in warm_from.catalog.loaded_domains():
+                if domain in catalog.shards:
+                    _ = catalog.shards[domain].index
+        return IntentSnapshot(catalog=catalog, version=version, loaded_at=time.time())
+
+    def current(self) -> IntentSnapshot:
+        return self._current
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Při změně dat sestaví a zveřejní nový snapshot. Vrací True, když
+        došlo k výměně.
+        """
+        with self._reload_lock:
+            version = intents_fingerprint(self.base_dir)
+            old = self._current
+            if not force and version == old.version:
+                return False
+            self._current = self._build(version, warm_from=old)
+            self.reloads += 1
+            return True
+
+    # --- watcher ---
+
+    def start_watcher(self, interval_s: float = DEFAULT_RELOAD_INTERVAL_S) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop() -> None:
+            while not self._stop.wait(interval_s):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    # rozbitá data nesmí shodit watcher – zůstává starý snapshot
+                    print(f"[intent_snapshot] reload failed: {e}")
+
+        self._watcher = threading.Thread(target=_loop, name="intent-snapshot-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+        self._watcher = None
+
+
+_PINNED: ContextVar[Optional[IntentSnapshot]] = ContextVar("intent_snapshot", default=None)
+
+
+def pinned_snapshot() -> Optional[IntentSnapshot]:
+    """Snapshot připnutý aktuálnímu requestu, nebo None."""
+    return _PINNED.get()
+
+
+@contextmanager
+def pin_snapshot(snapshot: IntentSnapshot) -> Iterator[IntentSnapshot]:
+    token = _PINNED.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _PINNED.reset(token)
+
+
+def reload_interval_from_env() -> float:
+    """INTENT_RELOAD_INTERVAL_S > 0 zapne watcher (sekundy mezi kontrolami)."""
+    try:
+        return float(os.getenv("INTENT_RELOAD_INTERVAL_S", "0") or 0)
+    except ValueError:
+        return 0.0
+
+
+__all__ = [
+    "IntentSnapshot",
+    "IntentSnapshotHolder",
+    "intents_fingerprint",
+    "pin_snapshot",
+    "pinned_snapshot",
+    "reload_interval_from_env",
+]
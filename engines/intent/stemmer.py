@@ -0,0 +1,85 @@
+# engines/intent/stemmer.py
+"""
+Lehký pravidlový stemmer češtiny pro párování klíčových slov.
+
+Pracuje nad textem z `normalize_text` (bez diakritiky, malá písmena) a
+odřezává jen pádové koncovky podstatných a přídavných jmen (podle
+"light stemmeru" Dolamic & Savoy, převedeného do ASCII). Díky tomu
+"pokuta / pokuty / pokutu / pokutou" i "radar / radaru / radarem" dají
+stejný kmen a klíčová slova v intent JSONech nemusí vyjmenovávat tvary.
+
+Přídavná jména s příponou -ov- ("úsekový / úsekovým / úsekového") se po
+odříznutí přídavné koncovky zkrátí ještě o "ov", takže dají stejný kmen
+jako podstatné jméno ("úsek"). Podstatná jména na -ov ("domov", "slovo")
+se nezkracují – "ov" se odřízne jen za koncovkou přídavného jména.
+
+Stemmer je záměrně konzervativní: kmen má vždy aspoň 3 znaky, slovesa ani
+palatalizaci neřeší. Kmen nemusí být skutečné slovo – stačí, že ho
+dostanou stejně klíčové slovo i dotaz.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Tuple
+
+from engines.text_normalize import normalize_text
+
+MIN_STEM_LEN = 3
+
+# od nejdelší koncovky; první shoda vyhrává
+_SUFFIXES: Tuple[str, ...] = (
+    "atech",
+    "etem", "atum",
+    "ech", "ich", "eho", "emi", "emu", "ete", "eti", "iho", "imi", "imu",
+    "ach", "ata", "aty", "ych", "ama", "ami", "ymi",
+    "em", "es", "im", "um", "at", "am", "os", "us", "ym", "mi", "ou",
+    "e", "i", "u", "y", "a", "o",
+)
+
+# přídavná jména z podstatných (úsek-ov-ý) – "ov" se odřízne jen za
+# koncovkou přídavného jména (-ový, -ová, -ové, -ového, -ových…)
+_ADJECTIVE_INFIX = "ov"
+_ADJECTIVE_SUFFIXES = frozenset(
+    ("y", "a", "e", "i", "eho", "emu", "ym", "ych", "ymi", "ou")
+)
+
+# předložky, spojky a zájmena, které samy o sobě nic neříkají
+STOPWORDS = frozenset(
+    "a i o u v z s k na za do po od se si mi me mu je jsem jsi jsou by bych "
+    "to ten ta ty ve ze ke ku pro pri pod nad".split()
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=16384)
+def stem(token: str) -> str:
+    """Kmen jednoho (už normalizovaného) slova."""
+    removed = ""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LEN:
+            token = token[: -len(suffix)]
+            removed = suffix
+            break
+    if (
+        removed in _ADJECTIVE_SUFFIXES
+        and token.endswith(_ADJECTIVE_INFIX)
+        and len(token) - len(_ADJECTIVE_INFIX) >= MIN_STEM_LEN
+    ):
+        token = token[: -len(_ADJECTIVE_INFIX)]
+    return token
+
+
+def stem_tokens(text: str) -> Tuple[str, ...]:
+    """
+    Normalizuje text, rozdělí na slova a vrátí jejich kmeny (bez
+    stopslov, pořadí zachované, duplicity ponechané).
+    """
+    return tuple(
+        stem(tok) for tok in _TOKEN_RE.findall(normalize_text(text)) if tok not in STOPWORDS
+    )
+
+
+__all__ = ["STOPWORDS", "stem", "stem_tokens"]
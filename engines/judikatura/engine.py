@@ -36,6 +36,11 @@ except Exception:  # pragma: no cover - čistě obranný kód
     LLMClient = None  # type: ignore[assignment]
     LLMMessage = None  # type: ignore[assignment]
 
+try:
+    from llm.prompt_registry import get_prompt_registry
+except Exception:  # pragma: no cover - čistě obranný kód
+    get_prompt_registry = None  # type: ignore[assignment]
+
 # Prompt soubor pro judikaturu
 PROMPT_PATH = Path(__file__).parent / "prompts" / "judikatura_lookup.md"
 
@@ -47,11 +52,12 @@ PROMPT_PATH = Path(__file__).parent / "prompts" / "judikatura_lookup.md"
 
 def _load_prompt() -> str:
     """
-    Načte prompt pro vyhledávání judikatury.
+    Vrátí prompt pro vyhledávání judikatury z registru promptů
+    (načtený jednou, včetně global + judikatura policy).
     Pokud soubor chybí, vrátí nouzovou verzi.
     """
     try:
-        return PROMPT_PATH.read_text(encoding="utf-8")
+        return get_prompt_registry().get("judikatura", PROMPT_PATH.stem).text
     except Exception:
         return """
 Jsi právní asistent zaměřený na českou judikaturu (NS, ÚS, NSS, krajské soudy).
@@ -135,9 +141,8 @@ def _try_llm_candidates(case: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Opt
         return [], f"Chyba při vytváření LLMClient: {e}"
 
     try:
-        # Pozn.: signatura client.chat může být v tvém projektu rozšířená;
-        # pokud máš use_case/temperature/max_tokens, můžeš je sem doplnit.
-        result = client.chat(messages)  # type: ignore[arg-type]
+        # use_case určuje tier modelu v routeru (levnější helper model)
+        result = client.chat(use_case="jurisprudence_search", messages=messages)
     except Exception as e:  # pragma: no cover
         return [], f"Chyba při volání LLM: {e}"
 
@@ -5,10 +5,7 @@ from typing import Any, Dict, List, Optional
 
 from engines.shared_types import EngineInput, EngineOutput
 from engines.intent.loader import load_intents, IntentDefinition
-
-
-def _lower(s: str | None) -> str:
-    return (s or "").lower()
+from engines.text_normalize import lower_text as _lower
 
 
 def _find_intent(intent_id: str) -> Optional[IntentDefinition]:
@@ -1,22 +1,18 @@
 # engines/risk/engine.py
 from __future__ import annotations
 
-import re
 from typing import Any, Dict, List, Optional
 
 from engines.shared_types import EngineInput, EngineOutput
-from engines.intent.loader import load_intents, IntentDefinition
+from engines.intent.engine import get_intent_catalog
+from engines.intent.loader import IntentDefinition
+from engines.text_normalize import lower_text as _lower
 
 
-def _lower(s: str | None) -> str:
-    return (s or "").lower()
-
-
-def _find_intent(intent_id: str) -> Optional[IntentDefinition]:
-    for intent_def in load_intents():
-        if intent_def.intent_id == intent_id:
-            return intent_def
-    return None
+def _find_intent(intent_id: str, domain: Optional[str] = None) -> Optional[IntentDefinition]:
+    # katalog snapshotu připnutého requestu (stejná verze dat jako intent)
+    # – index se staví jen pro shard dané domény
+    return get_intent_catalog().find(intent_id, domain=domain)
 
 
 def _score_risks(text: str, intent_def: IntentDefinition) -> Dict[str, Any]:
@@ -30,15 +26,12 @@ def _score_risks(text: str, intent_def: IntentDefinition) -> Dict[str, Any]:
     matches = []
     dims: Dict[str, int] = {}
 
-    for rp in intent_def.risk_patterns:
-        try:
-            if re.search(rp.pattern, text):
-                matches.append({"pattern": rp.pattern, "dimensions": rp.dimensions})
-                for d in rp.dimensions:
-                    dims[d] = dims.get(d, 0) + 1
-        except re.error:
-            # Chybný regex nesmí engine shodit
-            continue
+    # regexy jsou zkompilované už při načtení intentu (chybné vynechané)
+    for rp in intent_def.compiled_risk_patterns:
+        if rp.regex.search(text):
+            matches.append({"pattern": rp.pattern, "dimensions": list(rp.dimensions)})
+            for d in rp.dimensions:
+                dims[d] = dims.get(d, 0) + 1
 
     return {
         "matches": matches,
@@ -85,7 +78,7 @@ def run(engine_input: EngineInput) -> EngineOutput:
             notes=["risk_engine: no intent provided"],
         )
 
-    intent_def = _find_intent(intent_id)
+    intent_def = _find_intent(intent_id, intent_data.get("domain"))
     if not intent_def:
         return EngineOutput(
             name="risk_engine",
@@ -12,17 +12,18 @@ from __future__ import annotations
 from typing import Any, Dict, List
 
 from ..shared_types import EngineInput, EngineOutput
-from runtime.config_loader import load_yaml
+from runtime.config_loader import load_yaml_cached
 
 
-_CONFIG = load_yaml("engines/safety/config.yaml")
+def _config() -> Dict[str, Any]:
+    return load_yaml_cached("engines/safety/config.yaml")
 
 
 def _decide(case: Dict[str, Any]) -> Dict[str, Any]:
     risk_level = case.get("risk_level", "unknown")
     role = case.get("role", "client")
 
-    profiles = _CONFIG.get("risk_profiles", {})
+    profiles = _config().get("risk_profiles", {})
     profile = profiles.get(risk_level, profiles.get("medium", {}))
 
     decision = "allow"
@@ -0,0 +1,96 @@
+# engines/text_normalize.py
+"""
+Sdílená normalizace textu pro všechny enginy.
+
+- `normalize_text`: bez diakritiky, casefold, sjednocené mezery – pro
+  porovnávání dotazu s klíčovými slovy,
+- `lower_text`: jen malá písmena (diakritika zůstává) – pro regexy
+  risk patternů, které s diakritikou počítají.
+
+Česká/slovenská diakritika se odstraňuje předpočítanou `str.translate`
+tabulkou (jeden průchod v C). Na NFD rozklad s filtrem kombinujících
+znaků se padá jen tehdy, když po překladu v textu zůstane jiný ne-ASCII
+znak (jiná písma, vzácné znaky).
+
+Obě funkce jsou memoizované: dotaz je v rámci requestu tentýž objekt
+`str` (hash je na něm uložený), takže druhý a další engine dostane
+výsledek z cache a normalizace proběhne jednou za request. Cachují se
+jen texty do `_CACHE_MAX_CHARS` – vložené celé rozsudky by cache
+nafoukly na megabajty a jejich lineární normalizace stejně nic nestojí
+proti zbytku requestu.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+_DIACRITICS_SRC = "áäčďéěíĺľňóôŕřšťúůýžÁÄČĎÉĚÍĹĽŇÓÔŔŘŠŤÚŮÝŽ"
+_DIACRITICS_DST = "aacdeeillnoorrstuuyzaacdeeillnoorrstuuyz"
+
+_TRANSLATE_TABLE: Dict[int, str] = str.maketrans(_DIACRITICS_SRC, _DIACRITICS_DST)
+
+_WS_RE = re.compile(r"\s+")
+
+_CACHE_SIZE = 4096
+_CACHE_MAX_CHARS = 1024
+
+
+def _strip_diacritics_nfd(s: str) -> str:
+    """Pomalá, ale obecná cesta pro znaky mimo překladovou tabulku."""
+    return "".join(
+        c for c in unicodedata.normalize("NFD", s)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+def fold_text(s: Optional[str]) -> str:
+    """casefold + bez diakritiky (mezery zůstávají, jak jsou)."""
+    if not s:
+        return ""
+    s = s.translate(_TRANSLATE_TABLE).casefold()
+    if not s.isascii():
+        s = _strip_diacritics_nfd(s)
+    return s
+
+
+def _normalize(s: str) -> str:
+    return _WS_RE.sub(" ", fold_text(s)).strip()
+
+
+_normalize_cached = lru_cache(maxsize=_CACHE_SIZE)(_normalize)
+_lower_cached = lru_cache(maxsize=_CACHE_SIZE)(str.lower)
+
+
+def normalize_text(s: Optional[str]) -> str:
+    """casefold, bez diakritiky, sjednocené mezery, ořezané okraje."""
+    if not s:
+        return ""
+    if len(s) > _CACHE_MAX_CHARS:
+        return _normalize(s)
+    return _normalize_cached(s)
+
+
+def lower_text(s: Optional[str]) -> str:
+    """Jen malá písmena – diakritika zůstává (regexy risk patternů)."""
+    if not s:
+        return ""
+    if len(s) > _CACHE_MAX_CHARS:
+        return s.lower()
+    return _lower_cached(s)
+
+
+def clear_text_caches() -> None:
+    """Vyprázdní memoizaci (měření propustnosti, testy)."""
+    _normalize_cached.cache_clear()
+    _lower_cached.cache_clear()
+
+
+def normalize_all(items: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Normalizuje seznam klíčových slov (pořadí i délka zůstávají)."""
+    return tuple(normalize_text(i) for i in items or ())
+
+
+__all__ = ["clear_text_caches", "fold_text", "lower_text", "normalize_all", "normalize_text"]
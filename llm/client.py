@@ -2,13 +2,25 @@
 from __future__ import annotations
 
 import os
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Literal
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Literal, Tuple
 
-from runtime.config_loader import load_yaml
+from llm.deadline import current_deadline
+from llm.ledger import current_ledger
+from llm.local_backend import LocalEndpoint, get_endpoint
+from llm.replay import (
+    ERROR_PREFIX,
+    ReplayBackend,
+    ReplayRecord,
+    get_store,
+    request_hash,
+)
+from llm.routing import get_router
 
-# Načtení LLM konfigurace z YAML (modely, teploty, max_tokens)
-_CONFIG = load_yaml("llm/config.yaml")
+# Konfigurace z llm/config.yaml (modely, teploty, max_tokens, routování)
+# si načítá router – viz llm/routing.get_router().
 
 
 Role = Literal["system", "user", "assistant"]
@@ -20,33 +32,151 @@ class LLMMessage:
     content: str
 
 
-def get_llm_params_for_use_case(use_case: str) -> Dict[str, Any]:
+# -----------------------------
+# Odhad tokenů + hlídání velikosti promptu
+# -----------------------------
+
+# režie jedné zprávy v chat formátu (role, oddělovače) – stejná konvence jako OpenAI
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 2
+
+# minimum, na které se dotaz ořeže i tehdy, když systémový prompt sám
+# vyčerpá rozpočet – prázdný dotaz by byl horší než mírné překročení
+MIN_QUERY_TOKENS = 128
+
+TRIM_MARKER = "\n\n[… část textu byla vynechána kvůli limitu délky vstupu …]\n\n"
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: Optional[str]):
+    """
+    tiktoken encoding pro model, nebo None, když tiktoken není nainstalován.
+    """
+    try:
+        import tiktoken  # type: ignore
+    except Exception:
+        return None
+
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except Exception:
+            pass
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Počet tokenů textu.
+
+    - s tiktokenem přesně podle encodingu modelu,
+    - bez něj rychlá aproximace: ~4 bajty UTF-8 na token (čeština
+      s diakritikou tak vychází dráž než čistá ASCII, což odpovídá BPE).
+    """
+    if not text:
+        return 0
+    enc = _get_encoding(model)
+    if enc is not None:
+        return len(enc.encode(text))
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def count_message_tokens(messages: List[LLMMessage], model: Optional[str] = None) -> int:
+    total = _TOKENS_PER_REPLY
+    for m in messages:
+        total += _TOKENS_PER_MESSAGE + estimate_tokens(m.content or "", model)
+    return total
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Ořeže text na max_tokens – ponechá začátek (2/3) a konec (1/3),
+    mezi ně vloží TRIM_MARKER. U právních textů bývá podstatné zadání
+    na začátku a závěr/petit na konci.
+    """
+    if estimate_tokens(text, model) <= max_tokens:
+        return text
+
+    def _cut(keep: int) -> str:
+        head = (keep * 2) // 3
+        tail = keep - head
+        return text[:head] + TRIM_MARKER + (text[-tail:] if tail else "")
+
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(_cut(mid), model) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return _cut(lo)
+
+
+def enforce_input_budget(
+    messages: List[LLMMessage],
+    budget_tokens: Optional[int],
+    model: Optional[str] = None,
+) -> Tuple[List[LLMMessage], Optional[Dict[str, int]]]:
+    """
+    Pokud prompt přesahuje rozpočet, ořeže poslední uživatelskou zprávu
+    (typicky vložený dotaz / text rozhodnutí). Systémové prompty se nemění.
+
+    Vrací (zprávy, info) – info je None, když k ořezu nedošlo.
+    """
+    if not budget_tokens:
+        return messages, None
+
+    original = count_message_tokens(messages, model)
+    if original <= budget_tokens:
+        return messages, None
+
+    user_idx = None
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].role == "user":
+            user_idx = i
+            break
+    if user_idx is None:
+        return messages, None
+
+    query = messages[user_idx].content or ""
+    overhead = original - estimate_tokens(query, model)
+    allowed = max(MIN_QUERY_TOKENS, budget_tokens - overhead)
+
+    trimmed = list(messages)
+    trimmed[user_idx] = LLMMessage(role="user", content=trim_to_tokens(query, allowed, model))
+
+    return trimmed, {
+        "budget_tokens": int(budget_tokens),
+        "original_tokens": original,
+        "trimmed_tokens": count_message_tokens(trimmed, model),
+    }
+
+
+def get_llm_params_for_use_case(
+    use_case: str,
+    step: Optional[str] = None,
+    model_defaults: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     Vrací parametry pro volání LLM (model, temperature, max_tokens)
     podle use_case a konfigurace v llm/config.yaml.
 
-    Pravidla:
-      - pro `jurisprudence_search` použij helper_model + helper parametry,
-      - pro ostatní use_case použij legal_analysis_model + legal_analysis parametry.
+    Model vybírá router (llm/routing.py) podle routovací tabulky:
+      - `step` (krok enginu, např. "certainty") má přednost před use_case,
+      - `model_defaults` z configu enginu přepíší globální modely tierů,
+      - při přetížení modelu nebo došlém rozpočtu requestu router demotuje
+        na levnější tier.
     """
-    model_defaults = _CONFIG.get("model_defaults", {})
-    temps = _CONFIG.get("temperature", {})
-    max_tokens_cfg = _CONFIG.get("max_tokens", {})
-
-    if use_case == "jurisprudence_search":
-        model = model_defaults.get("helper_model", "gpt-4.1-mini")
-        temperature = float(temps.get("helper", 0.1))
-        max_tokens = int(max_tokens_cfg.get("helper", 800))
-    else:
-        model = model_defaults.get("legal_analysis_model", "gpt-4.1-mini")
-        temperature = float(temps.get("legal_analysis", 0.2))
-        max_tokens = int(max_tokens_cfg.get("legal_analysis", 2000))
-
-    return {
-        "model": model,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-    }
+    decision = get_router().route(
+        use_case,
+        step=step,
+        model_defaults=model_defaults,
+        ledger=current_ledger(),
+    )
+    return decision.as_params()
 
 
 class LLMClient:
@@ -57,11 +187,29 @@ class LLMClient:
 
     - LLM_BACKEND=mock  (default)  -> žádné API volání, levné testy
     - LLM_BACKEND=openai          -> pokus o reálné volání OpenAI
+    - LLM_BACKEND=local           -> libovolný OpenAI-kompatibilní endpoint
+                                     s micro-batchingem (viz llm/local_backend.py)
+    - LLM_BACKEND=replay          -> offline přehrávání nahraných odpovědí
+                                     (viz llm/replay.py)
+
+    V openai/local režimu lze nastavit LLM_RECORD_FILE=<cesta.jsonl> – každé
+    úspěšné volání se zaznamená (hash requestu, odpověď, latence, tokeny)
+    pro pozdější replay.
     """
 
     def __init__(self) -> None:
         self.backend = os.getenv("LLM_BACKEND", "mock").lower()
 
+        self._replay: Optional[ReplayBackend] = None
+
+        self._local: Optional[LocalEndpoint] = None
+
+        if self.backend == "replay":
+            self._replay = ReplayBackend.from_env()
+
+        if self.backend == "local":
+            self._local = get_endpoint()
+
         # lazy import openai – aby testy nepadaly, když knihovna/klíč chybí
         self._openai_client = None
         if self.backend == "openai":
@@ -87,34 +235,164 @@ class LLMClient:
         messages: List[LLMMessage],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        step: Optional[str] = None,
+        model_defaults: Optional[Dict[str, Any]] = None,
     ) -> str:
         """
         Hlavní vstupní bod pro všechny enginy.
         V testech bude defaultně běžet mock, v produkci se zapne přes env.
-        """
-        # 1) načti defaultní parametry z YAML podle use_case
-        params = get_llm_params_for_use_case(use_case)
 
-        # 2) případné přepsání explicitními argumenty
+        `step` a `model_defaults` slouží routeru modelů (viz
+        get_llm_params_for_use_case) – engine tak může deklarovat krok
+        a vlastní modely ze svého configu.
+
+        Běží-li volání v uzlu pipeline s timeoutem (llm/deadline.py), po
+        jeho vypršení se backend už nevolá a HTTP timeout je zbytek času.
+        """
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired():
+            return f"{ERROR_PREFIX} node deadline exceeded"
+        timeout = deadline.remaining() if deadline is not None else None
+
+        router = get_router()
+        ledger = current_ledger()
+
+        # 1) hlídání velikosti vstupu – rozpočet tokenů podle use_case
+        budgets = router.config.get("input_budget_tokens", {}) or {}
+        messages, trim_info = enforce_input_budget(messages, budgets.get(use_case))
+        prompt_tokens = count_message_tokens(messages)
+
+        # 2) výběr modelu a defaultních parametrů (router nad llm/config.yaml)
+        decision = router.route(
+            use_case,
+            step=step,
+            model_defaults=model_defaults,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=max_tokens,
+            ledger=ledger,
+        )
+        params = decision.as_params()
+
+        # 3) případné přepsání explicitními argumenty
         if temperature is not None:
             params["temperature"] = float(temperature)
         if max_tokens is not None:
             params["max_tokens"] = int(max_tokens)
 
-        # 3) rozhodnutí backendu
-        if self.backend == "openai" and self._openai_client is not None:
-            return self._chat_openai(messages, params)
+        # 4) volání backendu + statistiky pro router a účet requestu
+        #    (spotřeba se vrací z _dispatch – klient je sdílený mezi vlákny,
+        #    stav na instanci by si souběžné requesty přepisovaly)
+        started = time.perf_counter()
+        ok = False
+        content = ""
+        usage: Dict[str, int] = {}
+        try:
+            content, usage = self._dispatch(use_case, messages, params, timeout)
+            ok = not content.startswith(ERROR_PREFIX)
+            return content
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000.0
+
+            # mock neodráží reálné zatížení – do statistik nepatří
+            if self.backend != "mock":
+                router.record(decision.model, latency_ms, ok)
+
+            if ledger is not None:
+                # skutečná spotřeba od backendu má přednost před odhadem
+                used_prompt = int(usage.get("prompt_tokens") or prompt_tokens)
+                used_completion = int(
+                    usage.get("completion_tokens") or estimate_tokens(content, decision.model)
+                )
+                cost = 0.0
+                if self.backend != "mock":
+                    cost = router.estimate_cost(decision.tier, used_prompt, used_completion)
+                entry: Dict[str, Any] = {
+                    "use_case": use_case,
+                    "step": step,
+                    "backend": self.backend,
+                    "tier": decision.tier,
+                    "model": decision.model,
+                    "route_reason": decision.reason,
+                    "latency_ms": round(latency_ms, 3),
+                    "ok": ok,
+                    "prompt_tokens": used_prompt,
+                    "completion_tokens": used_completion,
+                    "tokens_source": "backend" if usage else "estimate",
+                }
+                if trim_info:
+                    entry["input_trimmed"] = trim_info
+                ledger.charge(entry, cost)
+
+    def _dispatch(
+        self,
+        use_case: str,
+        messages: List[LLMMessage],
+        params: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Vrací (odpověď, spotřeba tokenů od backendu – může být prázdná).
+        `timeout` (s) omezí HTTP volání reálných backendů.
+        """
+        if self.backend == "replay" and self._replay is not None:
+            return self._replay.respond(use_case, messages, params)
 
-        # fallback / testovací mock
-        return self._chat_mock(use_case, messages)
+        if self.backend == "openai" and self._openai_client is not None:
+            call = partial(self._chat_openai, timeout=timeout)
+        elif self.backend == "local" and self._local is not None:
+            call = partial(self._chat_local, timeout=timeout)
+        else:
+            # fallback / testovací mock
+            return self._chat_mock(use_case, messages), {}
+
+        record_file = os.getenv("LLM_RECORD_FILE")
+        if not record_file:
+            return call(messages, params)
+        return self._chat_recorded(call, use_case, messages, params, record_file)
 
     # --- interní implementace backendů ---
 
+    def _chat_recorded(
+        self,
+        call: Callable[[List[LLMMessage], Dict[str, Any]], Tuple[str, Dict[str, int]]],
+        use_case: str,
+        messages: List[LLMMessage],
+        params: Dict[str, Any],
+        record_file: str,
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Reálné volání + záznam pro replay backend.
+        Chybové odpovědi se nezaznamenávají – chyby simuluje replay sám.
+        """
+        started = time.perf_counter()
+        content, usage = call(messages, params)
+        latency_ms = (time.perf_counter() - started) * 1000.0
+
+        if not content.startswith(ERROR_PREFIX):
+            try:
+                get_store(record_file).append(
+                    ReplayRecord(
+                        request_hash=request_hash(use_case, messages, params),
+                        use_case=use_case,
+                        response=content,
+                        latency_ms=round(latency_ms, 3),
+                        model=str(params.get("model", "")),
+                        usage=dict(usage),
+                        recorded_at=time.time(),
+                    )
+                )
+            except Exception as e:
+                # záznam je jen doplněk – nesmí rozbít odpověď
+                print(f"[llm_client] Recording failed: {e}")
+
+        return content, usage
+
     def _chat_openai(
         self,
         messages: List[LLMMessage],
         params: Dict[str, Any],
-    ) -> str:
+        timeout: Optional[float] = None,
+    ) -> Tuple[str, Dict[str, int]]:
         """
         Reálné volání OpenAI – snažíme se držet se nové knihovny openai.
         Ošetřené tak, aby případný pád neodstřelil celý runtime.
@@ -124,16 +402,49 @@ class LLMClient:
                 {"role": m.role, "content": m.content} for m in messages
             ]
 
+            extra: Dict[str, Any] = {"timeout": timeout} if timeout is not None else {}
             resp = self._openai_client.chat.completions.create(  # type: ignore[arg-type]
                 messages=api_messages,
                 **params,
+                **extra,
             )
 
+            # spotřeba tokenů – využije ji účet requestu i záznam pro replay
+            raw_usage = getattr(resp, "usage", None)
+            usage: Dict[str, int] = {}
+            if raw_usage is not None:
+                for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                    usage[k] = int(getattr(raw_usage, k, 0) or 0)
+
             content = getattr(resp.choices[0].message, "content", None)  # type: ignore[index]
-            return content or ""
+            return content or "", usage
         except Exception as e:
             # V produkci chceme radši degradovat na skeleton než spadnout
-            return f"[LLM ERROR] {e}"
+            return f"{ERROR_PREFIX} {e}", {}
+
+    def _chat_local(
+        self,
+        messages: List[LLMMessage],
+        params: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Volání OpenAI-kompatibilního endpointu přes sdílený LocalEndpoint.
+        Souběžná volání se na endpointu seskupují do batchů.
+        """
+        try:
+            api_messages = [
+                {"role": m.role, "content": m.content} for m in messages
+            ]
+
+            local_model = os.getenv("LLM_LOCAL_MODEL")
+            if local_model:
+                params = {**params, "model": local_model}
+
+            return self._local.chat(api_messages, params, timeout=timeout)  # type: ignore[union-attr]
+        except Exception as e:
+            # stejná degradace jako u openai backendu
+            return f"{ERROR_PREFIX} {e}", {}
 
     def _chat_mock(self, use_case: str, messages: List[LLMMessage]) -> str:
         """
@@ -14,18 +14,16 @@
 
 from __future__ import annotations
 
-from runtime.config_loader import load_yaml
+from runtime.config_loader import load_yaml_cached
 
 # Pokud někde někdo ještě používá llm/config.yaml přímo,
 # může si config načíst přes tuto pomocnou funkci.
 # Nedáváme sem žádného klienta, aby nevznikala duplicita.
 
-_CONFIG = load_yaml("llm/config.yaml")
-
 
 def get_raw_llm_config() -> dict:
     """
     Vrátí syrovou konfiguraci LLM z llm/config.yaml.
     Používej raději llm.client.get_llm_params_for_use_case().
     """
-    return _CONFIG
+    return load_yaml_cached("llm/config.yaml")
@@ -0,0 +1,62 @@
+# llm/deadline.py
+"""
+Deadline LLM volání pro právě běžící uzel pipeline.
+
+- executor (runtime/pipeline.py) ho nastaví ve vlákně uzlu s `timeout_s`,
+- je dostupný přes ContextVar (stejně jako ledger v llm/ledger.py), takže
+  enginy nemusí nic předávat ručně,
+- LLMClient po vypršení nebo zrušení uzlu další volání už neposílá
+  (žádné tokeny za zahozený výsledek) a běžícímu volání dá jako HTTP
+  timeout jen zbytek času.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+
+class Deadline:
+    def __init__(self, at: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.at = at
+        self._clock = clock
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Uzel byl zahozen (timeout) – zbytek práce nemá smysl."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> float:
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.at - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+_CURRENT: ContextVar[Optional[Deadline]] = ContextVar("llm_node_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline aktuálního uzlu, nebo None (uzel bez timeoutu, mimo pipeline)."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def node_deadline(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    token = _CURRENT.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _CURRENT.reset(token)
+
+
+__all__ = ["Deadline", "current_deadline", "node_deadline"]
@@ -0,0 +1,78 @@
+# llm/ledger.py
+"""
+Účetnictví LLM volání v rámci jednoho requestu (jednoho běhu run_pipeline).
+
+- drží rozpočet (cost budget v USD) a průběžnou útratu,
+- ukládá stručný záznam o každém volání (use_case, krok, model, latence,
+  tokeny, cena) a agreguje tokeny za celý request,
+- je dostupný přes ContextVar, takže enginy nemusí nic předávat ručně.
+
+Použití v orchestrátoru:
+
+    with request_ledger(budget_usd=0.05) as ledger:
+        ... běh enginů ...
+    metadata["llm_usage"] = ledger.summary()
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class RequestLedger:
+    budget_usd: Optional[float] = None
+    spent_usd: float = 0.0
+    calls: List[Dict[str, Any]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def remaining_usd(self) -> Optional[float]:
+        """Zbývající rozpočet, nebo None, když rozpočet není nastavený."""
+        if self.budget_usd is None:
+            return None
+        return max(0.0, self.budget_usd - self.spent_usd)
+
+    def charge(self, entry: Dict[str, Any], cost_usd: float) -> None:
+        with self._lock:
+            self.spent_usd += max(0.0, float(cost_usd))
+            self.calls.append({**entry, "cost_usd": round(float(cost_usd), 6)})
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            prompt_tokens = sum(int(c.get("prompt_tokens", 0)) for c in self.calls)
+            completion_tokens = sum(int(c.get("completion_tokens", 0)) for c in self.calls)
+            return {
+                "budget_usd": self.budget_usd,
+                "spent_usd": round(self.spent_usd, 6),
+                "call_count": len(self.calls),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "trimmed_calls": sum(1 for c in self.calls if c.get("input_trimmed")),
+                "calls": [dict(c) for c in self.calls],
+            }
+
+
+_CURRENT: ContextVar[Optional[RequestLedger]] = ContextVar("llm_request_ledger", default=None)
+
+
+def current_ledger() -> Optional[RequestLedger]:
+    """Ledger aktuálního requestu, nebo None mimo run_pipeline."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def request_ledger(budget_usd: Optional[float] = None) -> Iterator[RequestLedger]:
+    ledger = RequestLedger(budget_usd=budget_usd)
+    token = _CURRENT.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _CURRENT.reset(token)
+
+
+__all__ = ["RequestLedger", "current_ledger", "request_ledger"]
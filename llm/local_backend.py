@@ -0,0 +1,317 @@
+# llm/local_backend.py
+"""
+Backend pro libovolný OpenAI-kompatibilní endpoint (self-hosted inference,
+lokální stand-in server) s client-side micro-batchingem.
+
+Volání, která přijdou během krátkého okna (default 5 ms), se seskupí do jednoho
+batch requestu. Batch formát:
+
+    POST {base_url}{batch_path}
+    {"requests": [<chat.completions payload>, ...]}
+    → {"responses": [<chat.completion objekt>, ...]}
+
+Pokud server batch endpoint nepodporuje (404/405/501), backend si to zapamatuje
+a další skupiny odesílá jako souběžné jednotlivé requesty na /chat/completions.
+
+Env proměnné (LLM_BACKEND=local):
+- LLM_LOCAL_BASE_URL         default http://localhost:8000/v1
+- LLM_LOCAL_API_KEY          volitelný Bearer token
+- LLM_LOCAL_MODEL            přepíše název modelu z llm/config.yaml
+- LLM_LOCAL_TIMEOUT          timeout HTTP volání v sekundách (default 60)
+- LLM_LOCAL_BATCH            auto (default) | 1 | 0
+- LLM_LOCAL_BATCH_PATH       default /chat/completions/batch
+- LLM_LOCAL_BATCH_WINDOW_MS  default 5
+- LLM_LOCAL_MAX_BATCH        default 16
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# (url, body, headers, timeout) -> (http_status, json_body)
+Transport = Callable[[str, Dict[str, Any], Dict[str, str], float], Tuple[int, Dict[str, Any]]]
+
+DEFAULT_BASE_URL = "http://localhost:8000/v1"
+DEFAULT_BATCH_PATH = "/chat/completions/batch"
+
+# statusy, podle kterých poznáme, že server batch neumí
+_BATCH_UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+class LocalBackendError(RuntimeError):
+    """Chyba volání lokálního endpointu (HTTP, síť, nečitelná odpověď)."""
+
+
+def urllib_transport(
+    url: str,
+    body: Dict[str, Any],
+    headers: Dict[str, str],
+    timeout: float,
+) -> Tuple[int, Dict[str, Any]]:
+    """
+    Výchozí transport čistě přes stdlib – žádná další závislost.
+    """
+    data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read().decode("utf-8") or "{}")
+    except urllib.error.HTTPError as e:
+        try:
+            payload = json.loads(e.read().decode("utf-8") or "{}")
+        except Exception:
+            payload = {}
+        return e.code, payload
+
+
+def _parse_completion(data: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+    try:
+        content = data["choices"][0]["message"].get("content") or ""
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise LocalBackendError(f"Neočekávaný tvar odpovědi: {e}") from e
+
+    usage_raw = data.get("usage") or {}
+    usage = {
+        k: int(usage_raw.get(k) or 0)
+        for k in ("prompt_tokens", "completion_tokens", "total_tokens")
+        if k in usage_raw
+    }
+    return content, usage
+
+
+class _Pending:
+    __slots__ = ("payload", "future")
+
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.payload = payload
+        self.future: Future = Future()
+
+
+class LocalEndpoint:
+    """
+    Jeden OpenAI-kompatibilní endpoint + jeho batcher.
+
+    Instance je sdílená pro danou base_url (viz get_endpoint), aby se do
+    jednoho batche dostala i volání z různých LLMClient instancí.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        batch_mode: str = "auto",
+        batch_path: str = DEFAULT_BATCH_PATH,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 16,
+        transport: Optional[Transport] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.batch_path = batch_path
+        self.batch_window_ms = max(0.0, batch_window_ms)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._transport: Transport = transport or urllib_transport
+
+        # None = zatím nevíme (auto), True/False = rozhodnuto
+        mode = (batch_mode or "auto").lower()
+        self.batch_supported: Optional[bool] = (
+            None if mode == "auto" else mode in ("1", "true", "yes")
+        )
+
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        # skupiny (batch requesty) a jednotlivé requesty mají oddělené pooly –
+        # jednotlivé odeslání po odmítnutém batchi nečeká za dispatch joby
+        self._dispatch_pool = ThreadPoolExecutor(
+            max_workers=self.max_batch_size,
+            thread_name_prefix="llm-local",
+        )
+        self._single_pool = ThreadPoolExecutor(
+            max_workers=self.max_batch_size,
+            thread_name_prefix="llm-local-single",
+        )
+
+        # statistiky – hodí se pro ladění velikosti okna (mění je víc vláken)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "batches": 0, "batched_requests": 0}
+
+    # --- veřejné API ---
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Tuple[str, Dict[str, int]]:
+        """`timeout` (s) zkrátí výchozí timeout endpointu (deadline uzlu)."""
+        payload = {"messages": messages, **params}
+        limit = self.timeout if timeout is None else min(self.timeout, timeout)
+
+        if self.batch_window_ms <= 0 or self.batch_supported is False:
+            return self._send_single(payload, limit)
+
+        pending = _Pending(payload)
+        self._ensure_worker()
+        self._queue.put(pending)
+        return pending.future.result(timeout=limit + self.batch_window_ms / 1000.0)
+
+    # --- HTTP ---
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _post(
+        self, path: str, body: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Tuple[int, Dict[str, Any]]:
+        try:
+            return self._transport(
+                self.base_url + path, body, self._headers(), timeout or self.timeout
+            )
+        except Exception as e:
+            raise LocalBackendError(f"Volání {self.base_url}{path} selhalo: {e}") from e
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def _send_single(
+        self, payload: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        self._count(requests=1)
+        status, data = self._post("/chat/completions", payload, timeout)
+        if status >= 400:
+            raise LocalBackendError(f"HTTP {status}: {data.get('error') or data}")
+        return _parse_completion(data)
+
+    # --- batching ---
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._collect_loop,
+                name="llm-local-batcher",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _collect_loop(self) -> None:
+        """
+        Čeká na první request, pak sbírá další až do vypršení okna
+        nebo naplnění batche a skupinu předá k odeslání.
+        """
+        while True:
+            first = self._queue.get()
+            group = [first]
+            deadline = time.monotonic() + self.batch_window_ms / 1000.0
+
+            while len(group) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._dispatch_pool.submit(self._dispatch, group)
+
+    def _dispatch(self, group: List[_Pending]) -> None:
+        if len(group) > 1 and self.batch_supported is not False:
+            if self._try_batch(group):
+                return
+
+        for item in group:
+            self._single_pool.submit(self._resolve_single, item)
+
+    def _resolve_single(self, item: _Pending) -> None:
+        try:
+            item.future.set_result(self._send_single(item.payload))
+        except Exception as e:
+            item.future.set_exception(e)
+
+    def _try_batch(self, group: List[_Pending]) -> bool:
+        """
+        Vrací True, pokud batch proběhl (futures jsou vyřešené),
+        False, pokud server batch nepodporuje a je třeba poslat jednotlivě.
+        """
+        try:
+            status, data = self._post(self.batch_path, {"requests": [p.payload for p in group]})
+        except LocalBackendError as e:
+            for item in group:
+                item.future.set_exception(e)
+            return True
+
+        if status in _BATCH_UNSUPPORTED_STATUSES:
+            self.batch_supported = False
+            return False
+
+        responses = data.get("responses")
+        if status >= 400 or not isinstance(responses, list) or len(responses) != len(group):
+            err = LocalBackendError(f"Batch HTTP {status}: neplatná odpověď serveru")
+            for item in group:
+                item.future.set_exception(err)
+            return True
+
+        self.batch_supported = True
+        self._count(batches=1, batched_requests=len(group))
+
+        for item, resp in zip(group, responses):
+            try:
+                item.future.set_result(_parse_completion(resp))
+            except Exception as e:
+                item.future.set_exception(e)
+        return True
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+_ENDPOINTS: Dict[str, LocalEndpoint] = {}
+_ENDPOINTS_LOCK = threading.Lock()
+
+
+def get_endpoint() -> LocalEndpoint:
+    """
+    Sdílený LocalEndpoint podle env konfigurace (jeden na base_url).
+    """
+    base_url = os.getenv("LLM_LOCAL_BASE_URL", DEFAULT_BASE_URL)
+    with _ENDPOINTS_LOCK:
+        endpoint = _ENDPOINTS.get(base_url)
+        if endpoint is None:
+            endpoint = LocalEndpoint(
+                base_url=base_url,
+                api_key=os.getenv("LLM_LOCAL_API_KEY") or None,
+                timeout=_env_float("LLM_LOCAL_TIMEOUT", 60.0),
+                batch_mode=os.getenv("LLM_LOCAL_BATCH", "auto"),
+                batch_path=os.getenv("LLM_LOCAL_BATCH_PATH", DEFAULT_BATCH_PATH),
+                batch_window_ms=_env_float("LLM_LOCAL_BATCH_WINDOW_MS", 5.0),
+                max_batch_size=int(_env_float("LLM_LOCAL_MAX_BATCH", 16)),
+            )
+            _ENDPOINTS[base_url] = endpoint
+        return endpoint
+
+
+__all__ = ["LocalEndpoint", "LocalBackendError", "get_endpoint", "urllib_transport"]
@@ -0,0 +1,200 @@
+# llm/prompt_registry.py
+"""
+Registr promptů enginů.
+
+- načte všechny prompty z engines/<skupina>/prompts/*.md jednou (při prvním
+  použití), ne při každém LLM volání,
+- při načtení do nich vloží GLOBAL a skupinovou policy z prompts/policy/
+  (stejná pravidla jako offline nástroj tools/apply_policy.py – blok se
+  nepřidá, pokud už v promptu je),
+- pro každý prompt předpočítá počet tokenů a sha256 obsahu (verze promptu,
+  použitelná i jako klíč do cache),
+- v dev režimu (PRAVNI_STRAZCE_DEV=1) hlídá mtime souborů a změněné prompty
+  při dalším get() znovu zkompiluje.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from runtime.config_loader import BASE_DIR
+from llm.client import estimate_tokens
+
+POLICY_DIR = Path("prompts") / "policy"
+
+GLOBAL_POLICY_FILE = "policy_global.md"
+GLOBAL_MARKER = "GLOBAL POLICY – e-Advokát"
+
+# skupina → (složka s prompty, policy soubor, marker policy bloku)
+PROMPT_GROUPS: Dict[str, Tuple[Path, str, str]] = {
+    "core_legal": (Path("engines/core_legal/prompts"), "policy_core_legal.md", "CORE LEGAL POLICY –"),
+    "risk": (Path("engines/risk/prompts"), "policy_risk_engine.md", "RISK ENGINE POLICY –"),
+    "intent": (Path("engines/intent/prompts"), "policy_intent_engine.md", "INTENT ENGINE POLICY –"),
+    "judikatura": (
+        Path("engines/judikatura/prompts"),
+        "policy_judikatura_engine.md",
+        "JUDIKATURA ENGINE POLICY –",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    group: str
+    name: str
+    text: str
+    sha256: str
+    tokens: int
+    source_path: Path
+    # mtime zdroje + policy souborů v okamžiku kompilace (pro hot reload)
+    mtimes: Tuple[float, ...]
+
+    @property
+    def version(self) -> str:
+        return self.sha256[:12]
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _env_dev_mode() -> bool:
+    return os.getenv("PRAVNI_STRAZCE_DEV", "").lower() in ("1", "true", "yes")
+
+
+class PromptRegistry:
+    def __init__(self, base_dir: Path = BASE_DIR, dev_mode: Optional[bool] = None) -> None:
+        self.base_dir = Path(base_dir)
+        self.dev_mode = _env_dev_mode() if dev_mode is None else dev_mode
+        self._prompts: Dict[Tuple[str, str], CompiledPrompt] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # --- kompilace ---
+
+    def _policy_paths(self, group: str) -> Tuple[Path, Path]:
+        policy_dir = self.base_dir / POLICY_DIR
+        return policy_dir / GLOBAL_POLICY_FILE, policy_dir / PROMPT_GROUPS[group][1]
+
+    def _compile(self, group: str, path: Path) -> CompiledPrompt:
+        text = path.read_text(encoding="utf-8")
+        global_path, group_path = self._policy_paths(group)
+        group_marker = PROMPT_GROUPS[group][2]
+
+        prefix = ""
+        global_policy = _read(global_path)
+        if global_policy and GLOBAL_MARKER not in text:
+            prefix += global_policy.strip() + "\n\n"
+        group_policy = _read(group_path)
+        if group_policy and group_marker not in text:
+            prefix += group_policy.strip() + "\n\n"
+        text = prefix + text
+
+        return CompiledPrompt(
+            group=group,
+            name=path.stem,
+            text=text,
+            sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            tokens=estimate_tokens(text),
+            source_path=path,
+            mtimes=(_mtime(path), _mtime(global_path), _mtime(group_path)),
+        )
+
+    def _load_all(self) -> None:
+        prompts: Dict[Tuple[str, str], CompiledPrompt] = {}
+        for group, (rel_dir, _, _) in PROMPT_GROUPS.items():
+            prompt_dir = self.base_dir / rel_dir
+            if not prompt_dir.is_dir():
+                continue
+            for path in sorted(prompt_dir.glob("*.md")):
+                try:
+                    prompts[(group, path.stem)] = self._compile(group, path)
+                except Exception as e:
+                    # rozbitý prompt nesmí shodit ostatní
+                    print(f"[prompt_registry] Error loading {path}: {e}")
+        self._prompts = prompts
+        self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load_all()
+
+    def _is_stale(self, prompt: CompiledPrompt) -> bool:
+        global_path, group_path = self._policy_paths(prompt.group)
+        current = (_mtime(prompt.source_path), _mtime(global_path), _mtime(group_path))
+        return current != prompt.mtimes
+
+    # --- veřejné API ---
+
+    def get(self, group: str, name: str) -> CompiledPrompt:
+        """
+        Vrátí zkompilovaný prompt. Neexistující prompt → KeyError.
+        """
+        self._ensure_loaded()
+        key = (group, name)
+        prompt = self._prompts.get(key)
+
+        if self.dev_mode:
+            if prompt is None or self._is_stale(prompt):
+                path = self.base_dir / PROMPT_GROUPS[group][0] / f"{name}.md"
+                if path.exists():
+                    with self._lock:
+                        prompt = self._compile(group, path)
+                        self._prompts = {**self._prompts, key: prompt}
+
+        if prompt is None:
+            raise KeyError(f"Prompt {group}/{name} neexistuje")
+        return prompt
+
+    def versions(self, group: Optional[str] = None) -> Dict[str, str]:
+        self._ensure_loaded()
+        return {
+            f"{g}/{n}": p.version
+            for (g, n), p in sorted(self._prompts.items())
+            if group is None or g == group
+        }
+
+    def bundle_version(self) -> str:
+        """Souhrnná verze všech promptů – mění se s jakoukoliv změnou promptu či policy."""
+        digest = hashlib.sha256()
+        for name, version in self.versions().items():
+            digest.update(f"{name}={version};".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def reload(self) -> None:
+        with self._lock:
+            self._load_all()
+
+
+_REGISTRY: Optional[PromptRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = PromptRegistry()
+    return _REGISTRY
+
+
+__all__ = ["CompiledPrompt", "PromptRegistry", "get_prompt_registry", "PROMPT_GROUPS"]
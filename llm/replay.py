@@ -0,0 +1,305 @@
+# llm/replay.py
+"""
+Record & replay backend pro LLMClient.
+
+Cíl:
+- při reálném běhu (LLM_BACKEND=openai + LLM_RECORD_FILE=...) zaznamenat
+  dvojice (hash requestu → odpověď, latence, spotřeba tokenů) do JSONL souboru,
+- offline (LLM_BACKEND=replay) je přehrát bez sítě, s realistickou latencí
+  a volitelným vkládáním chyb – pro zátěžové testy run_pipeline na notebooku.
+
+Env proměnné pro replay režim:
+- LLM_REPLAY_FILE        cesta k JSONL záznamům (default tmp/llm_replay.jsonl)
+- LLM_REPLAY_LATENCY     none | recorded | fixed:<ms> | uniform:<min_ms>:<max_ms>
+                         | lognormal:<median_ms>:<sigma>   (default recorded)
+- LLM_REPLAY_ERROR_RATE  0.0–1.0, podíl volání, která skončí chybou (default 0)
+- LLM_REPLAY_ERROR_MODE  message (vrátí "[LLM ERROR] ...") | raise (vyhodí výjimku)
+- LLM_REPLAY_STRICT      1 = chybějící záznam je chyba, jinak syntetická odpověď
+- LLM_REPLAY_SEED        seed pro deterministické latence a chyby
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from runtime.config_loader import BASE_DIR
+
+DEFAULT_REPLAY_FILE = BASE_DIR / "tmp" / "llm_replay.jsonl"
+
+ERROR_PREFIX = "[LLM ERROR]"
+
+
+class ReplayInjectedError(RuntimeError):
+    """Uměle vložená chyba replay backendu (LLM_REPLAY_ERROR_MODE=raise)."""
+
+
+def request_hash(use_case: str, messages: Sequence[Any], params: Dict[str, Any]) -> str:
+    """
+    Stabilní hash requestu – stejný vstup při nahrávání i přehrávání
+    musí dát stejný klíč.
+    """
+    body = {
+        "use_case": use_case,
+        "model": params.get("model"),
+        "temperature": params.get("temperature"),
+        "max_tokens": params.get("max_tokens"),
+        "messages": [
+            {"role": getattr(m, "role", None), "content": getattr(m, "content", None)}
+            for m in messages
+        ],
+    }
+    raw = json.dumps(body, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ReplayRecord:
+    request_hash: str
+    use_case: str
+    response: str
+    latency_ms: float
+    model: str = ""
+    usage: Dict[str, int] = field(default_factory=dict)
+    recorded_at: float = 0.0
+
+
+class ReplayStore:
+    """
+    JSONL úložiště záznamů. Načítá se líně a drží index hash → záznamy.
+    Zápis (append) je chráněný zámkem, aby šlo nahrávat i z více vláken.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[ReplayRecord]] = {}
+        self._latencies: List[float] = []
+        # neměnná kopie pro čtenáře; přestaví se jen po načtení / append
+        self._latencies_view: Tuple[float, ...] = ()
+        self._cursor: Dict[str, int] = {}
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            raw = json.loads(line)
+                            self._add(ReplayRecord(**raw))
+                        except Exception as e:
+                            # poškozený řádek nesmí shodit replay
+                            print(f"[llm_replay] Skipping invalid record in {self.path}: {e}")
+            self._latencies_view = tuple(self._latencies)
+            self._loaded = True
+
+    def _add(self, record: ReplayRecord) -> None:
+        self._index.setdefault(record.request_hash, []).append(record)
+        self._latencies.append(float(record.latency_ms))
+
+    def append(self, record: ReplayRecord) -> None:
+        self._ensure_loaded()
+        line = json.dumps(asdict(record), ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._add(record)
+            self._latencies_view = tuple(self._latencies)
+
+    def lookup(self, key: str) -> Optional[ReplayRecord]:
+        """
+        Vrátí záznam pro daný hash. Má-li jeden request víc záznamů,
+        střídají se dokola (round robin) – zachová se rozptyl odpovědí.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            records = self._index.get(key)
+            if not records:
+                return None
+            pos = self._cursor.get(key, 0)
+            self._cursor[key] = pos + 1
+            return records[pos % len(records)]
+
+    def latencies(self) -> Tuple[float, ...]:
+        """Všechny nahrané latence (sdílená neměnná n-tice, bez kopírování)."""
+        self._ensure_loaded()
+        return self._latencies_view
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return sum(len(v) for v in self._index.values())
+
+
+_STORES: Dict[str, ReplayStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path: Optional[str | Path] = None) -> ReplayStore:
+    """
+    Sdílená instance ReplayStore pro danou cestu – enginy vytvářejí
+    LLMClient opakovaně, soubor se ale načte jen jednou.
+    """
+    resolved = Path(path or os.getenv("LLM_REPLAY_FILE") or DEFAULT_REPLAY_FILE)
+    key = str(resolved.resolve())
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = ReplayStore(resolved)
+            _STORES[key] = store
+        return store
+
+
+class LatencyModel:
+    """
+    Model latence pro replay:
+
+    - none                        → bez čekání
+    - recorded                    → latence ze záznamu (u chybějícího záznamu
+                                    náhodně vybraná ze všech nahraných)
+    - fixed:<ms>                  → konstantní latence
+    - uniform:<min_ms>:<max_ms>   → rovnoměrné rozdělení
+    - lognormal:<median_ms>:<sigma> → dlouhý chvost, realistický pro LLM API
+    """
+
+    def __init__(self, spec: str = "recorded") -> None:
+        parts = (spec or "recorded").strip().lower().split(":")
+        self.kind = parts[0]
+        try:
+            self.args = [float(p) for p in parts[1:]]
+        except ValueError as e:
+            raise ValueError(f"Neplatná specifikace latence: {spec!r}") from e
+
+        expected = {"none": 0, "recorded": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.args) != expected[self.kind]:
+            raise ValueError(f"Neplatná specifikace latence: {spec!r}")
+
+    def sample_ms(
+        self,
+        rng: random.Random,
+        record: Optional[ReplayRecord],
+        recorded_pool: Sequence[float],
+    ) -> float:
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.args[0], self.args[1])
+        if self.kind == "lognormal":
+            median, sigma = self.args
+            return median * math.exp(rng.gauss(0.0, sigma))
+        # recorded
+        if record is not None:
+            return float(record.latency_ms)
+        if recorded_pool:
+            return float(rng.choice(recorded_pool))
+        return 0.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ReplayBackend:
+    """
+    Offline backend: odpovědi bere z ReplayStore, simuluje latenci a chyby.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        error_mode: str = "message",
+        strict: bool = False,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.store = store
+        self.latency = latency
+        self.error_rate = max(0.0, min(1.0, float(error_rate)))
+        self.error_mode = error_mode
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sleep = sleep
+
+    @classmethod
+    def from_env(cls) -> "ReplayBackend":
+        seed_raw = os.getenv("LLM_REPLAY_SEED")
+        return cls(
+            store=get_store(),
+            latency=LatencyModel(os.getenv("LLM_REPLAY_LATENCY", "recorded")),
+            error_rate=_env_float("LLM_REPLAY_ERROR_RATE", 0.0),
+            error_mode=os.getenv("LLM_REPLAY_ERROR_MODE", "message").lower(),
+            strict=os.getenv("LLM_REPLAY_STRICT", "").lower() in ("1", "true", "yes"),
+            seed=int(seed_raw) if seed_raw else None,
+        )
+
+    def chat(self, use_case: str, messages: Sequence[Any], params: Dict[str, Any]) -> str:
+        return self.respond(use_case, messages, params)[0]
+
+    def respond(
+        self,
+        use_case: str,
+        messages: Sequence[Any],
+        params: Dict[str, Any],
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Jako chat(), ale vrací i nahranou spotřebu tokenů (prázdná, když
+        záznam chybí nebo jde o vloženou chybu).
+        """
+        key = request_hash(use_case, messages, params)
+        record = self.store.lookup(key)
+
+        with self._rng_lock:
+            delay_ms = self.latency.sample_ms(self._rng, record, self.store.latencies())
+            inject_error = self._rng.random() < self.error_rate
+
+        if delay_ms > 0:
+            self._sleep(delay_ms / 1000.0)
+
+        if inject_error:
+            if self.error_mode == "raise":
+                raise ReplayInjectedError("replay: injected error")
+            return f"{ERROR_PREFIX} replay: injected error", {}
+
+        if record is not None:
+            return record.response, dict(record.usage)
+
+        if self.strict:
+            return f"{ERROR_PREFIX} replay: pro request {key[:12]} neexistuje záznam", {}
+
+        # syntetická odpověď – drží tvar mock backendu, ať enginy běží dál
+        return f"Replay LLM odpověď bez záznamu (use_case={use_case}, request={key[:12]}).", {}
+
+
+__all__ = [
+    "ReplayRecord",
+    "ReplayStore",
+    "ReplayBackend",
+    "ReplayInjectedError",
+    "LatencyModel",
+    "request_hash",
+    "get_store",
+]
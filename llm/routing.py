@@ -0,0 +1,307 @@
+# llm/routing.py
+"""
+Router modelů – vybírá model pro každé LLM volání.
+
+Rozhodnutí kombinuje:
+1) deklarovaný tier kroku / use_case z routovací tabulky (llm/config.yaml → routing),
+2) živé statistiky modelů (p95 latence, chybovost) – při přetížení demotuje
+   na levnější tier; vzorky stárnou (`sample_max_age_s`) a demotovaný model
+   dostává jednou za `probe_interval_s` zkušební volání, takže se po
+   zotavení vrátí do provozu (bez zkoušek by nové vzorky nikdy nepřišly),
+3) rozpočet requestu (RequestLedger) – když se drahé volání už nevejde,
+   demotuje taky.
+
+Modely pro tiery se berou z `model_defaults` – globálně z llm/config.yaml,
+případně z configu enginu (např. engines/core_legal/config.yaml).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from runtime.config_loader import load_yaml
+from llm.ledger import RequestLedger
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    model: str
+    temperature: float
+    max_tokens: int
+    reason: str
+    estimated_cost_usd: float = 0.0
+
+    def as_params(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+
+
+@dataclass(frozen=True)
+class StatsSummary:
+    samples: int
+    p95_ms: float
+    error_rate: float
+
+
+class ModelStats:
+    """
+    Klouzavé okno posledních volání jednoho modelu. Vzorky starší než
+    `max_age_s` (0 = bez omezení) se zahazují.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        max_age_s: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # (čas, latence ms, chyba)
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self.max_age_s = max_age_s
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((self._clock(), float(latency_ms), not ok))
+
+    def _fresh(self) -> List[Tuple[float, float, bool]]:
+        with self._lock:
+            if self.max_age_s > 0:
+                cutoff = self._clock() - self.max_age_s
+                while self._samples and self._samples[0][0] < cutoff:
+                    self._samples.popleft()
+            return list(self._samples)
+
+    def summary(self) -> StatsSummary:
+        """
+        Počet vzorků, p95 a chybovost z jednoho výběru čerstvých vzorků –
+        jediné místo, kde se filtruje stáří a počítá p95.
+        """
+        fresh = self._fresh()
+        if not fresh:
+            return StatsSummary(0, 0.0, 0.0)
+        values = sorted(latency for _, latency, _ in fresh)
+        idx = min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)
+        errors = sum(1 for _, _, error in fresh if error)
+        return StatsSummary(len(fresh), values[idx], errors / len(fresh))
+
+    @property
+    def samples(self) -> int:
+        return self.summary().samples
+
+    def p95_ms(self) -> float:
+        return self.summary().p95_ms
+
+    def error_rate(self) -> float:
+        return self.summary().error_rate
+
+
+# Výchozí routovací tabulka – použije se, když config sekci `routing` nemá
+_DEFAULT_ROUTING: Dict[str, Any] = {
+    "default_tier": "large",
+    "tiers": {
+        "large": {"model_key": "legal_analysis_model", "params_key": "legal_analysis"},
+        "small": {"model_key": "helper_model", "params_key": "helper"},
+    },
+    "use_cases": {"jurisprudence_search": "small", "helper": "small"},
+    "steps": {},
+    "demotion": {"target": "small"},
+}
+
+
+class ModelRouter:
+    def __init__(self, config: Dict[str, Any], clock: Callable[[], float] = time.monotonic) -> None:
+        self._config = config or {}
+        self._clock = clock
+        routing = self._config.get("routing") or _DEFAULT_ROUTING
+
+        self.default_tier: str = routing.get("default_tier", "large")
+        self.tiers: Dict[str, Dict[str, Any]] = routing.get("tiers") or _DEFAULT_ROUTING["tiers"]
+        self.use_cases: Dict[str, str] = routing.get("use_cases") or {}
+        self.steps: Dict[str, str] = routing.get("steps") or {}
+
+        demotion = routing.get("demotion") or {}
+        self.demotion_target: Optional[str] = demotion.get("target")
+        self.min_samples = int(demotion.get("min_samples", 5))
+        self.max_p95_ms = float(demotion.get("latency_p95_ms", 0) or 0)
+        self.max_error_rate = float(demotion.get("error_rate", 0) or 0)
+        self.window = int(demotion.get("window", 50))
+        self.sample_max_age_s = float(demotion.get("sample_max_age_s", 300) or 0)
+        self.probe_interval_s = float(demotion.get("probe_interval_s", 30) or 0)
+
+        self._stats: Dict[str, ModelStats] = {}
+        self._stats_lock = threading.Lock()
+        # model → čas poslední zkoušky (resp. začátku demotace)
+        self._last_probe: Dict[str, float] = {}
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Celá LLM konfigurace (llm/config.yaml), ze které router vznikl."""
+        return self._config
+
+    # --- statistiky ---
+
+    def stats_for(self, model: str) -> ModelStats:
+        with self._stats_lock:
+            stats = self._stats.get(model)
+            if stats is None:
+                stats = ModelStats(self.window, self.sample_max_age_s, self._clock)
+                self._stats[model] = stats
+            return stats
+
+    def record(self, model: str, latency_ms: float, ok: bool) -> None:
+        self.stats_for(model).record(latency_ms, ok)
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats.clear()
+            self._last_probe.clear()
+
+    def _take_probe(self, model: str) -> bool:
+        """
+        Jednou za `probe_interval_s` pustí volání na demotovaný model, aby
+        jeho statistiky dostaly čerstvé vzorky. První demotace interval
+        teprve odstartuje.
+        """
+        if self.probe_interval_s <= 0:
+            return False
+        now = self._clock()
+        with self._stats_lock:
+            last = self._last_probe.get(model)
+            if last is not None and now - last >= self.probe_interval_s:
+                self._last_probe[model] = now
+                return True
+            if last is None:
+                self._last_probe[model] = now
+            return False
+
+    # --- výběr modelu ---
+
+    def declared_tier(self, use_case: str, step: Optional[str] = None) -> str:
+        if step and step in self.steps:
+            return self.steps[step]
+        return self.use_cases.get(use_case, self.default_tier)
+
+    def _build(
+        self,
+        tier: str,
+        model_defaults: Optional[Dict[str, Any]],
+        prompt_tokens: int,
+        reason: str,
+        completion_tokens: Optional[int] = None,
+    ) -> RouteDecision:
+        tier_cfg = self.tiers.get(tier) or {}
+        global_models = self._config.get("model_defaults", {}) or {}
+        models = {**global_models, **(model_defaults or {})}
+
+        params_key = tier_cfg.get("params_key", "legal_analysis")
+        temps = self._config.get("temperature", {}) or {}
+        max_tokens_cfg = self._config.get("max_tokens", {}) or {}
+
+        model = tier_cfg.get("model") or models.get(tier_cfg.get("model_key", ""), "gpt-4.1-mini")
+        max_tokens = int(max_tokens_cfg.get(params_key, 2000 if params_key == "legal_analysis" else 800))
+
+        return RouteDecision(
+            tier=tier,
+            model=model,
+            temperature=float(temps.get(params_key, 0.2 if params_key == "legal_analysis" else 0.1)),
+            max_tokens=max_tokens,
+            reason=reason,
+            estimated_cost_usd=self.estimate_cost(
+                tier, prompt_tokens, completion_tokens if completion_tokens is not None else max_tokens
+            ),
+        )
+
+    def estimate_cost(self, tier: str, prompt_tokens: int, completion_tokens: int) -> float:
+        tier_cfg = self.tiers.get(tier) or {}
+        cin = float(tier_cfg.get("cost_per_1k_input_usd", 0.0) or 0.0)
+        cout = float(tier_cfg.get("cost_per_1k_output_usd", 0.0) or 0.0)
+        return (prompt_tokens * cin + completion_tokens * cout) / 1000.0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Přehled čerstvých statistik všech modelů (stejný výpočet jako demotace)."""
+        with self._stats_lock:
+            models = dict(self._stats)
+        return {model: asdict(stats.summary()) for model, stats in sorted(models.items())}
+
+    def _overloaded(self, model: str) -> Optional[str]:
+        summary = self.stats_for(model).summary()
+        if summary.samples < self.min_samples:
+            return None
+        if self.max_p95_ms and summary.p95_ms > self.max_p95_ms:
+            return f"p95 {summary.p95_ms:.0f} ms > {self.max_p95_ms:.0f} ms"
+        if self.max_error_rate and summary.error_rate > self.max_error_rate:
+            return f"error_rate {summary.error_rate:.2f} > {self.max_error_rate:.2f}"
+        return None
+
+    def route(
+        self,
+        use_case: str,
+        step: Optional[str] = None,
+        model_defaults: Optional[Dict[str, Any]] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: Optional[int] = None,
+        ledger: Optional[RequestLedger] = None,
+    ) -> RouteDecision:
+        """
+        Vybere tier a model. `completion_tokens` je očekávaná délka odpovědi
+        (typicky explicitní max_tokens kroku) – použije se jen pro odhad ceny.
+        """
+        tier = self.declared_tier(use_case, step)
+        decision = self._build(tier, model_defaults, prompt_tokens, "declared", completion_tokens)
+
+        target = self.demotion_target
+        if not target or target == tier or target not in self.tiers:
+            return decision
+
+        overload = self._overloaded(decision.model)
+        if not overload:
+            with self._stats_lock:
+                self._last_probe.pop(decision.model, None)
+        elif self._take_probe(decision.model):
+            decision.reason = f"probe: {overload}"
+        else:
+            return self._build(
+                target, model_defaults, prompt_tokens, f"demoted: {overload}", completion_tokens
+            )
+
+        remaining = ledger.remaining_usd() if ledger is not None else None
+        if remaining is not None and decision.estimated_cost_usd > remaining:
+            return self._build(
+                target,
+                model_defaults,
+                prompt_tokens,
+                f"demoted: budget {remaining:.4f} USD < {decision.estimated_cost_usd:.4f} USD",
+                completion_tokens,
+            )
+
+        return decision
+
+
+_ROUTER: Optional[ModelRouter] = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """
+    Sdílený router (statistiky musí přežít napříč LLMClient instancemi).
+    """
+    global _ROUTER
+    if _ROUTER is None:
+        with _ROUTER_LOCK:
+            if _ROUTER is None:
+                _ROUTER = ModelRouter(load_yaml("llm/config.yaml"))
+    return _ROUTER
+
+
+__all__ = ["ModelRouter", "ModelStats", "RouteDecision", "StatsSummary", "get_router"]
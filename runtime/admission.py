@@ -0,0 +1,203 @@
+# runtime/admission.py
+"""
+Admission control pro run_pipeline.
+
+Při přetížení nemá smysl, aby všechny requesty zkoušely plnou LLM cestu
+a zpomalily se společně. Controller sleduje počet rozpracovaných requestů
+a čekání ve frontě a podle prahů z product/<id>/pipeline.yaml (sekce
+`admission`) request řízeně degraduje:
+
+    none          → plná pipeline
+    skeleton      → bez LLM (core_legal ve skeleton režimu)
+    no_judikatura → navíc bez vyhledávání judikatury
+    short         → rychlý režim (mode="short")
+
+Úroveň degradace se zapisuje do metadata["degradation"], aby shrnutí
+(truth layer) neslibovalo víc, než se skutečně spočítalo.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from runtime.config_loader import current_product_id, load_yaml
+
+# pořadí = rostoucí závažnost
+DEGRADATION_LEVELS: Tuple[str, ...] = ("none", "skeleton", "no_judikatura", "short")
+
+
+def degradation_rank(level: str) -> int:
+    return DEGRADATION_LEVELS.index(level)
+
+
+@dataclass(frozen=True)
+class DegradeThreshold:
+    # od kolika souběžných requestů (včetně tohoto) / ms čekání ve frontě
+    in_flight: Optional[int] = None
+    queue_wait_ms: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    enabled: bool = True
+    max_concurrent: int = 8
+    queue_timeout_s: float = 2.0
+    degrade: Dict[str, DegradeThreshold] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "AdmissionConfig":
+        raw = raw or {}
+        degrade: Dict[str, DegradeThreshold] = {}
+        for level, cfg in (raw.get("degrade") or {}).items():
+            if level not in DEGRADATION_LEVELS or level == "none":
+                raise ValueError(f"Neznámá úroveň degradace: {level}")
+            cfg = cfg or {}
+            degrade[level] = DegradeThreshold(
+                in_flight=int(cfg["in_flight"]) if cfg.get("in_flight") else None,
+                queue_wait_ms=float(cfg["queue_wait_ms"]) if cfg.get("queue_wait_ms") else None,
+            )
+        return cls(
+            enabled=bool(raw.get("enabled", True)),
+            max_concurrent=max(1, int(raw.get("max_concurrent", 8))),
+            queue_timeout_s=float(raw.get("queue_timeout_s", 2.0)),
+            degrade=degrade,
+        )
+
+
+def load_admission_config(product_id: Optional[str] = None) -> AdmissionConfig:
+    """
+    Sekce `admission` z product/<id>/pipeline.yaml. Env PIPELINE_ADMISSION=0
+    admission control vypne.
+    """
+    product_id = product_id or current_product_id()
+    try:
+        raw = (load_yaml(f"product/{product_id}/pipeline.yaml") or {}).get("admission")
+    except FileNotFoundError:
+        raw = None
+    config = AdmissionConfig.from_dict(raw)
+    if os.getenv("PIPELINE_ADMISSION", "").lower() in ("0", "false", "no"):
+        config = AdmissionConfig(enabled=False)
+    return config
+
+
+@dataclass
+class Admission:
+    level: str
+    reasons: List[str]
+    in_flight: int
+    queue_wait_ms: float
+
+    def at_least(self, level: str) -> bool:
+        return degradation_rank(self.level) >= degradation_rank(level)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "reasons": list(self.reasons),
+            "in_flight": self.in_flight,
+            "queue_wait_ms": round(self.queue_wait_ms, 3),
+        }
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        config: AdmissionConfig,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config = config
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+
+    def _decide(self, in_flight: int, wait_ms: float, timed_out: bool) -> Tuple[str, List[str]]:
+        if timed_out:
+            return "short", [f"queue timeout {self.config.queue_timeout_s:.1f} s"]
+
+        level = "none"
+        reasons: List[str] = []
+        for candidate in DEGRADATION_LEVELS[1:]:
+            threshold = self.config.degrade.get(candidate)
+            if threshold is None:
+                continue
+            hit: List[str] = []
+            if threshold.in_flight is not None and in_flight >= threshold.in_flight:
+                hit.append(f"in_flight {in_flight} >= {threshold.in_flight}")
+            if threshold.queue_wait_ms is not None and wait_ms >= threshold.queue_wait_ms:
+                hit.append(f"queue_wait {wait_ms:.0f} ms >= {threshold.queue_wait_ms:.0f} ms")
+            if hit:
+                level, reasons = candidate, hit
+        return level, reasons
+
+    @contextmanager
+    def admit(self) -> Iterator[Admission]:
+        """
+        Vpustí request (případně počká na volný slot) a určí úroveň
+        degradace. Request, který se do queue_timeout_s nedočká slotu,
+        poběží v short režimu mimo limit – je levný.
+        """
+        if not self.config.enabled:
+            yield Admission("none", [], 0, 0.0)
+            return
+
+        started = self._clock()
+        deadline = started + self.config.queue_timeout_s
+        timed_out = False
+
+        with self._cond:
+            in_flight = self._active + self._waiting + 1
+            self._waiting += 1
+            try:
+                while self._active >= self.config.max_concurrent:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            if not timed_out:
+                self._active += 1
+
+        wait_ms = (self._clock() - started) * 1000.0
+        level, reasons = self._decide(in_flight, wait_ms, timed_out)
+        try:
+            yield Admission(level, reasons, in_flight, wait_ms)
+        finally:
+            if not timed_out:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"active": self._active, "waiting": self._waiting}
+
+
+_CONTROLLER: Optional[AdmissionController] = None
+_CONTROLLER_LOCK = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _CONTROLLER
+    if _CONTROLLER is None:
+        with _CONTROLLER_LOCK:
+            if _CONTROLLER is None:
+                _CONTROLLER = AdmissionController(load_admission_config())
+    return _CONTROLLER
+
+
+__all__ = [
+    "Admission",
+    "AdmissionConfig",
+    "AdmissionController",
+    "DEGRADATION_LEVELS",
+    "get_admission_controller",
+    "load_admission_config",
+]
@@ -7,11 +7,10 @@ Cíl: mít jedno místo, kde se řeší cesty, chyby, defaulty.
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
 
-import yaml
-
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -21,8 +20,32 @@ def load_yaml(relative_path: str) -> Dict[str, Any]:
     Načte YAML relativně ke kořeni projektu (BASE_DIR).
     Např.: load_yaml("product/e_advokat_pro/product.yaml")
     """
+    # yaml importujeme až při prvním čtení configu – zrychluje start CLI
+    import yaml
+
     full_path = BASE_DIR / relative_path
     if not full_path.exists():
         raise FileNotFoundError(f"Config file not found: {full_path}")
     with open(full_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
+
+
+@lru_cache(maxsize=None)
+def load_yaml_cached(relative_path: str) -> Dict[str, Any]:
+    """
+    Jako load_yaml, ale soubor se načte jen jednou za běh procesu.
+    Pro configy enginů – místo načítání při importu modulu.
+    Vrácený dict je sdílený, needitovat.
+    """
+    return load_yaml(relative_path) or {}
+
+
+DEFAULT_PRODUCT_ID = "e_advokat_pro"
+
+
+def current_product_id() -> str:
+    """
+    Aktivní produkt (složka product/<id>/) – env PRAVNI_STRAZCE_PRODUCT,
+    jinak e_advokat_pro.
+    """
+    return os.getenv("PRAVNI_STRAZCE_PRODUCT", "").strip() or DEFAULT_PRODUCT_ID
@@ -6,7 +6,7 @@ Tady NENÍ právní logika, jen typy a struktury, se kterými pracuje orchestrá
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
@@ -66,7 +66,8 @@ class CaseContext:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
+        # mělká kopie – asdict by zbytečně deep-copíroval facts/metadata
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
         # Enum → value
         d["role"] = self.role.value
         d["domain"] = self.domain.value
@@ -0,0 +1,138 @@
+# runtime/engine_registry.py
+"""
+Registr enginů řízený feature flagy produktu.
+
+- product/<id>/feature_flags.yaml (sekce `features`) určuje, které enginy
+  jsou zapnuté; engine bez flagu je zapnutý vždy,
+- moduly enginů se importují líně až při prvním použití – vypnutý engine
+  se nenaimportuje nikdy (a s ním ani jeho závislosti typu llm.client),
+- produkt se vybírá přes env PRAVNI_STRAZCE_PRODUCT (default e_advokat_pro).
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+from engines.shared_types import EngineInput, EngineOutput
+from runtime.config_loader import current_product_id, load_yaml
+
+EngineRun = Callable[[EngineInput], EngineOutput]
+
+
+@dataclass(frozen=True)
+class EngineSpec:
+    key: str
+    module: str
+    # název flagu v feature_flags.yaml; None = engine nejde vypnout
+    flag: Optional[str] = None
+    attr: str = "run"
+
+
+ENGINE_SPECS: Dict[str, EngineSpec] = {
+    spec.key: spec
+    for spec in (
+        EngineSpec("intent", "engines.intent.engine"),
+        EngineSpec("core_legal", "engines.core_legal.engine"),
+        EngineSpec("risk", "engines.risk.engine"),
+        EngineSpec("judikatura", "engines.judikatura.engine", flag="judikatura_engine"),
+        EngineSpec("legal_safety", "engines.safety.legal_safety_layer", flag="legal_safety_layer"),
+        EngineSpec("pii_guard", "engines.safety.pii_guard", flag="pii_guard"),
+        EngineSpec("modular_output", "engines.output.modular_output", flag="modular_output_system"),
+        EngineSpec("simulation", "engines.output.simulation", flag="procedural_outcome_simulator"),
+        EngineSpec("voice_of_court", "engines.output.voice_of_court", flag="voice_of_court_engine"),
+    )
+}
+
+
+def load_feature_flags(product_id: Optional[str] = None) -> Dict[str, bool]:
+    """
+    Načte `features` z product/<id>/feature_flags.yaml. Chybějící soubor
+    = žádné flagy (vše zapnuto).
+    """
+    product_id = product_id or current_product_id()
+    try:
+        raw = load_yaml(f"product/{product_id}/feature_flags.yaml") or {}
+    except FileNotFoundError:
+        return {}
+    features = raw.get("features") or {}
+    return {str(k): bool(v) for k, v in features.items()}
+
+
+class EngineRegistry:
+    def __init__(
+        self,
+        product_id: Optional[str] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        specs: Optional[Dict[str, EngineSpec]] = None,
+    ) -> None:
+        self.product_id = product_id or current_product_id()
+        self.flags = load_feature_flags(self.product_id) if flags is None else dict(flags)
+        self.specs = ENGINE_SPECS if specs is None else specs
+        self._modules: Dict[str, ModuleType] = {}
+        self._lock = threading.Lock()
+
+    def _spec(self, key: str) -> EngineSpec:
+        try:
+            return self.specs[key]
+        except KeyError:
+            raise KeyError(f"Neznámý engine: {key}") from None
+
+    def is_enabled(self, key: str) -> bool:
+        spec = self._spec(key)
+        if spec.flag is None:
+            return True
+        return self.flags.get(spec.flag, True)
+
+    def enabled(self) -> List[str]:
+        return [key for key in self.specs if self.is_enabled(key)]
+
+    def module(self, key: str) -> ModuleType:
+        """
+        Modul enginu (importuje se při prvním volání). Vypnutý engine
+        → RuntimeError, modul se neimportuje.
+        """
+        if not self.is_enabled(key):
+            raise RuntimeError(f"Engine {key} je pro produkt {self.product_id} vypnutý")
+        module = self._modules.get(key)
+        if module is None:
+            with self._lock:
+                module = self._modules.get(key)
+                if module is None:
+                    module = importlib.import_module(self._spec(key).module)
+                    self._modules[key] = module
+        return module
+
+    def get(self, key: str) -> Optional[EngineRun]:
+        """`run` funkce enginu, nebo None, když je engine vypnutý."""
+        if not self.is_enabled(key):
+            return None
+        return getattr(self.module(key), self._spec(key).attr)
+
+    def loaded(self) -> List[str]:
+        return list(self._modules)
+
+
+_REGISTRY: Optional[EngineRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_engine_registry() -> EngineRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = EngineRegistry()
+    return _REGISTRY
+
+
+__all__ = [
+    "ENGINE_SPECS",
+    "EngineRegistry",
+    "EngineSpec",
+    "get_engine_registry",
+    "load_feature_flags",
+]
@@ -1,14 +1,20 @@
 # orchestrator.py
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from datetime import datetime, timezone
 
 import os
+import time
 
 from engines.shared_types import EngineInput, EngineOutput
-from engines.core_legal.engine import run as core_legal_engine
-from engines.risk.engine import run as risk_engine
-from engines.judikatura.engine import run as judikatura_engine
-from engines.intent.engine import run as intent_engine
+from llm.ledger import RequestLedger, request_ledger
+from runtime.admission import get_admission_controller
+from runtime.engine_registry import get_engine_registry
+from runtime.pipeline import get_pipeline_executor
+from runtime.short_answer import SHORT_MODE_TARGET_MS, build_short_answer
+from runtime.result_cache import get_result_cache, result_cache_enabled
+from runtime.serialization import PipelineResult
 
 
 # =====================================================================
@@ -22,182 +28,465 @@ def run_pipeline(
     mode: str = "full",
     debug: bool = False,
     raw: bool = False,
-) -> Dict[str, Any]:
+    cost_budget_usd: Optional[float] = None,
+    use_cache: Optional[bool] = None,
+    sections: Optional[Sequence[str]] = None,
+    session_id: Optional[str] = None,
+    session_reset: bool = False,
+) -> PipelineResult:
     """
     Hlavní orchestrátor celého systému.
-    ...
+
+    mode="short" je rychlý režim (cíl SHORT_MODE_TARGET_MS): běží jen
+    heuristický intent a risk engine, bez core_legal/judikatury a bez LLM,
+    odpověď je předpočítaná šablona pro daný intent (runtime/short_answer.py).
+
+    `cost_budget_usd` (nebo env PIPELINE_COST_BUDGET_USD) omezuje útratu
+    za LLM v rámci jednoho requestu – router modelů při jeho vyčerpání
+    demotuje na levnější model. Přehled volání je v metadata["llm_usage"].
+
+    Výsledky se cachují podle normalizovaného dotazu a otisku dat
+    (runtime/result_cache.py), citace dotazu ve výsledku se při zásahu
+    přepíšou na aktuální znění; `use_cache=False` nebo env
+    PIPELINE_RESULT_CACHE=0 cache obejde. Zásah je v metadata["cache"].
+
+    `sections=[...]` (klíče z SECTION_KEYS, např. ["risk", "legal_analysis"])
+    vyrenderuje jen vybrané sekce a spustí jen enginy, na kterých závisí.
+    Nespuštěné enginy jsou ve výsledku None.
+
+    `session_id` (vícekolový chat) předá intent engine: `user_query` je jen
+    nová zpráva a intent se určí z celé konverzace; `session_reset=True`
+    konverzaci začne znovu. Výsledek session závisí na předchozích kolech,
+    proto se necachuje (ani výsledek, ani uzel intent).
+
+    Vrací PipelineResult (dict) – pro HTTP/export použij res.to_json()
+    nebo res.to_bytes().
+
+    Při přetížení admission controller (runtime/admission.py) request
+    degraduje (bez LLM → bez judikatury → short); úroveň je
+    v metadata["degradation"] a degradované výsledky se necachují.
     """
+    use_llm_flag = False if mode == "short" else _resolve_use_llm(use_llm)
+    selected = _resolve_sections(sections) if mode != "short" else None
+    if use_cache is None:
+        use_cache = result_cache_enabled()
+
+    budget_usd = _resolve_cost_budget(cost_budget_usd)
+
+    # výsledek session závisí na předchozích zprávách – necachuje se
+    cache = get_result_cache() if use_cache and not session_id else None
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(
+            user_query,
+            mode=mode,
+            use_llm=use_llm_flag,
+            debug=debug,
+            raw=raw,
+            sections=selected,
+            cost_budget_usd=budget_usd,
+        )
+        cached = cache.get(cache_key, user_query=user_query)
+        if cached is not None:
+            cached["metadata"]["timestamp_utc"] = datetime.now(timezone.utc).isoformat()
+            # z cache se nic neutratilo – prázdný ledger
+            cached["metadata"]["llm_usage"] = RequestLedger(budget_usd=budget_usd).summary()
+            return PipelineResult(cached)
+
+    with get_admission_controller().admit() as admission:
+        run_mode = "short" if admission.at_least("short") else mode
+        with request_ledger(budget_usd) as ledger, _pin_intent_snapshot():
+            result = _run_pipeline(
+                user_query,
+                use_llm=use_llm_flag and not admission.at_least("skeleton"),
+                mode=run_mode,
+                debug=debug,
+                raw=raw,
+                sections=selected if run_mode != "short" else None,
+                degradation=admission.level,
+                session_id=session_id,
+                session_reset=session_reset,
+            )
+    result = PipelineResult(result)
+
+    degraded = admission.level != "none" and mode != "short"
+    result["metadata"]["degradation"] = {
+        **admission.summary(),
+        "requested_mode": mode,
+        "requested_use_llm": use_llm_flag,
+    }
+
+    if cache is not None and cache_key is not None:
+        result["metadata"]["cache"] = {"hit": False, "key": cache_key[:16]}
+        # výsledek s chybou LLM necachujeme – příště to může projít
+        # (bez LLM nese core_legal llm_error vždy, to chyba není);
+        # degradovaný výsledek taky ne – pod klíčem plného requestu nepatří
+        llm_failed = use_llm_flag and result["metadata"].get("has_llm_error")
+        if not llm_failed and not degraded:
+            cache.put(cache_key, result, user_query=user_query)
+
+    result["metadata"]["llm_usage"] = ledger.summary()
+    return result
+
+
+def _pin_intent_snapshot() -> ContextManager[Any]:
+    """
+    Jeden snapshot intent dat na celý request – enginy (i ve vláknech
+    executoru, copy_context) čtou stejnou verzi dat.
+    """
+    registry = get_engine_registry()
+    if not registry.is_enabled("intent"):
+        return nullcontext()
+    return registry.module("intent").request_snapshot()
+
 
-    # 1) Rozhodnutí, zda použít LLM
+def _resolve_use_llm(use_llm: Optional[bool]) -> bool:
     if use_llm is None:
-        env_flag = os.getenv("PIPELINE_USE_LLM", "").lower() in ("1", "true", "yes")
-        use_llm_flag = env_flag
-    else:
-        use_llm_flag = bool(use_llm)
+        return os.getenv("PIPELINE_USE_LLM", "").lower() in ("1", "true", "yes")
+    return bool(use_llm)
 
-    case_ctx = {"user_query": user_query}
 
-    # 1a) INTENT & DOMAIN ENGINE
-    intent_out: EngineOutput = intent_engine(
-        EngineInput(
-            context={
-                "case": case_ctx,
-            }
-        )
-    )
-    intent_payload = intent_out.payload
+def _resolve_cost_budget(cost_budget_usd: Optional[float]) -> Optional[float]:
+    if cost_budget_usd is not None:
+        return float(cost_budget_usd)
+    env_budget = os.getenv("PIPELINE_COST_BUDGET_USD", "").strip()
+    if not env_budget:
+        return None
+    try:
+        return float(env_budget)
+    except ValueError:
+        return None
 
-    # 2) CORE LEGAL ENGINE
-    core_out: EngineOutput = core_legal_engine(
-        EngineInput(
-            context={
-                "case": case_ctx,
-                "use_llm": use_llm_flag,
-            }
+
+def _run_pipeline(
+    user_query: str,
+    *,
+    use_llm: bool,
+    mode: str,
+    debug: bool,
+    raw: bool,
+    sections: Optional[Tuple[str, ...]] = None,
+    degradation: str = "none",
+    session_id: Optional[str] = None,
+    session_reset: bool = False,
+) -> Dict[str, Any]:
+
+    if mode == "short":
+        return _run_short_pipeline(
+            user_query,
+            debug=debug,
+            raw=raw,
+            session_id=session_id,
+            session_reset=session_reset,
         )
+
+    use_llm_flag = use_llm
+    executor = get_pipeline_executor()
+    needed = required_engines(sections)
+    skip_judikatura = degradation == "no_judikatura" and "judikatura" in needed
+    if skip_judikatura:
+        needed = executor.spec.closure(needed - {"judikatura"})
+
+    case_ctx = {"user_query": user_query}
+
+    # 1–4) enginy podle grafu z product/<id>/pipeline.yaml
+    run = executor.run(
+        {
+            "case": case_ctx,
+            "use_llm": use_llm_flag,
+            # degradace "skeleton" musí vypnout i LLM fallback intentu
+            "heuristic_only": not use_llm_flag,
+            "user_query": user_query,
+            "mode": mode,
+            "session_id": session_id,
+            "session_reset": session_reset,
+        },
+        targets=needed,
     )
-    core_payload = core_out.payload
 
-    # doplníme intent/domain do meta core enginu
+    intent_out = run.output("intent")
+    core_out = run.output("core_legal")
+    risk_out = run.output("risk")
+    jud_out = run.output("judikatura")
+
+    intent_payload = intent_out.payload if intent_out else {}
+    core_payload = core_out.payload if core_out else {}
+    risk_payload = risk_out.payload if risk_out else {}
+    jud_payload = jud_out.payload if jud_out else {}
+    if skip_judikatura:
+        jud_payload = {"status": "SKIPPED"}
+
+    if core_out is not None and intent_out is not None:
+        # doplníme intent/domain do meta core enginu
+        core_meta = core_payload.get("meta") or {}
+        core_payload["meta"] = core_meta  # jistota, že meta existuje
+
+        # nepřepisujeme, pokud už by náhodou bylo nastavené
+        if intent_payload.get("domain") and not core_meta.get("domain"):
+            core_meta["domain"] = intent_payload["domain"]
+
+        core_meta["intent"] = intent_payload.get("intent")
+        core_meta["intent_confidence"] = intent_payload.get("confidence")
     core_meta = core_payload.get("meta") or {}
-    core_payload["meta"] = core_meta  # jistota, že meta existuje
 
-    # nepřepisujeme, pokud už by náhodou bylo nastavené
-    if intent_payload.get("domain") and not core_meta.get("domain"):
-        core_meta["domain"] = intent_payload["domain"]
 
-    core_meta["intent"] = intent_payload.get("intent")
-    core_meta["intent_confidence"] = intent_payload.get("confidence")
+    # 5) Sestavení finální odpovědi
+    final_text = _build_final_answer(
+        user_query,
+        core_payload,
+        risk_payload,
+        jud_payload,
+        intent_payload,
+        sections=sections,
+        degradation=degradation,
+    )
+
+    # 6) Metadata + debug
+    metadata: Dict[str, Any] = {
+        "version": "orchestrator_v2",
+        "mode": mode,
+        "use_llm": use_llm_flag,
+        "debug": debug,
+        "raw": raw,
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "has_llm_error": bool(core_payload.get("llm_error")),
+        "intent": intent_payload.get("intent"),
+        "domain": intent_payload.get("domain"),
+        "intent_confidence": intent_payload.get("confidence"),
+        "prompt_versions": core_meta.get("prompt_versions", {}),
+    }
+
+    if core_out is not None:
+        # registr promptů (a s ním llm.client) jen když běžel core_legal
+        from llm.prompt_registry import get_prompt_registry
+
+        metadata["prompt_bundle_version"] = get_prompt_registry().bundle_version()
+
+    metadata["pipeline"] = run.summary()
+    disabled = sorted(n for n, r in run.nodes.items() if r.status == "disabled")
+    if disabled:
+        metadata["disabled_engines"] = disabled
+
+    if sections is not None:
+        metadata["sections"] = list(sections)
+        metadata["skipped_engines"] = [e for e in executor.spec.nodes if e not in needed]
+
+    if debug:
+        outputs = {
+            "core_legal": core_out,
+            "risk": risk_out,
+            "judikatura": jud_out,
+            "intent": intent_out,
+        }
+        metadata["engine_notes"] = {
+            name: out.notes for name, out in outputs.items() if out is not None
+        }
 
-    # 3) RISK ENGINE
-    risk_out: EngineOutput = risk_engine(
+    result: Dict[str, Any] = {
+        "final_answer": final_text,
+        "core_legal": core_out,
+        "risk": risk_out,
+        "judikatura": jud_out,
+        "intent": intent_out,
+        "metadata": metadata,
+    }
+
+    return result
+
+
+
+def _run_short_pipeline(
+    user_query: str,
+    *,
+    debug: bool,
+    raw: bool,
+    session_id: Optional[str] = None,
+    session_reset: bool = False,
+) -> Dict[str, Any]:
+    """
+    Rychlá cesta pro mode="short" – jen heuristiky, žádné LLM ani judikatura.
+    """
+    started = time.perf_counter()
+    case_ctx = {"user_query": user_query}
+    registry = get_engine_registry()
+
+    intent_out: EngineOutput = registry.get("intent")(
         EngineInput(
             context={
                 "case": case_ctx,
-                "core": core_payload,
-                "use_llm": False,  # risk engine zatím čistě heuristický
+                "heuristic_only": True,
+                "session_id": session_id,
+                "session_reset": session_reset,
             }
         )
     )
-    risk_payload = risk_out.payload
+    intent_payload = intent_out.payload
 
-    # 4) JUDIKATURA ENGINE
-    jud_out: EngineOutput = judikatura_engine(
+    risk_out: EngineOutput = registry.get("risk")(
         EngineInput(
             context={
                 "case": case_ctx,
-                "use_llm": use_llm_flag,
+                "intent_engine": intent_payload,
+                "use_llm": False,
             }
         )
     )
-    jud_payload = jud_out.payload
+    risk_payload = risk_out.payload
 
+    snapshot = registry.module("intent").get_intent_snapshot()
+    final_text = build_short_answer(
+        intent_payload.get("intent"),
+        risk_payload.get("risk_level"),
+        snapshot.catalog.iter_definitions(),
+        version=snapshot.version,
+    )
 
-    # 5) Sestavení finální odpovědi
-    if mode == "short":
-        final_text = _build_final_answer(
-            user_query,
-            core_payload,
-            risk_payload,
-            jud_payload,
-            intent_payload,
-        )
-    else:
-        final_text = _build_final_answer(
-            user_query,
-            core_payload,
-            risk_payload,
-            jud_payload,
-            intent_payload,
-        )
+    latency_ms = (time.perf_counter() - started) * 1000.0
 
-    # 6) Metadata + debug
     metadata: Dict[str, Any] = {
         "version": "orchestrator_v2",
-        "mode": mode,
-        "use_llm": use_llm_flag,
+        "mode": "short",
+        "use_llm": False,
         "debug": debug,
         "raw": raw,
         "timestamp_utc": datetime.now(timezone.utc).isoformat(),
-        "has_llm_error": bool(core_payload.get("llm_error")),
+        "has_llm_error": False,
         "intent": intent_payload.get("intent"),
         "domain": intent_payload.get("domain"),
         "intent_confidence": intent_payload.get("confidence"),
+        "risk_level": risk_payload.get("risk_level"),
+        "skipped_engines": ["core_legal", "judikatura"],
+        "latency_ms": round(latency_ms, 3),
+        "latency_target_ms": SHORT_MODE_TARGET_MS,
+        "within_latency_target": latency_ms <= SHORT_MODE_TARGET_MS,
     }
 
     if debug:
         metadata["engine_notes"] = {
-            "core_legal": core_out.notes,
             "risk": risk_out.notes,
-            "judikatura": jud_out.notes,
             "intent": intent_out.notes,
         }
 
-    result: Dict[str, Any] = {
+    return {
         "final_answer": final_text,
-        "core_legal": core_out,
+        "core_legal": None,
         "risk": risk_out,
-        "judikatura": jud_out,
+        "judikatura": None,
         "intent": intent_out,
         "metadata": metadata,
     }
 
-    return result
-
-
 
 # =====================================================================
 #  Sekce builderů textu
 # =====================================================================
 
+# Sekce odkazují na uzly pipeline (product/<id>/pipeline.yaml);
+# závislosti mezi uzly (např. risk → intent) řeší graf pipeline.
+
+@dataclass(frozen=True)
+class _SectionInput:
+    user_query: str
+    core: Dict[str, Any]
+    risk: Dict[str, Any]
+    jud: Dict[str, Any]
+    intent: Dict[str, Any]
+    degradation: str = "none"
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    key: str
+    title: str
+    engines: Tuple[str, ...]
+    build: Callable[[_SectionInput], str]
+
+
+# Registr sekcí finální odpovědi – pořadí = pořadí v odpovědi.
+SECTIONS: Tuple[SectionSpec, ...] = (
+    # Shrnutí – musí obsahovat přesně tenhle řádek kvůli testu
+    SectionSpec(
+        "summary", "# 🧩 Shrnutí", ("intent", "core_legal", "risk", "judikatura"),
+        lambda s: _build_summary_section(s.core, s.risk, s.jud, s.degradation),
+    ),
+    SectionSpec(
+        "legal_analysis", "## 📑 Právní analýza", ("core_legal",),
+        lambda s: _build_irac_section(s.core),
+    ),
+    SectionSpec(
+        "judikatura", "## ⚖️ Judikatura", ("judikatura",),
+        lambda s: _build_judikatura_section(s.jud),
+    ),
+    SectionSpec(
+        "risk", "## ⚠️ Rizika a naléhavost", ("risk",),
+        lambda s: _build_risk_section(s.risk),
+    ),
+    SectionSpec(
+        "next_steps", "## 🧭 Doporučený další postup", ("intent", "risk"),
+        lambda s: _build_steps_section(s.risk, s.intent),
+    ),
+    SectionSpec(
+        "missing_facts", "## ❗ Co by bylo dobré doplnit", ("intent", "core_legal", "risk"),
+        lambda s: _build_missing_facts_section(s.core, s.risk, s.jud),
+    ),
+    SectionSpec(
+        "client_questions", "## ❓ Další možné otázky", (),
+        lambda s: _build_client_questions_section(s.core, s.risk, s.intent),
+    ),
+    SectionSpec(
+        "uncertainty", "## 🧩 Nejistoty a limity analýzy", ("intent", "core_legal", "risk"),
+        lambda s: _build_uncertainty_section(s.user_query, s.core, s.risk, s.intent),
+    ),
+)
+
+SECTION_KEYS: Tuple[str, ...] = tuple(spec.key for spec in SECTIONS)
+_SECTIONS_BY_KEY: Dict[str, SectionSpec] = {spec.key: spec for spec in SECTIONS}
+
+
+def _resolve_sections(sections: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Ověří názvy sekcí a seřadí je podle pořadí v odpovědi.
+    None = všechny sekce (plná odpověď).
+    """
+    if sections is None:
+        return None
+    requested = set(sections)
+    unknown = requested - set(SECTION_KEYS)
+    if unknown:
+        raise ValueError(
+            f"Neznámé sekce: {sorted(unknown)} (dostupné: {', '.join(SECTION_KEYS)})"
+        )
+    return tuple(key for key in SECTION_KEYS if key in requested)
+
+
+def required_engines(sections: Optional[Iterable[str]] = None) -> Set[str]:
+    """
+    Minimální množina uzlů pipeline pro vybrané sekce (včetně tranzitivních
+    závislostí z grafu). None = celý graf.
+    """
+    spec = get_pipeline_executor().spec
+    if sections is None:
+        return spec.closure(None)
+    return spec.closure(e for key in sections for e in _SECTIONS_BY_KEY[key].engines)
+
+
 def _build_final_answer(
     user_query: str,
     core: Dict[str, Any],
     risk: Dict[str, Any],
     jud: Dict[str, Any],
     intent_payload: Dict[str, Any],
+    sections: Optional[Iterable[str]] = None,
+    degradation: str = "none",
 ) -> str:
-    parts: List[str] = []
-
-    # 1) Shrnutí – musí obsahovat přesně tenhle řádek kvůli testu
-    parts.append("# 🧩 Shrnutí")
-    parts.append(_build_summary_section(core, risk, jud))
-
-    # 2) Právní analýza
-    parts.append("\n## 📑 Právní analýza")
-    parts.append(_build_irac_section(core))
-
-    # 3) Judikatura
-    parts.append("\n## ⚖️ Judikatura")
-    parts.append(_build_judikatura_section(jud))
-
-    # 4) Rizika
-    parts.append("\n## ⚠️ Rizika a naléhavost")
-    parts.append(_build_risk_section(risk))
-
-    # 5) Doporučený postup  🔧 TADY OPRAVA
-    parts.append("\n## 🧭 Doporučený další postup")
-    parts.append(_build_steps_section(risk, intent_payload))  # <-- přidán intent_payload
-
-    # 6) Co doplnit
-    parts.append("\n## ❗ Co by bylo dobré doplnit")
-    parts.append(_build_missing_facts_section(core, risk, jud))
+    data = _SectionInput(user_query, core, risk, jud, intent_payload, degradation)
+    selected = SECTIONS if sections is None else [_SECTIONS_BY_KEY[k] for k in sections]
 
-    # 7) Další otázky pro klienta
-    parts.append("\n## ❓ Další možné otázky")
-    parts.append(_build_client_questions_section(core, risk, intent_payload))
-
-    # 8) Nejistoty a limity analýzy
-    parts.append("\n## 🧩 Nejistoty a limity analýzy")
-
-    parts.append(
-        _build_uncertainty_section(
-            user_query,
-            core,
-            risk,
-            intent_payload
-        )
-    )
+    parts: List[str] = []
+    for spec in selected:
+        # první sekce bez prázdného řádku nad nadpisem
+        parts.append(spec.title if not parts else "\n" + spec.title)
+        parts.append(spec.build(data))
 
     return "\n".join(parts)
 
@@ -417,7 +706,12 @@ def _build_irac_section(core: Dict[str, Any]) -> str:
 #  Shrnutí
 # ---------------------------------------------------------------------
 
-def _build_summary_section(core: Dict[str, Any], risk: Dict[str, Any], jud: Dict[str, Any]) -> str:
+def _build_summary_section(
+    core: Dict[str, Any],
+    risk: Dict[str, Any],
+    jud: Dict[str, Any],
+    degradation: str = "none",
+) -> str:
     """
     Shrnutí: orientační právní přehled + truth-layer info.
 
@@ -466,8 +760,22 @@ def _build_summary_section(core: Dict[str, Any], risk: Dict[str, Any], jud: Dict
             "která drží strukturu, ale nenahrazuje práci advokáta."
         )
 
+    # Degradace kvůli zátěži – přiznat, co se tentokrát nepočítalo
+    if degradation != "none":
+        lines.append(
+            "- Poznámka: kvůli vysokému vytížení služby byla odpověď **zjednodušena** "
+            "(bez LLM analýzy"
+            + (" a bez vyhledání judikatury" if jud_status == "SKIPPED" else "")
+            + "). Pro plnou analýzu dotaz zopakuj později."
+        )
+
     # Judikatura – přiznání zdrojů
-    if has_jud and jud_status == "OK":
+    if jud_status == "SKIPPED":
+        lines.append(
+            "- Judikatura: tentokrát se **nevyhledávala** (vysoké vytížení služby), "
+            "nejde tedy o zjištění, že by žádná neexistovala."
+        )
+    elif has_jud and jud_status == "OK":
         lines.append(
             "- Judikatura: byly nalezeny **relevantní judikáty**, které podporují rámcový závěr. "
             "Detailní čísla spisů jsou uvedena v sekci Judikatura."
@@ -509,6 +817,10 @@ def _build_judikatura_section(jud: Dict[str, Any]) -> str:
     parts: List[str] = []
     parts.append("## 📚 Judikatura")
 
+    if status == "SKIPPED":
+        parts.append("Judikatura se kvůli vysokému vytížení služby tentokrát nevyhledávala.")
+        return "\n".join(parts)
+
     if status == "NONE_FOUND" or not cases:
         parts.append("K dotazu se nepodařilo najít relevantní judikaturu.")
         return "\n".join(parts)
@@ -0,0 +1,558 @@
+# runtime/pipeline.py
+"""
+Deklarativní pipeline – graf enginů z product/<id>/pipeline.yaml
+a obecný executor, který ho spouští.
+
+- uzel = engine + mapování vstupů (odkud se plní EngineInput.context),
+- závislosti se odvodí ze vstupů (vstup = název jiného uzlu),
+- uzel se spustí, jakmile má hotové všechny závislosti; `parallel` uzly
+  běží v ThreadPoolExecutoru (s propagací contextvars – ledger LLM
+  volání zůstává jeden pro celý request),
+- `timeout_s` u parallel uzlu: po vypršení se uzel vynechá (výstup None);
+  měří se od skutečného startu uzlu ve vlákně, ne od zařazení do poolu –
+  čekání na volné vlákno (sdílené přes requesty) se do něj nepočítá,
+- `cache` drží výstup uzlu v LRU podle vstupů a otisku dat,
+- `llm: true` uzly (při use_llm) čekají na slot prioritního plánovače
+  (runtime/scheduler.py) nejdéle do svého timeoutu; `after` přidá závislost
+  jen na pořadí – typicky na risk, aby byla priorita známá,
+- `llm: true` uzly běží v poolu `max_workers`, ostatní (levné heuristiky)
+  ve vlastním poolu `heuristic_workers` – nikdy nečekají za cizími LLM
+  stadii,
+- chyba enginu request neshodí – uzel skončí se statusem "error".
+
+Ladění výkonu (cache, paralelismus, timeouty) je tak změna configu.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from engines.shared_types import EngineInput, EngineOutput
+from llm.deadline import Deadline, node_deadline
+from runtime.config_loader import current_product_id, load_yaml
+from runtime.engine_registry import EngineRegistry, get_engine_registry
+from runtime.scheduler import LLMScheduler, SlotTimeout, get_llm_scheduler
+
+# hodnoty requestu, které lze použít jako zdroj vstupu uzlu
+# (heuristic_only = not use_llm – pro enginy s volitelným LLM doplňkem;
+# session_id / session_reset – vícekolový chat intent enginu)
+REQUEST_SOURCES = (
+    "case",
+    "use_llm",
+    "heuristic_only",
+    "user_query",
+    "mode",
+    "session_id",
+    "session_reset",
+)
+
+DEFAULT_NODE_CACHE_SIZE = 128
+
+# jak často se kontrolují uzly, které ještě čekají na vlákno (jejich
+# deadline začne běžet až startem)
+QUEUED_POLL_S = 0.05
+
+# Výchozí graf – použije se, když produkt nemá vlastní pipeline.yaml
+_DEFAULT_PIPELINE: Dict[str, Any] = {
+    "version": 1,
+    "max_workers": 4,
+    "heuristic_workers": 4,
+    "nodes": {
+        "intent": {
+            "engine": "intent",
+            "inputs": {
+                "case": "case",
+                "use_llm": "use_llm",
+                "heuristic_only": "heuristic_only",
+                "session_id": "session_id",
+                "session_reset": "session_reset",
+            },
+            "parallel": True,
+        },
+        "core_legal": {
+            "engine": "core_legal",
+            "inputs": {"case": "case", "use_llm": "use_llm"},
+            "parallel": True,
+        },
+        "risk": {
+            "engine": "risk",
+            "inputs": {"case": "case", "intent_engine": "intent", "use_llm": False},
+            "parallel": True,
+        },
+        "judikatura": {
+            "engine": "judikatura",
+            "inputs": {"case": "case", "use_llm": "use_llm"},
+            "parallel": True,
+        },
+    },
+}
+
+
+@dataclass(frozen=True)
+class NodeSpec:
+    name: str
+    engine: str
+    inputs: Mapping[str, Any]
+    cache: bool = False
+    cache_size: int = DEFAULT_NODE_CACHE_SIZE
+    # vstupy, jejichž pravdivá hodnota cache uzlu obejde (stavové requesty)
+    cache_bypass: Tuple[str, ...] = ()
+    timeout_s: Optional[float] = None
+    parallel: bool = False
+    llm: bool = False
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class PipelineSpec:
+    nodes: "OrderedDict[str, NodeSpec]"
+    max_workers: int = 4
+    heuristic_workers: int = 4
+    version: int = 1
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "PipelineSpec":
+        raw_nodes = raw.get("nodes") or {}
+        if not raw_nodes:
+            raise ValueError("Pipeline nemá žádné uzly")
+        names = set(raw_nodes)
+
+        nodes: "OrderedDict[str, NodeSpec]" = OrderedDict()
+        for name, cfg in raw_nodes.items():
+            cfg = cfg or {}
+            inputs = dict(cfg.get("inputs") or {})
+            deps: List[str] = []
+            for key, source in inputs.items():
+                if not isinstance(source, str):
+                    continue  # konstanta
+                if source in names:
+                    deps.append(source)
+                elif source not in REQUEST_SOURCES:
+                    raise ValueError(
+                        f"Uzel {name}: neznámý zdroj vstupu {key}={source!r}"
+                    )
+            for dep in cfg.get("after") or []:
+                if dep not in names:
+                    raise ValueError(f"Uzel {name}: neznámý uzel v after: {dep!r}")
+                if dep not in deps:
+                    deps.append(dep)
+            bypass = tuple(cfg.get("cache_bypass") or ())
+            for key in bypass:
+                if key not in inputs:
+                    raise ValueError(f"Uzel {name}: cache_bypass {key!r} není mezi inputs")
+            timeout = cfg.get("timeout_s")
+            nodes[name] = NodeSpec(
+                name=name,
+                engine=str(cfg.get("engine", name)),
+                inputs=inputs,
+                cache=bool(cfg.get("cache", False)),
+                cache_size=int(cfg.get("cache_size", DEFAULT_NODE_CACHE_SIZE)),
+                cache_bypass=bypass,
+                timeout_s=float(timeout) if timeout else None,
+                parallel=bool(cfg.get("parallel", False)),
+                llm=bool(cfg.get("llm", False)),
+                depends_on=tuple(deps),
+            )
+
+        spec = cls(
+            nodes=nodes,
+            max_workers=max(1, int(raw.get("max_workers", 4))),
+            heuristic_workers=max(
+                1, int(raw.get("heuristic_workers", raw.get("max_workers", 4)))
+            ),
+            version=int(raw.get("version", 1)),
+        )
+        spec.topological_order()  # validace cyklů
+        return spec
+
+    def closure(self, targets: Optional[Iterable[str]] = None) -> Set[str]:
+        """Cílové uzly včetně tranzitivních závislostí. None = celý graf."""
+        if targets is None:
+            return set(self.nodes)
+        needed: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            if name not in self.nodes:
+                raise KeyError(f"Uzel {name} v pipeline neexistuje")
+            needed.add(name)
+            stack.extend(self.nodes[name].depends_on)
+        return needed
+
+    def topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Cyklus v pipeline u uzlu {name}")
+            state[name] = 1
+            for dep in self.nodes[name].depends_on:
+                visit(dep)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+
+def load_pipeline_spec(product_id: Optional[str] = None) -> PipelineSpec:
+    """
+    Načte product/<id>/pipeline.yaml; bez souboru vrátí výchozí graf.
+    """
+    product_id = product_id or current_product_id()
+    try:
+        raw = load_yaml(f"product/{product_id}/pipeline.yaml") or {}
+    except FileNotFoundError:
+        raw = _DEFAULT_PIPELINE
+    return PipelineSpec.from_dict(raw)
+
+
+@dataclass
+class NodeRun:
+    output: Optional[EngineOutput]
+    status: str  # ok | cached | timeout | error | disabled
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+    # jen u uzlů za LLM plánovačem
+    priority: Optional[float] = None
+    queue_ms: Optional[float] = None
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"status": self.status, "ms": round(self.elapsed_ms, 3)}
+        if self.error:
+            out["error"] = self.error
+        if self.priority is not None:
+            out["priority"] = self.priority
+            out["queue_ms"] = round(self.queue_ms or 0.0, 3)
+        return out
+
+
+@dataclass
+class PipelineRun:
+    nodes: Dict[str, NodeRun] = field(default_factory=dict)
+
+    def output(self, name: str) -> Optional[EngineOutput]:
+        run = self.nodes.get(name)
+        return run.output if run is not None else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {name: run.summary() for name, run in self.nodes.items()}
+
+
+class _Inflight:
+    """
+    Uzel odeslaný do poolu; `started` nastaví až vlákno, které ho spustí.
+    Ve vlákně platí deadline uzlu (llm/deadline.py) – po timeoutu ho
+    executor zruší a LLM volání uzlu už neodcházejí.
+    """
+
+    def __init__(self, name: str, timeout_s: Optional[float], llm: bool = False) -> None:
+        self.name = name
+        self.timeout_s = timeout_s
+        self.llm = llm
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self.signal: Optional[Deadline] = None
+
+    def cancel(self) -> None:
+        if self.signal is not None:
+            self.signal.cancel()
+
+    @property
+    def deadline(self) -> Optional[float]:
+        if self.timeout_s is None or self.started is None:
+            return None
+        return self.started + self.timeout_s
+
+    def run(self, fn: Any, *args: Any) -> NodeRun:
+        self.started = time.monotonic()
+        if self.timeout_s is not None:
+            self.signal = Deadline(self.started + self.timeout_s)
+        with node_deadline(self.signal):
+            return fn(*args)
+
+
+class _NodeCache:
+    """LRU cache výstupů jednoho uzlu (ukládá i vydává kopie)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, EngineOutput]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[EngineOutput]:
+        with self._lock:
+            out = self._entries.get(key)
+            if out is None:
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(out)
+
+    def put(self, key: str, out: EngineOutput) -> None:
+        out = copy.deepcopy(out)
+        with self._lock:
+            self._entries[key] = out
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _data_version() -> str:
+    from runtime.result_cache import get_result_cache
+
+    return get_result_cache().fingerprint.value()
+
+
+def _cacheable(out: EngineOutput) -> bool:
+    """Výstup s hlasem LLM (intent s use_llm) není deterministický – necachuje se."""
+    payload = out.payload if isinstance(out.payload, Mapping) else {}
+    return payload.get("llm_vote") is None
+
+
+class PipelineExecutor:
+    def __init__(
+        self,
+        spec: PipelineSpec,
+        registry: Optional[EngineRegistry] = None,
+        scheduler: Optional[LLMScheduler] = None,
+    ) -> None:
+        self.spec = spec
+        self._registry = registry
+        self._scheduler = scheduler
+        self._order = spec.topological_order()
+        self._caches: Dict[str, _NodeCache] = {
+            name: _NodeCache(node.cache_size) for name, node in spec.nodes.items() if node.cache
+        }
+        # llm uzel? → pool
+        self._pools: Dict[bool, ThreadPoolExecutor] = {}
+        self._pool_lock = threading.Lock()
+        # vlákna uzlů po timeoutu, která ještě běží (drží worker poolu)
+        self._abandoned: Dict[bool, int] = {True: 0, False: 0}
+
+    @property
+    def registry(self) -> EngineRegistry:
+        return self._registry or get_engine_registry()
+
+    @property
+    def scheduler(self) -> LLMScheduler:
+        return self._scheduler or get_llm_scheduler()
+
+    def _get_pool(self, llm: bool) -> ThreadPoolExecutor:
+        pool = self._pools.get(llm)
+        if pool is None:
+            with self._pool_lock:
+                pool = self._pools.get(llm)
+                if pool is None:
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.spec.max_workers if llm else self.spec.heuristic_workers,
+                        thread_name_prefix="pipeline-llm" if llm else "pipeline",
+                    )
+                    self._pools[llm] = pool
+        return pool
+
+    def _abandon(self, future: Future, inflight: _Inflight) -> None:
+        """Zahodí uzel po timeoutu; běžící vlákno se počítá, dokud nedoběhne."""
+        inflight.cancel()
+        if future.cancel():
+            return
+        with self._pool_lock:
+            self._abandoned[inflight.llm] += 1
+
+        def _release(_: Future) -> None:
+            with self._pool_lock:
+                self._abandoned[inflight.llm] -= 1
+
+        future.add_done_callback(_release)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Velikost poolů a počet zahozených, ale stále běžících uzlů."""
+        with self._pool_lock:
+            return {
+                "llm": {"workers": self.spec.max_workers, "abandoned": self._abandoned[True]},
+                "heuristic": {
+                    "workers": self.spec.heuristic_workers,
+                    "abandoned": self._abandoned[False],
+                },
+            }
+
+    # --- vstupy a cache ---
+
+    def _build_context(
+        self,
+        node: NodeSpec,
+        request: Mapping[str, Any],
+        done: Mapping[str, NodeRun],
+    ) -> Dict[str, Any]:
+        ctx: Dict[str, Any] = {}
+        for key, source in node.inputs.items():
+            if not isinstance(source, str):
+                ctx[key] = source
+            elif source in self.spec.nodes:
+                out = done[source].output
+                ctx[key] = out.payload if out is not None else {}
+            else:
+                ctx[key] = request.get(source)
+        return ctx
+
+    def _cache_key(self, node: NodeSpec, ctx: Mapping[str, Any]) -> str:
+        raw = json.dumps(ctx, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(f"{node.name}|{_data_version()}|{raw}".encode("utf-8"))
+        return digest.hexdigest()
+
+    # --- běh uzlu ---
+
+    def _execute(self, node: NodeSpec, ctx: Dict[str, Any]) -> NodeRun:
+        started = time.perf_counter()
+        cache = self._caches.get(node.name)
+        if cache is not None and any(ctx.get(k) for k in node.cache_bypass):
+            cache = None
+        key = self._cache_key(node, ctx) if cache is not None else None
+
+        if cache is not None and key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return NodeRun(cached, "cached", (time.perf_counter() - started) * 1000.0)
+
+        try:
+            out = self.registry.get(node.engine)(EngineInput(context=ctx))
+        except Exception as e:
+            # chyba enginu nesmí shodit celý request
+            return NodeRun(
+                None, "error", (time.perf_counter() - started) * 1000.0, f"{type(e).__name__}: {e}"
+            )
+
+        if cache is not None and key is not None and _cacheable(out):
+            cache.put(key, out)
+        return NodeRun(out, "ok", (time.perf_counter() - started) * 1000.0)
+
+    def _execute_scheduled(self, node: NodeSpec, ctx: Dict[str, Any], priority: float) -> NodeRun:
+        started = time.perf_counter()
+        try:
+            with self.scheduler.slot(priority, timeout_s=node.timeout_s) as grant:
+                run = self._execute(node, ctx)
+        except SlotTimeout:
+            # nedočkal se slotu – z fronty vypadl, slot nezabere
+            elapsed = (time.perf_counter() - started) * 1000.0
+            return NodeRun(None, "timeout", elapsed, priority=priority, queue_ms=elapsed)
+        run.elapsed_ms = (time.perf_counter() - started) * 1000.0
+        run.priority = grant.priority
+        run.queue_ms = grant.queue_ms
+        return run
+
+    def run(
+        self,
+        request: Mapping[str, Any],
+        targets: Optional[Iterable[str]] = None,
+    ) -> PipelineRun:
+        """
+        Spustí uzly potřebné pro `targets` (None = celý graf).
+        `request` obsahuje hodnoty z REQUEST_SOURCES.
+        """
+        needed = self.spec.closure(targets)
+        result = PipelineRun()
+        done = result.nodes
+
+        pending = [n for n in self._order if n in needed]
+        running: Dict[Future, _Inflight] = {}
+
+        while pending or running:
+            progressed = False
+            for name in list(pending):
+                node = self.spec.nodes[name]
+                if not all(dep in done for dep in node.depends_on):
+                    continue
+                pending.remove(name)
+                progressed = True
+
+                if not self.registry.is_enabled(node.engine):
+                    done[name] = NodeRun(None, "disabled")
+                    continue
+
+                ctx = self._build_context(node, request, done)
+                call: Tuple[Any, ...] = (self._execute, node, ctx)
+                if node.llm and request.get("use_llm"):
+                    priority = self.scheduler.priority_for(
+                        r.output.payload for r in done.values() if r.output is not None
+                    )
+                    call = (self._execute_scheduled, node, ctx, priority)
+
+                if node.parallel:
+                    inflight = _Inflight(name, node.timeout_s, node.llm)
+                    # copy_context: ContextVary (ledger) platí i ve vlákně
+                    future = self._get_pool(node.llm).submit(
+                        copy_context().run, inflight.run, *call
+                    )
+                    running[future] = inflight
+                else:
+                    done[name] = call[0](*call[1:])
+
+            if not running:
+                if pending and not progressed:
+                    raise RuntimeError(f"Pipeline se zasekla na uzlech {pending}")
+                continue
+
+            now = time.monotonic()
+            waits = [i.deadline - now for i in running.values() if i.deadline is not None]
+            if any(i.started is None and i.timeout_s for i in running.values()):
+                # uzel ve frontě poolu – deadline začne až jeho startem
+                waits.append(QUEUED_POLL_S)
+            timeout = max(0.0, min(waits)) if waits else None
+            finished, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                done[running.pop(future).name] = future.result()
+
+            now = time.monotonic()
+            for future, inflight in list(running.items()):
+                deadline = inflight.deadline
+                if deadline is not None and now >= deadline:
+                    # vlákno doběhne samo (LLM volání už neodcházejí), výsledek se zahodí
+                    running.pop(future)
+                    self._abandon(future, inflight)
+                    done[inflight.name] = NodeRun(
+                        None, "timeout", (now - inflight.submitted) * 1000.0
+                    )
+
+        return result
+
+
+_EXECUTORS: Dict[str, PipelineExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def get_pipeline_executor(product_id: Optional[str] = None) -> PipelineExecutor:
+    product_id = product_id or current_product_id()
+    executor = _EXECUTORS.get(product_id)
+    if executor is None:
+        with _EXECUTORS_LOCK:
+            executor = _EXECUTORS.get(product_id)
+            if executor is None:
+                executor = PipelineExecutor(load_pipeline_spec(product_id))
+                _EXECUTORS[product_id] = executor
+    return executor
+
+
+__all__ = [
+    "NodeRun",
+    "NodeSpec",
+    "PipelineExecutor",
+    "PipelineRun",
+    "PipelineSpec",
+    "get_pipeline_executor",
+    "load_pipeline_spec",
+]
@@ -0,0 +1,419 @@
+# runtime/result_cache.py
+"""
+Cache výsledků celé pipeline (run_pipeline).
+
+Velká část provozu jsou opakované dotazy – stejný dotaz nemusí znovu projít
+všemi enginy.
+
+- klíč: normalizovaný dotaz (malá písmena, bez diakritiky, sjednocené
+  mezery) + mode + use_llm + rozpočet + debug/raw + sekce + otisk dat,
+- výsledek cituje dotaz (např. "Poslední uživatelský vstup byl: …"), proto
+  se u položky drží i původní znění a při zásahu jiným zněním se citace
+  ve výsledku přepíšou na dotaz aktuálního volání,
+- otisk dat (data fingerprint) = mtime/velikost intent JSONů, promptů,
+  policy, šablon a configů enginů; při změně se cache automaticky zahodí,
+- paměťová vrstva je LRU s omezeným počtem položek,
+- volitelná perzistentní vrstva (PIPELINE_RESULT_CACHE_DIR) ukládá výsledky
+  jako JSON (runtime/serialization.py), takže přežijí restart procesu;
+  soubor se jen parsuje, nic se z něj nespouští (žádný pickle). Soubory
+  leží v podsložce podle otisku dat – při změně otisku se staré podsložky
+  smažou; počet souborů je omezený (nejstarší se mažou).
+
+Env proměnné:
+- PIPELINE_RESULT_CACHE        0 = cache vypnutá (default zapnutá)
+- PIPELINE_RESULT_CACHE_SIZE   max. počet položek v paměti (default 256)
+- PIPELINE_RESULT_CACHE_DIR    složka perzistentní vrstvy (default žádná)
+- PIPELINE_RESULT_CACHE_DISK_SIZE  max. počet souborů na disku (default 4096)
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from engines.shared_types import EngineOutput
+from engines.text_normalize import normalize_text
+from runtime.config_loader import BASE_DIR
+from runtime.serialization import RESULT_SCHEMA_VERSION, PipelineResult, dumps
+
+# soubory, jejichž změna mění výsledek pipeline
+FINGERPRINT_GLOBS: Tuple[str, ...] = (
+    "data/intents/**/*.json",
+    "engines/*/config.yaml",
+    "engines/*/prompts/*.md",
+    "prompts/policy/*.md",
+    "templates/**/*.md",
+    "llm/config.yaml",
+    "product/*/*.yaml",
+)
+
+# jak často (s) znovu procházet soubory kvůli otisku
+FINGERPRINT_TTL_S = 2.0
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_DISK_ENTRIES = 4096
+# při překročení limitu se disk uklidí na tento podíl limitu
+DISK_PRUNE_RATIO = 0.9
+
+# klíče výsledku, které nesou EngineOutput (z JSONu se obnoví)
+ENGINE_KEYS: Tuple[str, ...] = ("core_legal", "risk", "judikatura", "intent")
+
+def normalize_query(query: str) -> str:
+    """lowercase, bez diakritiky, sjednocené mezery."""
+    return normalize_text(query or "")
+
+
+def requote(value: Any, old: str, new: str) -> Any:
+    """Kopie `value`, v jejíchž textech je citace `old` nahrazená `new`."""
+    if isinstance(value, str):
+        return value.replace(old, new)
+    if isinstance(value, dict):
+        return {k: requote(v, old, new) for k, v in value.items()}
+    if isinstance(value, list):
+        return [requote(v, old, new) for v in value]
+    if isinstance(value, tuple):
+        return tuple(requote(v, old, new) for v in value)
+    if isinstance(value, EngineOutput):
+        return replace(value, **{f.name: requote(getattr(value, f.name), old, new) for f in fields(value)})
+    return value
+
+
+def _iter_fingerprint_files(base_dir: Path, globs: Iterable[str]) -> Iterable[Path]:
+    for pattern in globs:
+        yield from sorted(base_dir.glob(pattern))
+
+
+class DataFingerprint:
+    """
+    Otisk vstupních dat pipeline. Přepočítává se nejvýš jednou za `ttl_s`,
+    aby se soubory nestatovaly při každém requestu.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path = BASE_DIR,
+        globs: Iterable[str] = FINGERPRINT_GLOBS,
+        ttl_s: float = FINGERPRINT_TTL_S,
+    ) -> None:
+        self.base_dir = Path(base_dir)
+        self.globs = tuple(globs)
+        self.ttl_s = ttl_s
+        self._value = ""
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _compute(self) -> str:
+        digest = hashlib.sha256()
+        for path in _iter_fingerprint_files(self.base_dir, self.globs):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            rel = path.relative_to(self.base_dir).as_posix()
+            digest.update(f"{rel}:{st.st_mtime_ns}:{st.st_size};".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def value(self, force: bool = False) -> str:
+        now = time.monotonic()
+        with self._lock:
+            if force or not self._value or now - self._checked_at >= self.ttl_s:
+                self._value = self._compute()
+                self._checked_at = now
+            return self._value
+
+
+class ResultCache:
+    """
+    LRU cache výsledků run_pipeline s volitelnou perzistentní vrstvou.
+
+    Výsledky se ukládají i vydávají jako hluboké kopie – volající si je
+    může libovolně upravovat, aniž by rozbil cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        persist_dir: Optional[Path] = None,
+        fingerprint: Optional[DataFingerprint] = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_disk_entries = max(1, int(max_disk_entries))
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.fingerprint = fingerprint or DataFingerprint()
+        # klíč → (uloženo v, původní dotaz, výsledek)
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        # počet souborů v podsložce aktuální verze (None = zatím nespočítáno)
+        self._disk_count: Optional[int] = None
+        self._data_version = ""
+        self.hits = 0
+        self.misses = 0
+
+    # --- klíče ---
+
+    def make_key(
+        self,
+        user_query: str,
+        *,
+        mode: str,
+        use_llm: bool,
+        debug: bool = False,
+        raw: bool = False,
+        sections: Optional[Iterable[str]] = None,
+        cost_budget_usd: Optional[float] = None,
+    ) -> str:
+        data_version = self._check_data_version()
+        raw_key = "|".join(
+            [
+                normalize_query(user_query),
+                mode,
+                f"llm={int(bool(use_llm))}",
+                f"budget={'' if cost_budget_usd is None else repr(float(cost_budget_usd))}",
+                f"debug={int(bool(debug))}",
+                f"raw={int(bool(raw))}",
+                "sections=" + ("*" if sections is None else ",".join(sections)),
+                data_version,
+            ]
+        )
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def _check_data_version(self) -> str:
+        """Při změně otisku dat zahodí paměťovou vrstvu i staré soubory."""
+        current = self.fingerprint.value()
+        with self._lock:
+            changed = current != self._data_version
+            if changed:
+                self._entries.clear()
+                self._data_version = current
+        if changed:
+            self._prune_stale_versions(current)
+        return current
+
+    # --- perzistentní vrstva ---
+
+    def _version_dir(self) -> Optional[Path]:
+        if self.persist_dir is None:
+            return None
+        return self.persist_dir / (self._data_version or self._check_data_version())
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        folder = self._version_dir()
+        return folder / f"{key}.json" if folder is not None else None
+
+    def _prune_stale_versions(self, current: str) -> None:
+        """Smaže podsložky jiných otisků dat (a soubory starého rozložení)."""
+        if self.persist_dir is None or not self.persist_dir.is_dir():
+            return
+        with self._disk_lock:
+            self._disk_count = None
+            for path in self.persist_dir.iterdir():
+                if path.name == current:
+                    continue
+                try:
+                    if path.is_dir():
+                        shutil.rmtree(path)
+                    elif path.suffix in (".json", ".tmp"):
+                        path.unlink()
+                except OSError as e:
+                    print(f"[result_cache] Failed to remove stale {path}: {e}")
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str, Dict[str, Any]]]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            result = raw["result"]
+            if result.pop("schema_version", None) != RESULT_SCHEMA_VERSION:
+                return None
+            for name in ENGINE_KEYS:
+                if isinstance(result.get(name), dict):
+                    result[name] = EngineOutput(**result[name])
+            return float(raw["stored_at"]), str(raw.get("query", "")), result
+        except Exception as e:
+            print(f"[result_cache] Ignoring unreadable cache file {path}: {e}")
+            return None
+
+    def _disk_put(self, key: str, entry: Tuple[float, str, Dict[str, Any]]) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stored_at, query, result = entry
+            data = dumps(
+                {"stored_at": stored_at, "query": query, "result": PipelineResult(result).to_dict()}
+            )
+            tmp = path.with_suffix(".tmp")
+            existed = path.exists()
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            if not existed:
+                self._count_disk_entry(path.parent)
+        except Exception as e:
+            # perzistence je jen optimalizace – chyba zápisu nesmí shodit request
+            print(f"[result_cache] Failed to persist {path}: {e}")
+
+    def _count_disk_entry(self, folder: Path) -> None:
+        """Po překročení max_disk_entries smaže nejstarší soubory."""
+        with self._disk_lock:
+            if self._disk_count is None:
+                self._disk_count = sum(1 for _ in folder.glob("*.json"))
+            else:
+                self._disk_count += 1
+            if self._disk_count <= self.max_disk_entries:
+                return
+            files: List[Tuple[float, Path]] = []
+            for path in folder.glob("*.json"):
+                try:
+                    files.append((path.stat().st_mtime, path))
+                except OSError:
+                    continue
+            files.sort()
+            keep = int(self.max_disk_entries * DISK_PRUNE_RATIO)
+            for _, path in files[: max(0, len(files) - keep)]:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._disk_count = sum(1 for _ in folder.glob("*.json"))
+
+    # --- API ---
+
+    def get(self, key: str, user_query: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Výsledek pod klíčem. S `user_query` se citace původního znění
+        dotazu ve výsledku přepíšou na toto znění.
+        """
+        tier = "memory"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._disk_get(key)
+            tier = "disk"
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        stored_at, stored_query, result = entry
+        if user_query is not None and stored_query and user_query != stored_query:
+            result = requote(result, stored_query, user_query)
+        result = copy.deepcopy(result)
+        metadata = result.setdefault("metadata", {})
+        metadata["cache"] = {
+            "hit": True,
+            "tier": tier,
+            "key": key[:16],
+            "age_s": round(time.time() - stored_at, 3),
+        }
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], user_query: str = "") -> None:
+        """`user_query` = znění dotazu, které výsledek cituje."""
+        entry = (time.time(), user_query, copy.deepcopy(result))
+        self._remember(key, entry)
+        self._disk_put(key, entry)
+
+    def _remember(self, key: str, entry: Tuple[float, str, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.persist_dir is not None and self.persist_dir.is_dir():
+            with self._disk_lock:
+                self._disk_count = None
+                for path in self.persist_dir.iterdir():
+                    try:
+                        if path.is_dir():
+                            shutil.rmtree(path)
+                        elif path.suffix in (".json", ".tmp"):
+                            path.unlink()
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "data_version": self._data_version,
+                "persistent": self.persist_dir is not None,
+                "disk_entries": self._disk_count,
+                "max_disk_entries": self.max_disk_entries,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def result_cache_enabled() -> bool:
+    return os.getenv("PIPELINE_RESULT_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+_CACHE: Optional[ResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                try:
+                    size = int(os.getenv("PIPELINE_RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+                except ValueError:
+                    size = DEFAULT_MAX_ENTRIES
+                try:
+                    disk_size = int(
+                        os.getenv("PIPELINE_RESULT_CACHE_DISK_SIZE", DEFAULT_MAX_DISK_ENTRIES)
+                    )
+                except ValueError:
+                    disk_size = DEFAULT_MAX_DISK_ENTRIES
+                persist_dir = os.getenv("PIPELINE_RESULT_CACHE_DIR") or None
+                _CACHE = ResultCache(
+                    max_entries=size, persist_dir=persist_dir, max_disk_entries=disk_size
+                )
+    return _CACHE
+
+
+__all__ = [
+    "DataFingerprint",
+    "ResultCache",
+    "get_result_cache",
+    "normalize_query",
+    "requote",
+    "result_cache_enabled",
+]
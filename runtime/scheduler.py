@@ -0,0 +1,202 @@
+# runtime/scheduler.py
+"""
+Prioritní plánovač drahých LLM stadií pipeline.
+
+Levné heuristické enginy (intent, risk) běží hned – ve vlastním poolu
+executoru, ne za LLM stadii (runtime/pipeline.py). Uzly označené v
+pipeline.yaml jako `llm: true` si před během vyžádají slot u plánovače;
+slotů je omezeně (sdílené přes všechny requesty) a čekající se obsluhují
+podle priority odvozené z výsledku heuristik:
+
+- úroveň rizika (high < medium < low; menší číslo = dřív),
+- příznaky lhůt (dimenze deadline/procedural) posunou o třídu výš,
+- urgentní domény (např. trestní právo) mají nejvyšší prioritu.
+
+Ochrana proti vyhladovění (aging): každých `aging_s` sekund čekání se
+efektivní priorita zlepší o jednu třídu. Protože stárnou všichni stejně
+rychle, stačí halda s klíčem priorita + čas_zařazení / aging_s.
+
+Čekání má volitelný timeout (deadline uzlu): kdo se slotu nedočká, vypadne
+z fronty (SlotTimeout) a slot později nezabere pro už zahozenou práci.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from runtime.config_loader import current_product_id, load_yaml
+
+DEADLINE_DIMENSIONS = ("deadline", "procedural")
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    enabled: bool = True
+    llm_slots: int = 4
+    aging_s: float = 5.0
+    risk_priority: Mapping[str, float] = field(
+        default_factory=lambda: {"high": 0.0, "medium": 2.0, "low": 3.0}
+    )
+    deadline_bonus: float = 1.0
+    urgent_domains: Tuple[str, ...] = ("criminal_law",)
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "SchedulerConfig":
+        raw = raw or {}
+        defaults = cls()
+        prio = raw.get("priorities") or {}
+        return cls(
+            enabled=bool(raw.get("enabled", True)),
+            llm_slots=max(1, int(raw.get("llm_slots", defaults.llm_slots))),
+            aging_s=max(0.001, float(raw.get("aging_s", defaults.aging_s))),
+            risk_priority={
+                str(k).lower(): float(v)
+                for k, v in (prio.get("risk_level") or defaults.risk_priority).items()
+            },
+            deadline_bonus=float(prio.get("deadline_bonus", defaults.deadline_bonus)),
+            urgent_domains=tuple(prio.get("urgent_domains") or defaults.urgent_domains),
+        )
+
+
+def load_scheduler_config(product_id: Optional[str] = None) -> SchedulerConfig:
+    """
+    Sekce `scheduler` z product/<id>/pipeline.yaml. Env PIPELINE_SCHEDULER=0
+    plánovač vypne (LLM stadia běží bez front).
+    """
+    product_id = product_id or current_product_id()
+    try:
+        raw = (load_yaml(f"product/{product_id}/pipeline.yaml") or {}).get("scheduler")
+    except FileNotFoundError:
+        raw = None
+    config = SchedulerConfig.from_dict(raw)
+    if os.getenv("PIPELINE_SCHEDULER", "").lower() in ("0", "false", "no"):
+        config = SchedulerConfig(enabled=False)
+    return config
+
+
+@dataclass
+class SlotGrant:
+    priority: float
+    queue_ms: float
+
+
+class SlotTimeout(TimeoutError):
+    """Slot nebyl přidělen do timeoutu – čekající byl z fronty odebrán."""
+
+
+@dataclass(order=True)
+class _Waiter:
+    sort_key: Tuple[float, int]
+    granted: bool = field(default=False, compare=False)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        config: SchedulerConfig,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config = config
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._active = 0
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    # --- priorita ---
+
+    def priority_for(self, payloads: Iterable[Mapping[str, Any]]) -> float:
+        """
+        Priorita z payloadů heuristických enginů (risk_level, dimensions,
+        domain). Menší číslo = dřív.
+        """
+        risk_level = "low"
+        dimensions: Dict[str, Any] = {}
+        domain = ""
+        for payload in payloads:
+            risk_level = str(payload.get("risk_level") or risk_level).lower()
+            dimensions = payload.get("dimensions") or dimensions
+            domain = payload.get("domain") or domain
+
+        cfg = self.config
+        priority = cfg.risk_priority.get(risk_level, max(cfg.risk_priority.values(), default=0.0))
+        if any(dimensions.get(d) for d in DEADLINE_DIMENSIONS):
+            priority -= cfg.deadline_bonus
+        if domain in cfg.urgent_domains:
+            priority = min(cfg.risk_priority.values(), default=0.0)
+        return max(0.0, priority)
+
+    # --- sloty ---
+
+    def _grant_next(self) -> None:
+        while self._heap and self._active < self.config.llm_slots:
+            waiter = heapq.heappop(self._heap)
+            waiter.granted = True
+            self._active += 1
+        self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: float, timeout_s: Optional[float] = None) -> Iterator[SlotGrant]:
+        """
+        Počká na slot. S `timeout_s` se čekající po vypršení z fronty
+        odebere a vyhodí SlotTimeout.
+        """
+        if not self.config.enabled:
+            yield SlotGrant(priority, 0.0)
+            return
+
+        enqueued = self._clock()
+        give_up = time.monotonic() + timeout_s if timeout_s is not None else None
+        waiter = _Waiter((priority + enqueued / self.config.aging_s, next(self._seq)))
+        with self._cond:
+            heapq.heappush(self._heap, waiter)
+            self._grant_next()
+            while not waiter.granted:
+                remaining = give_up - time.monotonic() if give_up is not None else None
+                if remaining is not None and remaining <= 0:
+                    self._heap.remove(waiter)
+                    heapq.heapify(self._heap)
+                    raise SlotTimeout(f"LLM slot not granted within {timeout_s:.3f} s")
+                self._cond.wait(remaining)
+
+        queue_ms = (self._clock() - enqueued) * 1000.0
+        try:
+            yield SlotGrant(priority, queue_ms)
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._grant_next()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"active": self._active, "waiting": len(self._heap)}
+
+
+_SCHEDULER: Optional[LLMScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        with _SCHEDULER_LOCK:
+            if _SCHEDULER is None:
+                _SCHEDULER = LLMScheduler(load_scheduler_config())
+    return _SCHEDULER
+
+
+__all__ = [
+    "LLMScheduler",
+    "SchedulerConfig",
+    "SlotGrant",
+    "SlotTimeout",
+    "get_llm_scheduler",
+    "load_scheduler_config",
+]
@@ -0,0 +1,99 @@
+# runtime/serialization.py
+"""
+Serializace výsledků pipeline do JSON.
+
+- PipelineResult je dict (zpětně kompatibilní s res["final_answer"] apod.)
+  s metodami to_dict() / to_json() / to_bytes(),
+- dataclassy (EngineOutput, CaseContext, ...) se serializují bez deep copy –
+  převádí se jen první úroveň, zbytek zpracuje JSON encoder sám,
+- použije orjson, pokud je nainstalovaný, jinak stdlib json,
+- výstup má verzované schéma (RESULT_SCHEMA_VERSION) a stabilní pořadí klíčů.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict
+
+try:  # volitelná závislost
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - závisí na prostředí
+    orjson = None  # type: ignore
+
+# zvýšit při každé nekompatibilní změně tvaru výstupu
+RESULT_SCHEMA_VERSION = 1
+
+# pořadí klíčů v serializovaném výsledku
+RESULT_KEYS = ("final_answer", "core_legal", "risk", "judikatura", "intent", "metadata")
+
+
+def _default(obj: Any) -> Any:
+    """Převod typů, které JSON encoder neumí – jen jedna úroveň, bez kopií."""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        to_dict = getattr(obj, "to_dict", None)
+        if callable(to_dict):
+            return to_dict()
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Kompaktní UTF-8 JSON (orjson, nebo stdlib fallback)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj,
+        default=_default,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def backend_name() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+class PipelineResult(dict):
+    """
+    Výsledek run_pipeline. Chová se jako dřívější dict, navíc umí
+    serializaci se stabilním schématem.
+    """
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Mělký dict ve tvaru schématu – hodnoty se nekopírují, enginy
+        zůstávají jako EngineOutput (převede je až encoder).
+        """
+        out: Dict[str, Any] = {"schema_version": RESULT_SCHEMA_VERSION}
+        for key in RESULT_KEYS:
+            out[key] = self.get(key)
+        for key, value in self.items():
+            if key not in out:
+                out[key] = value
+        return out
+
+    def to_bytes(self) -> bytes:
+        return dumps(self.to_dict())
+
+    def to_json(self) -> str:
+        return self.to_bytes().decode("utf-8")
+
+
+__all__ = [
+    "PipelineResult",
+    "RESULT_SCHEMA_VERSION",
+    "backend_name",
+    "dumps",
+]
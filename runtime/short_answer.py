@@ -0,0 +1,124 @@
+"""
+Kompaktní odpověď pro run_pipeline(mode="short").
+
+Šablony se předpočítají jednou pro každý intent a úroveň rizika
+(shrnutí + doporučené kroky z data/intents/*.json). Za běhu se už jen
+vybere hotový text – žádné skládání sekcí, žádné LLM.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from engines.intent.definition import IntentDefinition
+
+# cílová latence short režimu (chat widget potřebuje odpověď do 50 ms)
+SHORT_MODE_TARGET_MS = 50.0
+
+RISK_LEVELS = ("low", "medium", "high")
+
+_RISK_LABELS = {
+    "low": "nízké",
+    "medium": "střední",
+    "high": "vysoké",
+}
+
+# pořadí fallbacku skeletonu – stejné jako v conclusion enginu
+_SKELETON_ORDER = {
+    "high": ["high", "medium", "low"],
+    "medium": ["medium", "low", "high"],
+    "low": ["low", "medium", "high"],
+}
+
+_MAX_STEPS = 3
+
+# (verze intent dat, šablony) – měněno jedinou výměnou reference
+_TEMPLATES: Tuple[str, Dict[Tuple[str, str], str]] = ("", {})
+_TEMPLATES_LOCK = threading.Lock()
+
+
+def _normalize_level(risk_level: Optional[str]) -> str:
+    rl = (risk_level or "").lower()
+    for level in RISK_LEVELS:
+        if rl.startswith(level[:3]):
+            return level
+    return "low"
+
+
+def _render(intent_def: Optional[IntentDefinition], level: str) -> str:
+    lines: List[str] = ["# 🧩 Shrnutí"]
+
+    if intent_def is None:
+        lines.append(
+            "Z krátkého popisu zatím není jasné, o jakou právní situaci jde. "
+            "Plná analýza se právě připravuje."
+        )
+    else:
+        lines.append(f"**{intent_def.label_cs}** (oblast: {intent_def.domain})")
+        skeletons = intent_def.conclusion_skeletons or {}
+        for key in _SKELETON_ORDER[level]:
+            if skeletons.get(key):
+                lines.append("")
+                lines.append(skeletons[key])
+                break
+
+    lines.append("")
+    lines.append(f"- Orientační úroveň rizika: **{_RISK_LABELS[level]}**.")
+    lines.append("- Jde o rychlý orientační přehled, plná analýza následuje.")
+
+    lines.append("\n## 🧭 Doporučený další postup")
+    questions = list((intent_def.basic_questions if intent_def else None) or [])[:_MAX_STEPS]
+    if questions:
+        lines.append("Pro přesnější posouzení si ujasni:")
+        lines.extend(f"- {q}" for q in questions)
+    else:
+        lines.append("- Sepiš si stručně fakta a časovou osu situace.")
+        lines.append("- Připrav si dokumenty, které k věci máš (rozhodnutí, dopisy, e-maily).")
+
+    if level == "high":
+        lines.append("- Situace vypadá naléhavě – zvaž co nejdříve konzultaci s advokátem.")
+
+    return "\n".join(lines)
+
+
+def precompute_templates(definitions: Iterable[IntentDefinition], version: str = "") -> None:
+    """
+    Předpočítá šablony pro všechny intenty a úrovně rizika. `version`
+    (verze snapshotu intent dat) určuje, kdy je potřeba přepočítat.
+    """
+    templates: Dict[Tuple[str, str], str] = {}
+    for level in RISK_LEVELS:
+        templates[("general", level)] = _render(None, level)
+    for intent_def in definitions:
+        for level in RISK_LEVELS:
+            templates[(intent_def.intent_id, level)] = _render(intent_def, level)
+
+    global _TEMPLATES
+    with _TEMPLATES_LOCK:
+        _TEMPLATES = (version, templates)
+
+
+def build_short_answer(
+    intent_id: Optional[str],
+    risk_level: Optional[str],
+    definitions: Iterable[IntentDefinition],
+    version: str = "",
+) -> str:
+    """
+    Odpověď z předpočítané šablony. `definitions` se projdou jen při
+    prvním volání nebo po změně `version` (může to být i generátor).
+    """
+    templates_version, templates = _TEMPLATES
+    if not templates or version != templates_version:
+        precompute_templates(definitions, version)
+        templates = _TEMPLATES[1]
+
+    level = _normalize_level(risk_level)
+    text = templates.get((intent_id or "general", level))
+    if text is None:
+        text = templates[("general", level)]
+    return text
+
+
+__all__ = ["SHORT_MODE_TARGET_MS", "build_short_answer", "precompute_templates"]
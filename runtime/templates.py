@@ -0,0 +1,137 @@
+# runtime/templates.py
+"""
+Kompilované šablony odpovědí a dokumentů (templates/**/*.md).
+
+- šablona se při prvním použití rozparsuje na seznam segmentů
+  (literál / placeholder {{nazev}}), render je pak jediný "".join,
+- zkompilované šablony se cachují podle cesty a mtime – soubor se za
+  běhu nečte znovu; v dev režimu (PRAVNI_STRAZCE_DEV=1) se mtime hlídá
+  a změněná šablona se překompiluje,
+- produkt může šablonu přepsat vlastní verzí v
+  product/<id>/templates/<stejná relativní cesta>.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+from runtime.config_loader import BASE_DIR, current_product_id
+
+TEMPLATES_DIR = Path("templates")
+
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    path: Path
+    mtime_ns: int
+    # sudé indexy = literály, liché = názvy placeholderů
+    segments: Tuple[str, ...]
+
+    @property
+    def placeholders(self) -> Tuple[str, ...]:
+        return self.segments[1::2]
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """
+        Vyplní placeholdery. Chybějící hodnota = prázdný blok
+        (šablona se nesmí rozbít kvůli chybějící sekci).
+        """
+        segments = self.segments
+        out = list(segments)
+        for i in range(1, len(segments), 2):
+            out[i] = values.get(segments[i], "") or ""
+        return "".join(out)
+
+
+def compile_template(text: str, path: Path = Path("<string>"), mtime_ns: int = 0) -> CompiledTemplate:
+    # re.split s jednou skupinou vrací přesně [literál, název, literál, ...]
+    return CompiledTemplate(
+        path=path,
+        mtime_ns=mtime_ns,
+        segments=tuple(_PLACEHOLDER_RE.split(text)),
+    )
+
+
+def _env_dev_mode() -> bool:
+    return os.getenv("PRAVNI_STRAZCE_DEV", "").lower() in ("1", "true", "yes")
+
+
+class TemplateStore:
+    def __init__(self, base_dir: Path = BASE_DIR, dev_mode: Optional[bool] = None) -> None:
+        self.base_dir = Path(base_dir)
+        self.dev_mode = _env_dev_mode() if dev_mode is None else dev_mode
+        self._compiled: Dict[Path, CompiledTemplate] = {}
+        # (produkt, relativní cesta) → vyřešená cesta k souboru
+        self._resolved: Dict[Tuple[str, str], Path] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, rel_path: str, product_id: Optional[str] = None) -> Path:
+        """
+        Najde soubor šablony – nejdřív produktový override, pak výchozí
+        templates/<rel_path>.
+        """
+        product_id = product_id or current_product_id()
+        key = (product_id, rel_path)
+        path = None if self.dev_mode else self._resolved.get(key)
+        if path is not None:
+            return path
+
+        override = self.base_dir / "product" / product_id / TEMPLATES_DIR / rel_path
+        path = override if override.is_file() else self.base_dir / TEMPLATES_DIR / rel_path
+        if not path.is_file():
+            raise FileNotFoundError(f"Template not found: {rel_path} (product {product_id})")
+        self._resolved[key] = path
+        return path
+
+    def get(self, rel_path: str, product_id: Optional[str] = None) -> CompiledTemplate:
+        path = self.resolve(rel_path, product_id)
+        compiled = self._compiled.get(path)
+
+        if compiled is not None and not self.dev_mode:
+            return compiled
+
+        mtime_ns = path.stat().st_mtime_ns
+        if compiled is not None and compiled.mtime_ns == mtime_ns:
+            return compiled
+
+        with self._lock:
+            text = path.read_text(encoding="utf-8")
+            compiled = compile_template(text, path, mtime_ns)
+            self._compiled[path] = compiled
+        return compiled
+
+    def render(
+        self,
+        rel_path: str,
+        values: Mapping[str, str],
+        product_id: Optional[str] = None,
+    ) -> str:
+        return self.get(rel_path, product_id).render(values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._compiled.clear()
+            self._resolved.clear()
+
+
+_STORE: Optional[TemplateStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_template_store() -> TemplateStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = TemplateStore()
+    return _STORE
+
+
+__all__ = ["CompiledTemplate", "TemplateStore", "compile_template", "get_template_store"]
@@ -0,0 +1,106 @@
+# tests/test_admission.py
+import threading
+
+import pytest
+
+import runtime.admission as admission_mod
+from runtime.admission import AdmissionConfig, AdmissionController, load_admission_config
+from runtime.orchestrator import run_pipeline
+
+
+def _controller(**raw):
+    return AdmissionController(AdmissionConfig.from_dict(raw))
+
+
+def test_product_config_is_loaded():
+    config = load_admission_config("e_advokat_pro")
+    assert config.enabled
+    assert set(config.degrade) == {"skeleton", "no_judikatura", "short"}
+    with pytest.raises(ValueError):
+        AdmissionConfig.from_dict({"degrade": {"turbo": {"in_flight": 1}}})
+
+
+def test_levels_follow_in_flight_thresholds():
+    ctrl = _controller(
+        max_concurrent=10,
+        degrade={"skeleton": {"in_flight": 2}, "no_judikatura": {"in_flight": 3}},
+    )
+    with ctrl.admit() as first:
+        assert first.level == "none"
+        with ctrl.admit() as second:
+            assert second.level == "skeleton"
+            with ctrl.admit() as third:
+                assert third.level == "no_judikatura"
+                assert third.in_flight == 3
+    assert ctrl.stats() == {"active": 0, "waiting": 0}
+
+
+def test_queue_timeout_degrades_to_short():
+    ctrl = _controller(max_concurrent=1, queue_timeout_s=0.05)
+    release = threading.Event()
+    entered = threading.Event()
+
+    def hold():
+        with ctrl.admit():
+            entered.set()
+            release.wait(2)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    entered.wait(2)
+    try:
+        with ctrl.admit() as late:
+            assert late.level == "short"
+            assert late.queue_wait_ms >= 40
+    finally:
+        release.set()
+        t.join()
+    assert ctrl.stats()["active"] == 0
+
+
+def test_degraded_run_is_recorded_and_honest(monkeypatch):
+    monkeypatch.setattr(
+        admission_mod,
+        "_CONTROLLER",
+        _controller(degrade={"no_judikatura": {"in_flight": 1}}),
+    )
+    res = run_pipeline("Soused mi poškodil plot.", use_llm=True, use_cache=False)
+
+    meta = res["metadata"]
+    assert meta["degradation"]["level"] == "no_judikatura"
+    assert meta["degradation"]["requested_use_llm"] is True
+    assert meta["use_llm"] is False
+    assert res["judikatura"] is None
+    assert "nevyhledávala" in res["final_answer"]
+    assert "zjednodušena" in res["final_answer"]
+
+
+def test_short_degradation_switches_mode(monkeypatch):
+    monkeypatch.setattr(
+        admission_mod, "_CONTROLLER", _controller(degrade={"short": {"in_flight": 1}})
+    )
+    res = run_pipeline("Soused mi poškodil plot.", use_cache=False)
+    assert res["metadata"]["mode"] == "short"
+    assert res["metadata"]["degradation"]["requested_mode"] == "full"
+
+
+def test_skeleton_degradation_sheds_intent_llm_fallback(monkeypatch):
+    import engines.intent.engine as intent_engine
+
+    calls = []
+
+    class FakeLLM:
+        backend = "openai"
+
+        def chat(self, use_case, messages, **kwargs):
+            calls.append(kwargs.get("step"))
+            return "{}"
+
+    monkeypatch.setattr(intent_engine, "_LLM", FakeLLM())
+    monkeypatch.setattr(
+        admission_mod, "_CONTROLLER", _controller(degrade={"skeleton": {"in_flight": 1}})
+    )
+    res = run_pipeline("Mám dotaz ohledně souseda a jeho psa.", use_llm=True, use_cache=False)
+
+    assert res["metadata"]["degradation"]["level"] == "skeleton"
+    assert calls == []
@@ -0,0 +1,50 @@
+# tests/test_engine_registry.py
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import runtime.engine_registry as engine_registry
+from runtime.engine_registry import EngineRegistry, load_feature_flags
+from runtime.orchestrator import run_pipeline
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_product_flags_are_read():
+    flags = load_feature_flags("e_advokat_pro")
+    assert flags["judikatura_engine"] is True
+    assert load_feature_flags("neexistujici_produkt") == {}
+
+
+def test_disabled_engine_is_not_available():
+    registry = EngineRegistry(flags={"voice_of_court_engine": False})
+    assert registry.get("voice_of_court") is None
+    assert "voice_of_court" not in registry.enabled()
+    with pytest.raises(RuntimeError):
+        registry.module("voice_of_court")
+    # engine bez flagu je zapnutý vždy
+    assert registry.is_enabled("core_legal")
+
+
+def test_pipeline_skips_disabled_engine(monkeypatch):
+    monkeypatch.setattr(
+        engine_registry, "_REGISTRY", EngineRegistry(flags={"judikatura_engine": False})
+    )
+    res = run_pipeline("Soused mi poškodil auto.", use_cache=False)
+    assert res["judikatura"] is None
+    assert res["metadata"]["disabled_engines"] == ["judikatura"]
+    assert "# 🧩 Shrnutí" in res["final_answer"]
+
+
+def test_orchestrator_import_does_not_import_engines():
+    code = (
+        "import sys, runtime.orchestrator\n"
+        "print(sorted(m for m in sys.modules if m.startswith(('engines.core_legal', "
+        "'engines.judikatura', 'engines.risk', 'llm.client'))))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "[]"
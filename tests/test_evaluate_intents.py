@@ -0,0 +1,59 @@
+# tests/test_evaluate_intents.py
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from tools.evaluate_intents import (
+    ClassifierConfig,
+    evaluate,
+    format_report,
+    load_corpus,
+    load_examples,
+    main,
+)
+
+
+def test_examples_are_loaded_from_intent_json() -> None:
+    samples = load_examples()
+    assert samples
+    assert all(s.expected.startswith("traffic_law_") for s in samples)
+
+
+def test_config_parse() -> None:
+    cfg = ClassifierConfig.parse("B", ["fuzzy=false", "top_domains=1", "llm_threshold=0.3"])
+    assert (cfg.name, cfg.fuzzy, cfg.top_domains, cfg.llm_threshold) == ("B", False, 1, 0.3)
+    with pytest.raises(ValueError):
+        ClassifierConfig.parse("B", ["neznamy=1"])
+
+
+def test_evaluate_reports_accuracy_confusion_and_calibration(tmp_path) -> None:
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        "# komentář\n"
+        + json.dumps({"query": "chyba radaru", "intent": "traffic_law_traffic_speed_offense_dispute_measurement"})
+        + "\n"
+        + json.dumps({"query": "chci se rozvést"}, ensure_ascii=False)
+        + "\n",
+        encoding="utf-8",
+    )
+    samples = load_corpus(str(corpus))
+    assert [s.expected for s in samples][1] == "general"
+
+    report = evaluate(samples, ClassifierConfig(), passes=2)
+    assert report.total == 2 and report.correct == 2
+    assert report.accuracy == 1.0
+    assert report.confused_pairs() == []
+    assert sum(b["count"] for b in report.calibration) == 2
+    # "chci se rozvést" nic netrefí → confidence 0 → LLM fallback
+    assert report.llm_fallbacks >= 1
+    assert report.queries_per_s > 0
+    assert "accuracy" in format_report([report])
+
+
+def test_main_compares_two_configs(capsys) -> None:
+    assert main(["--passes", "1", "--a", "--b", "fuzzy=false", "--json"]) == 0
+    reports = json.loads(capsys.readouterr().out)
+    assert [r["config"]["name"] for r in reports] == ["A", "B"]
+    assert reports[1]["config"]["fuzzy"] is False
@@ -7,6 +7,8 @@ from pathlib import Path
 import pytest
 
 from tools.generate_intents_from_yaml import generate_from_yaml
+from engines.intent.catalog import IntentCatalog
+from engines.intent.index import catalog_idf
 from engines.intent.definition import IntentDefinition
 
 
@@ -68,4 +70,38 @@ intents:
     assert data["keywords"]  # aspoň něco
 
     # validace přes dataclass – stejná logika jako validate_intents
-    IntentDefinition(**data)
\ No newline at end of file
+    IntentDefinition(**data)
+
+
+def test_generator_writes_stem_stats_into_domain_manifest(tmp_path: Path) -> None:
+    """
+    Manifest domény dostane četnosti kmenů – katalog z nich spočítá
+    stejné IDF jako z načtených definic, ale shard nenačte.
+    """
+    yaml_content = """
+domain: traffic_law
+intents:
+  - intent_id: traffic_radar
+    keywords: ["radar", "pokuta za rychlost"]
+  - intent_id: traffic_fine
+    keywords: ["bloková pokuta"]
+"""
+    yaml_path = tmp_path / "traffic_law.yaml"
+    yaml_path.write_text(yaml_content, encoding="utf-8")
+    out_dir = tmp_path / "out"
+    (out_dir / "traffic_law").mkdir(parents=True)
+    (out_dir / "traffic_law" / "_domain.json").write_text(
+        json.dumps({"domain": "traffic_law", "keywords": ["radar"]}), encoding="utf-8"
+    )
+
+    generate_from_yaml(str(yaml_path), output_base=str(out_dir))
+
+    manifest = json.loads((out_dir / "traffic_law" / "_domain.json").read_text(encoding="utf-8"))
+    assert manifest["keywords"] == ["radar"]
+    assert manifest["intent_count"] == 2
+    assert manifest["stem_df"]["pokut"] == 2
+
+    catalog = IntentCatalog(base_dir=str(out_dir))
+    idf = catalog.idf()
+    assert catalog.loaded_domains() == [] and catalog.shards["traffic_law"]._definitions is None
+    assert idf == catalog_idf(catalog.definitions())
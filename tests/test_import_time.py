@@ -0,0 +1,52 @@
+# tests/test_import_time.py
+"""
+Startovní benchmark – `import runtime.orchestrator` musí zůstat levný
+(cron batch joby a CLI). Vždy se hlídá, že se při importu nenačte yaml,
+openai ani llm.client; časový rozpočet je opt-in přes env
+IMPORT_TIME_BUDGET_MS (pevný limit by na vytíženém CI náhodně padal).
+"""
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_TIME_BUDGET_MS = os.getenv("IMPORT_TIME_BUDGET_MS", "").strip()
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\S+)")
+
+
+def _importtime(module: str):
+    code = (
+        f"import sys, {module}\n"
+        "print(','.join(m for m in ('yaml', 'openai', 'llm.client') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = {}
+    for line in out.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            cumulative_us[m.group(3)] = int(m.group(2))
+    return cumulative_us, out.stdout.strip()
+
+
+@pytest.mark.skipif(not IMPORT_TIME_BUDGET_MS, reason="nastav IMPORT_TIME_BUDGET_MS (ms)")
+def test_orchestrator_import_is_within_budget():
+    cumulative_us, _ = _importtime("runtime.orchestrator")
+    elapsed_ms = cumulative_us["runtime.orchestrator"] / 1000.0
+    assert elapsed_ms < float(IMPORT_TIME_BUDGET_MS), f"import trvá {elapsed_ms:.1f} ms"
+
+
+def test_orchestrator_import_defers_yaml_openai_and_llm_client():
+    _, heavy = _importtime("runtime.orchestrator")
+    assert heavy == ""
@@ -0,0 +1,147 @@
+"""
+Testy doménově shardovaného katalogu intentů (engines/intent/catalog.py).
+"""
+
+import json
+import math
+
+from engines.intent.catalog import IntentCatalog, load_domain_manifest
+from engines.intent.index import IntentIndex, catalog_idf
+
+
+def _write_intent(base, domain: str, intent_id: str, keywords) -> None:
+    folder = base / domain
+    folder.mkdir(parents=True, exist_ok=True)
+    raw = {
+        "intent_id": intent_id,
+        "label_cs": intent_id,
+        "domain": domain,
+        "description_cs": "",
+        "subdomains": [],
+        "keywords": list(keywords),
+        "negative_keywords": [],
+        "risk_patterns": [],
+        "basic_questions": [],
+        "safety_questions": [],
+        "normative_references": [],
+        "conclusion_skeletons": {},
+    }
+    (folder / f"{intent_id}.json").write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+
+
+def _write_manifest(base, domain: str, **raw) -> None:
+    (base / domain / "_domain.json").write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+
+
+def _catalog(tmp_path) -> IntentCatalog:
+    _write_intent(tmp_path, "traffic_law", "traffic_law_radar", ["chyba radaru"])
+    _write_manifest(tmp_path, "traffic_law", keywords=["radar", "pokuta"])
+    _write_intent(tmp_path, "inheritance_law", "inheritance_law_will", ["závěť", "pokuta"])
+    _write_manifest(tmp_path, "inheritance_law", keywords=["dědictví", "závěť"])
+    (tmp_path / "empty_law").mkdir()
+    return IntentCatalog(base_dir=str(tmp_path), top_domains=1, weighted=False)
+
+
+def test_prepass_loads_only_selected_shard(tmp_path):
+    catalog = _catalog(tmp_path)
+    # prázdná doména se do katalogu nedostane
+    assert catalog.domains == ["inheritance_law", "traffic_law"]
+    assert catalog.loaded_domains() == []
+
+    match = catalog.match("Přišla mi fotka z radaru, myslím, že je chyba radaru.")
+    assert match.domain_scores == {"traffic_law": 1.0}
+    assert match.scanned == ["traffic_law"]
+    assert [(d.intent_id, s) for d, s in match.scores] == [("traffic_law_radar", 1.0)]
+    assert catalog.loaded_domains() == ["traffic_law"]
+
+
+def test_second_chance_scans_remaining_shards(tmp_path):
+    catalog = _catalog(tmp_path)
+    # pre-pass vybere dopravu (radar, pokuta), trefí se ale až dědický shard
+    match = catalog.match("pokuta za radar")
+    assert match.domain_scores == {"traffic_law": 2.0}
+    assert match.scanned == ["traffic_law", "inheritance_law"]
+    assert [d.intent_id for d, s in match.scores if s > 0] == ["inheritance_law_will"]
+
+
+def test_second_chance_also_runs_after_weak_selected_match(tmp_path):
+    catalog = _catalog(tmp_path)
+    # doprava dá jen opravu překlepu (skóre se slevou) → hledá se dál
+    match = catalog.match("pokuta, chyba radarru")
+    assert match.scanned == ["traffic_law", "inheritance_law"]
+    assert max(match.scores, key=lambda item: item[1])[0].intent_id == "inheritance_law_will"
+
+    catalog.second_chance_below = 0.0
+    assert catalog.match("pokuta, chyba radarru").scanned == ["traffic_law"]
+
+
+def test_shard_weights_use_catalog_wide_idf(tmp_path):
+    _write_intent(tmp_path, "traffic_law", "traffic_law_radar", ["radar", "pokuta"])
+    _write_intent(tmp_path, "inheritance_law", "inheritance_law_will", ["závěť", "pokuta"])
+    catalog = IntentCatalog(base_dir=str(tmp_path))
+
+    weights = {e.keyword: e.weight for e in catalog.shards["inheritance_law"].index.entries}
+    # "pokuta" má intent v obou shardech, "závěť" jen jeden ze dvou
+    assert weights == {"závěť": 1.0 + math.log(2), "pokuta": 1.0}
+    # stejné váhy jako index nad celým katalogem najednou
+    full = IntentIndex(catalog.definitions())
+    assert {e.keyword: e.weight for e in full.entries if e.intent_pos == 0} == weights
+
+
+def test_catalog_idf_uses_manifest_stats_without_loading_shards(tmp_path):
+    _write_intent(tmp_path, "traffic_law", "traffic_law_radar", ["radar", "pokuta"])
+    _write_manifest(
+        tmp_path,
+        "traffic_law",
+        stem_df={"radar": 1, "pokut": 1},
+        intent_count=1,
+        intent_files=["traffic_law_radar.json"],
+    )
+    _write_intent(tmp_path, "inheritance_law", "inheritance_law_will", ["závěť", "pokuta"])
+    catalog = IntentCatalog(base_dir=str(tmp_path))
+
+    idf = catalog.idf()
+    assert idf["pokut"] == 1.0 and idf["radar"] == 1.0 + math.log(2)
+    # doména bez četností v manifestu se načetla, doprava ne
+    assert catalog.shards["traffic_law"]._definitions is None
+    assert catalog.shards["inheritance_law"]._definitions is not None
+
+
+def test_stale_manifest_stats_fall_back_to_definitions(tmp_path):
+    _write_intent(tmp_path, "traffic_law", "traffic_law_radar", ["radar"])
+    _write_intent(tmp_path, "traffic_law", "traffic_law_speed", ["radar", "rychlost"])
+    # manifest zná jen první soubor → četnosti neplatí
+    _write_manifest(
+        tmp_path,
+        "traffic_law",
+        stem_df={"radar": 1},
+        intent_count=1,
+        intent_files=["traffic_law_radar.json"],
+    )
+    catalog = IntentCatalog(base_dir=str(tmp_path))
+    assert catalog.idf() == {"radar": 1.0, "rychlost": 1.0 + math.log(2)}
+
+
+def test_repo_manifest_stats_match_intent_definitions():
+    # po změně intentů nebo stemmeru: python -m tools.generate_intents_from_yaml --stats
+    catalog = IntentCatalog()
+    for domain in catalog.domains:
+        manifest = catalog.manifests[domain]
+        assert manifest.stem_df is not None, domain
+        assert catalog._domain_df(domain) == (manifest.intent_count, manifest.stem_df)
+    assert catalog.idf() == catalog_idf(catalog.definitions())
+
+
+def test_find_prefers_domain_shard(tmp_path):
+    catalog = _catalog(tmp_path)
+    assert catalog.find("traffic_law_radar").intent_id == "traffic_law_radar"
+    assert catalog.loaded_domains() == ["traffic_law"]
+    assert catalog.find("neexistuje") is None
+
+
+def test_manifest_merges_domain_rules_keywords(tmp_path):
+    _write_intent(tmp_path, "family_law", "family_law_care", ["péče"])
+    _write_manifest(tmp_path, "family_law", keywords=["rozvod"], domain_rules="rodinné")
+    manifest = load_domain_manifest("family_law", base_dir=str(tmp_path))
+    assert manifest.keywords[0] == "rozvod"
+    assert "výživné" in manifest.keywords
@@ -0,0 +1,133 @@
+"""
+Testy stemmeru a indexu klíčových slov intentů.
+"""
+
+from engines.intent.definition import IntentDefinition
+from engines.intent.engine import _heuristic_classify
+from engines.intent.index import IntentIndex
+from engines.intent.stemmer import stem, stem_tokens
+
+
+def _intent(intent_id: str, keywords, negative=()) -> IntentDefinition:
+    return IntentDefinition(
+        intent_id=intent_id,
+        label_cs=intent_id,
+        domain="test_law",
+        description_cs="",
+        subdomains=[],
+        keywords=list(keywords),
+        negative_keywords=list(negative),
+        risk_patterns=[],
+        basic_questions=[],
+        safety_questions=[],
+        normative_references=[],
+        conclusion_skeletons={},
+    )
+
+
+def test_stemmer_unifies_case_forms():
+    assert len({stem(w) for w in ("pokuta", "pokuty", "pokutu", "pokutou", "pokute")}) == 1
+    assert len({stem(w) for w in ("radar", "radaru", "radarem")}) == 1
+    # krátká slova se neořezávají pod 3 znaky
+    assert stem("oko") == "oko"
+    # stopslova a diakritika
+    assert stem_tokens("Pokuta v Rakousku") == stem_tokens("pokutu z rakouska")
+
+
+def test_stemmer_strips_ov_adjectives_consistently():
+    assert stem_tokens("úsekovým měřením") == stem_tokens("úsekové měření")
+    assert stem_tokens("laserovým měřičem")[0] == stem_tokens("laser")[0]
+    assert stem_tokens("spisového") == stem_tokens("spis")
+    assert len(set(stem_tokens("úsekový úseková úsekovou úsekových úsek"))) == 1
+
+
+def test_stemmer_keeps_ov_in_nouns():
+    # "ov" se odřízne jen za koncovkou přídavného jména
+    assert stem_tokens("domov") == ("domov",)
+    assert stem_tokens("domovem") == stem_tokens("domov")
+    assert stem_tokens("slovo") == ("slov",)
+
+
+def test_index_matches_inflected_query_and_dedupes_variants():
+    index = IntentIndex(
+        [
+            _intent("a", ["bloková pokuta", "blokova pokuta"], negative=["nehoda"]),
+            _intent("b", ["chyba radaru"]),
+        ],
+        weighted=False,
+    )
+    # duplicita bez diakritiky se do indexu nepřidá
+    assert index.stats()["keywords"] == 3
+
+    match = index.match("Dostal jsem blokovou pokutu.")
+    assert match.scores == {0: 1}
+    assert [e.keyword for e in match.matched] == ["bloková pokuta"]
+
+    # slovosled je volný, negativní slovo penalizuje
+    assert index.match("pokutou blokovou po nehodě").scores == {0: -1}
+    assert index.match("radar měl chybu").scores == {1: 1}
+
+
+def test_heuristic_classify_recognizes_inflected_keywords():
+    h = _heuristic_classify("Zastavila mě policie a dostal jsem blokovou pokutu.")
+    assert h["intent"] != "general"
+    assert "bloková pokuta" in h["matched_keywords"]
+
+
+def test_fuzzy_lookup_tolerates_typos_with_discount():
+    from engines.intent.fuzzy import bounded_levenshtein
+    from engines.intent.index import FUZZY_DISCOUNT
+
+    assert bounded_levenshtein("rycjlost", "rychlost", 1) == 1
+    assert bounded_levenshtein("rychle", "pokuta", 2) is None
+
+    index = IntentIndex([_intent("a", ["překročení rychlosti"], negative=["alkohol"])], weighted=False)
+    match = index.match("prekroceni rycjlosti")
+    assert match.scores == {0: 1.0 * FUZZY_DISCOUNT}
+    assert match.corrections == {"rycjlost": "rychlost"}
+    assert [e.keyword for e in match.fuzzy] == ["překročení rychlosti"]
+
+    # přesná shoda bez slevy, překlep v negativním slově nepenalizuje
+    assert index.match("překročení rychlosti, alkohool").scores == {0: 1.0}
+    # krátká slova se neopravují
+    assert index.fuzzy.lookup("rch") == ()
+    assert index.match("prekroceni rycjlosti", fuzzy=False).scores == {}
+
+
+def test_fuzzy_only_without_exact_candidate_and_never_for_common_words():
+    index = IntentIndex(
+        [_intent("a", ["překročení rychlosti"]), _intent("b", ["pokuta v zahraničí"])],
+        weighted=False,
+    )
+    # přesná shoda intentu b → překlep se už neopravuje
+    match = index.match("prekroceni rycjlosti, pokuta v zahraničí")
+    assert match.scores == {1: 1.0}
+    assert match.corrections == {} and match.fuzzy == []
+
+    # "pokud" není překlep "pokuta"
+    assert index.fuzzy.lookup("pokud") == ()
+    h = _heuristic_classify("Co mám dělat, pokud mi v zahraničí ukradli kufr?")
+    assert h["intent"] != "traffic_law_traffic_speed_offense_abroad"
+    assert not h["fuzzy_keywords"]
+
+
+def test_weights_prefer_specific_phrases_and_honor_overrides():
+    definitions = [
+        _intent("a", ["pokuta", "bloková pokuta"]),
+        _intent("b", ["pokuta", "chyba radaru"]),
+    ]
+    definitions[1].keyword_weights = {"Pokuta": 0.5}
+    index = IntentIndex(definitions)
+    weights = {(e.intent_pos, e.keyword): e.weight for e in index.entries}
+
+    # "pokuta" mají oba intenty (IDF 1.0); fráze s vlastními kmeny váží víc
+    assert weights[(0, "pokuta")] == 1.0
+    assert weights[(1, "chyba radaru")] > weights[(0, "bloková pokuta")] > 1.0
+    # ruční váha z JSONu (klíč se porovnává normalizovaně)
+    assert weights[(1, "pokuta")] == 0.5
+
+    # dřív remíza 1:1 – teď vyhraje specifičtější intent
+    assert index.match("pokuta").scores == {0: 1.0, 1: 0.5}
+    scores = index.match("bloková pokuta").scores
+    assert scores[0] > 2 * scores[1]
+    assert IntentIndex(definitions, weighted=False).match("pokuta").scores == {0: 1.0, 1: 0.5}
@@ -0,0 +1,120 @@
+"""
+Testy LLM fallbacku klasifikace intentu (engines/intent/llm_fallback.py).
+"""
+
+import json
+
+import engines.intent.engine as intent_engine
+from engines.intent.definition import IntentDefinition
+from engines.intent.llm_fallback import IntentLLMFallback, parse_vote
+from engines.shared_types import EngineInput
+
+ABROAD = "traffic_law_traffic_speed_offense_abroad"
+
+
+class FakeLLM:
+    backend = "openai"
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    def chat(self, use_case, messages, **kwargs):
+        self.calls.append((use_case, messages, kwargs))
+        return self.reply
+
+
+def _candidate(intent_id: str) -> IntentDefinition:
+    return IntentDefinition(
+        intent_id=intent_id,
+        label_cs=intent_id,
+        domain="traffic_law",
+        description_cs="",
+        subdomains=[],
+        keywords=[],
+        negative_keywords=[],
+        risk_patterns=[],
+        basic_questions=[],
+        safety_questions=[],
+        normative_references=[],
+        conclusion_skeletons={},
+    )
+
+
+def test_parse_vote_accepts_only_known_ids():
+    candidates = [_candidate("traffic_law_a")]
+    vote = parse_vote('Tady je:\n```json\n{"intent": "traffic_law_a", "confidence": 1.7}\n```', candidates)
+    assert (vote.intent, vote.domain, vote.confidence) == ("traffic_law_a", "traffic_law", 1.0)
+    assert parse_vote('{"intent": "vymysleny_intent", "confidence": 0.9}', candidates) is None
+    assert parse_vote("[LLM_ERROR] timeout", candidates) is None
+    assert parse_vote('{"intent": "general"}', candidates).confidence == 0.0
+
+
+def _run(monkeypatch, llm, query, **ctx):
+    monkeypatch.setattr(intent_engine, "_LLM", llm)
+    context = {"case": {"user_query": query}, "use_llm": True, **ctx}
+    return intent_engine.run(EngineInput(context=context)).payload
+
+
+def test_llm_vote_is_merged_and_cached(monkeypatch):
+    monkeypatch.setattr(intent_engine, "_LLM_FALLBACK", IntentLLMFallback())
+    llm = FakeLLM(json.dumps({"intent": ABROAD, "confidence": 0.9, "reasoning": "zahraničí"}))
+
+    payload = _run(monkeypatch, llm, "Přišel mi nějaký dopis ze Salcburku")
+    assert payload["intent"] == ABROAD and payload["domain"] == "traffic_law"
+    assert payload["confidence"] >= 0.9
+    assert payload["llm_vote"]["cached"] is False
+
+    # prompt z registru a strukturovaný vstup s povolenými id
+    [(use_case, messages, kwargs)] = llm.calls
+    assert "OUTPUT FORMAT" in messages[0].content
+    context = json.loads(messages[1].content)
+    assert ABROAD in context["allowed_intent_ids"] and "general" in context["allowed_intent_ids"]
+    assert kwargs["step"] == "intent_fallback"
+
+    # stejný dotaz (jiné mezery, bez diakritiky) LLM znovu nevolá
+    again = _run(monkeypatch, llm, "  prisel mi nejaky dopis ze  salcburku ")
+    assert len(llm.calls) == 1
+    assert again["intent"] == ABROAD and again["llm_vote"]["cached"] is True
+
+
+def test_invalid_llm_reply_keeps_heuristic_result(monkeypatch):
+    monkeypatch.setattr(intent_engine, "_LLM_FALLBACK", IntentLLMFallback())
+    llm = FakeLLM("[LLM_ERROR] timeout")
+
+    payload = _run(monkeypatch, llm, "Přišel mi nějaký dopis")
+    assert payload["intent"] == "general" and payload["llm_vote"] is None
+    assert payload["llm_raw"] == "[LLM_ERROR] timeout"
+    # chyba se necachuje – příště se LLM zkusí znovu
+    _run(monkeypatch, llm, "Přišel mi nějaký dopis")
+    assert len(llm.calls) == 2
+
+
+def test_fallback_only_runs_with_use_llm(monkeypatch):
+    monkeypatch.setattr(intent_engine, "_LLM_FALLBACK", IntentLLMFallback())
+    llm = FakeLLM(json.dumps({"intent": ABROAD, "confidence": 0.9}))
+
+    payload = _run(monkeypatch, llm, "Přišel mi nějaký dopis ze Salcburku", use_llm=False)
+    assert payload["llm_vote"] is None and llm.calls == []
+    _run(monkeypatch, llm, "Přišel mi nějaký dopis ze Salcburku", heuristic_only=True)
+    assert llm.calls == []
+
+
+def test_session_fallback_cache_is_scoped_to_conversation(monkeypatch):
+    monkeypatch.setattr(intent_engine, "_LLM_FALLBACK", IntentLLMFallback())
+    llm = FakeLLM(json.dumps({"intent": "general", "confidence": 0.2}))
+
+    def turn(session_id, text, reset=False):
+        return _run(monkeypatch, llm, text, session_id=session_id, session_reset=reset)
+
+    turn("chat-a", "Přišel mi nějaký dopis", reset=True)
+    turn("chat-a", "a co teď?")
+    # stejná poslední zpráva v jiné konverzaci → jiné h, LLM se volá znovu
+    turn("chat-b", "Dostal jsem nějaké psaní", reset=True)
+    payload = turn("chat-b", "a co teď?")
+    assert len(llm.calls) == 4 and payload["llm_vote"]["cached"] is False
+
+    # stejná konverzace znovu od začátku → cache
+    turn("chat-c", "Přišel mi nějaký dopis", reset=True)
+    assert turn("chat-c", "a co teď?")["llm_vote"]["cached"] is True
+    assert len(llm.calls) == 4
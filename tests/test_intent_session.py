@@ -0,0 +1,98 @@
+"""
+Testy inkrementální klasifikace pro chat (engines/intent/session.py).
+"""
+
+from engines.intent.engine import get_intent_catalog, run
+from engines.intent.session import SessionClassifier
+from engines.shared_types import EngineInput
+
+TURNS = [
+    "Dobrý den, mám dotaz.",
+    "Přišla mi výzva k podání vysvětlení",
+    "je tam fotka z radaru, prý překročení rycjlosti o 20 km/h",
+    "měření mělo podle mě chybu a nehoda to nebyla",
+]
+
+
+def _summary(match):
+    return (
+        [(d.intent_id, round(s, 6)) for d, s in match.scores],
+        [e.keyword for e in match.matched],
+        [e.keyword for e in match.fuzzy],
+        match.domain_scores,
+        match.scanned,
+    )
+
+
+def test_session_matches_stateless_classification_of_history():
+    catalog = get_intent_catalog()
+    session = SessionClassifier(catalog)
+    for i, turn in enumerate(TURNS):
+        incremental = session.add(turn)
+        stateless = catalog.match(" ".join(TURNS[: i + 1]))
+        assert _summary(incremental) == _summary(stateless)
+    assert session.turns == len(TURNS)
+
+
+def test_session_drops_typo_corrections_once_exact_match_appears():
+    catalog = get_intent_catalog()
+    session = SessionClassifier(catalog)
+    turns = ["prý překročení rycjlosti", "fotka z radaru"]
+    fuzzy = []
+    for i, turn in enumerate(turns):
+        incremental = _summary(session.add(turn))
+        assert incremental == _summary(catalog.match(" ".join(turns[: i + 1])))
+        fuzzy.append(incremental[2])
+    # opravený překlep platí, jen dokud nic nesedí přesně
+    assert fuzzy == [["překročení rychlosti"], []]
+
+
+def test_repeated_words_do_not_change_state():
+    session = SessionClassifier(get_intent_catalog())
+    first = _summary(session.add("chyba radaru"))
+    assert _summary(session.add("chyba radaru, chyba radaru")) == first
+
+
+def test_engine_session_and_reset():
+    def classify(text, **ctx):
+        out = run(EngineInput(context={"case": {"user_query": text}, "heuristic_only": True, **ctx}))
+        return out.payload
+
+    classify("Přišla mi výzva k podání vysvětlení", session_id="chat-1", session_reset=True)
+    second = classify("a je tam fotka z radaru", session_id="chat-1")
+    assert second["session_turns"] == 2
+    assert "výzva k podání vysvětlení" in second["keywords"]
+
+    reset = classify("a je tam fotka z radaru", session_id="chat-1", session_reset=True)
+    assert reset["session_turns"] == 1
+    assert "výzva k podání vysvětlení" not in reset["keywords"]
+
+
+def test_add_rebases_onto_new_catalog_under_the_session_lock():
+    from engines.intent.catalog import IntentCatalog
+
+    old, new = IntentCatalog(), IntentCatalog()
+    session = SessionClassifier(old)
+    session.add(TURNS[1])
+    # hot reload: kolo s novým katalogem se nejdřív přestaví
+    match = session.add(TURNS[2], new)
+    assert session.catalog is new and session.turns == 2
+    assert _summary(match) == _summary(new.match(" ".join(TURNS[1:3])))
+
+
+def test_pipeline_passes_session_and_bypasses_caches():
+    from api.http_server import legal_advice
+    from runtime.orchestrator import run_pipeline
+
+    query = "fotka z radaru"
+    first = run_pipeline(query, session_id="pipeline-chat", session_reset=True, use_cache=True)
+    second = legal_advice({"user_query": query, "session_id": "pipeline-chat"})
+
+    assert first["intent"].payload["session_turns"] == 1
+    # druhé kolo téže konverzace: ani uzel intent, ani celý výsledek z cache
+    assert second["intent"].payload["session_turns"] == 2
+    assert second["metadata"]["pipeline"]["intent"]["status"] == "ok"
+    assert "cache" not in second["metadata"]
+
+    again = run_pipeline(query, session_id="pipeline-chat", session_reset=True)
+    assert again["intent"].payload["session_turns"] == 1
@@ -0,0 +1,128 @@
+"""
+Testy snapshotu intent dat a jeho výměny za běhu (engines/intent/snapshot.py).
+"""
+
+import json
+import os
+import threading
+from contextvars import copy_context
+
+from engines.intent.engine import get_intent_snapshot, request_snapshot
+from engines.intent.index import PHRASE_BONUS
+from engines.intent.session import SessionStore
+from engines.intent.snapshot import IntentSnapshotHolder, pin_snapshot
+
+# dvouslovná fráze jediného intentu: IDF 1.0 + bonus za druhé slovo
+PHRASE = 1.0 + PHRASE_BONUS
+
+
+def _write_intent(base, keywords, risk_patterns=()) -> None:
+    folder = base / "traffic_law"
+    folder.mkdir(parents=True, exist_ok=True)
+    raw = {
+        "intent_id": "traffic_law_radar",
+        "label_cs": "Radar",
+        "domain": "traffic_law",
+        "description_cs": "",
+        "subdomains": [],
+        "keywords": list(keywords),
+        "negative_keywords": [],
+        "risk_patterns": list(risk_patterns),
+        "basic_questions": [],
+        "safety_questions": [],
+        "normative_references": [],
+        "conclusion_skeletons": {},
+    }
+    path = folder / "traffic_law_radar.json"
+    path.write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+    # mtime se musí změnit i na rychlém FS
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _score(snapshot, query):
+    return [(d.intent_id, s) for d, s in snapshot.catalog.match(query).scores]
+
+
+def test_refresh_swaps_snapshot_and_keeps_old_one_intact(tmp_path):
+    _write_intent(tmp_path, ["chyba radaru"])
+    holder = IntentSnapshotHolder(base_dir=str(tmp_path))
+    old = holder.current()
+    assert _score(old, "chyba radaru") == [("traffic_law_radar", PHRASE)]
+
+    assert holder.refresh() is False
+    assert holder.current() is old
+
+    _write_intent(tmp_path, ["úsekové měření"], risk_patterns=[{"pattern": "lhůt", "dimensions": ["deadline"]}])
+    assert holder.refresh() is True
+    new = holder.current()
+    assert new is not old and new.version != old.version
+    # rozpracovaný request drží starý snapshot
+    assert _score(old, "chyba radaru") == [("traffic_law_radar", PHRASE)]
+    assert _score(new, "chyba radaru") == []
+    assert _score(new, "usekove mereni") == [("traffic_law_radar", PHRASE)]
+    # shard používaný starým snapshotem je v novém předem načtený
+    assert new.catalog.loaded_domains() == ["traffic_law"]
+    [rp] = new.catalog.find("traffic_law_radar").compiled_risk_patterns
+    assert rp.regex.search("uplynutí lhůty") and rp.dimensions == ("deadline",)
+
+
+def test_invalid_risk_pattern_is_skipped(tmp_path):
+    _write_intent(tmp_path, ["radar"], risk_patterns=[{"pattern": "(", "dimensions": ["x"]}])
+    holder = IntentSnapshotHolder(base_dir=str(tmp_path))
+    assert holder.current().catalog.find("traffic_law_radar").compiled_risk_patterns == ()
+
+
+def test_snapshot_build_reads_only_manifests(tmp_path, monkeypatch):
+    import engines.intent.catalog as catalog_module
+
+    _write_intent(tmp_path, ["chyba radaru"])
+    loaded = []
+    load_intents = catalog_module.load_intents
+    monkeypatch.setattr(
+        catalog_module, "load_intents", lambda *a, **kw: loaded.append(a) or load_intents(*a, **kw)
+    )
+
+    holder = IntentSnapshotHolder(base_dir=str(tmp_path))
+    assert loaded == []
+    assert holder.current().catalog.loaded_domains() == []
+    # shard se načte až prvním dotazem
+    assert _score(holder.current(), "chyba radaru") == [("traffic_law_radar", PHRASE)]
+    assert holder.current().catalog.loaded_domains() == ["traffic_law"]
+
+
+def test_request_snapshot_is_pinned_in_worker_threads(tmp_path):
+    _write_intent(tmp_path, ["chyba radaru"])
+    pinned = IntentSnapshotHolder(base_dir=str(tmp_path)).current()
+    seen = []
+    with pin_snapshot(pinned):
+        with request_snapshot() as inner:
+            # vnořený request ponechá už připnutý snapshot
+            assert inner is pinned
+        ctx = copy_context()
+        worker = threading.Thread(target=ctx.run, args=(lambda: seen.append(get_intent_snapshot()),))
+        worker.start()
+        worker.join()
+    assert seen == [pinned]
+    assert get_intent_snapshot() is not pinned
+
+
+def test_session_rebases_onto_reloaded_catalog(tmp_path):
+    _write_intent(tmp_path, ["chyba radaru"])
+    holder = IntentSnapshotHolder(base_dir=str(tmp_path))
+    old = holder.current()
+    store = SessionStore(lambda: holder.current().catalog)
+    store.get("chat", old.catalog).add("chyba radaru")
+
+    _write_intent(tmp_path, ["chyba radaru", "úsekové měření"])
+    holder.refresh()
+    new = holder.current()
+    session = store.get("chat", new.catalog)
+    assert session.catalog is new.catalog and session.turns == 1
+
+    incremental = session.add("úsekové měření")
+    stateless = new.catalog.match("chyba radaru úsekové měření")
+    assert [(d.intent_id, s) for d, s in incremental.scores] == [
+        (d.intent_id, s) for d, s in stateless.scores
+    ]
+    assert session.turns == 2
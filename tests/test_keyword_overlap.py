@@ -0,0 +1,50 @@
+# tests/test_keyword_overlap.py
+from __future__ import annotations
+
+from engines.intent.definition import IntentDefinition
+from tools.evaluate_intents import Sample
+from tools.keyword_overlap import build_report, format_report
+
+
+def _intent(intent_id: str, keywords, negative=()) -> IntentDefinition:
+    return IntentDefinition(
+        intent_id=intent_id,
+        label_cs=intent_id,
+        domain="test_law",
+        description_cs="",
+        subdomains=[],
+        keywords=list(keywords),
+        negative_keywords=list(negative),
+        risk_patterns=[],
+        basic_questions=[],
+        safety_questions=[],
+        normative_references=[],
+        conclusion_skeletons={},
+    )
+
+
+def test_overlap_report() -> None:
+    definitions = [
+        _intent("a", ["bloková pokuta", "příkaz na místě", "podepsal jsem blok"]),
+        _intent("b", ["blokovou pokutu", "policie zastavila", "policie", "nehoda policie"], negative=["nehoda"]),
+    ]
+    samples = [
+        Sample("Dostal jsem blokovou pokutu", "a", "test"),
+        Sample("Zastavila mě policie", "b", "test"),
+    ]
+    report = build_report(definitions, samples)
+
+    # "bloková pokuta" a "blokovou pokutu" jsou po stemmingu totéž slovo
+    assert report.shared_keywords == [{"keyword": "bloková pokuta", "intents": ["a", "b"]}]
+    [pair] = report.overlaps
+    assert (pair["a"], pair["b"], pair["shared"]) == ("a", "b", 1)
+    assert pair["jaccard"] == round(1 / 6, 3)
+
+    assert {s["keyword"] for s in report.shadowed} == {"policie zastavila", "nehoda policie"}
+    assert [s["keyword"] for s in report.self_negated] == ["nehoda policie"]
+    assert {n["keyword"] for n in report.never_fire} == {"příkaz na místě", "podepsal jsem blok", "nehoda policie"}
+    assert report.ties == [{"query": "Dostal jsem blokovou pokutu", "expected": "a", "intents": ["a", "b"]}]
+
+    reasons = {(c["keyword"], c["reason"]) for c in report.pruning_candidates()}
+    assert ("nehoda policie", "self_negated") in reasons
+    assert "kandidáti na odebrání" in format_report(report)
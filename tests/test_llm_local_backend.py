@@ -0,0 +1,147 @@
+"""
+Testy pro OpenAI-kompatibilní lokální backend s micro-batchingem.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm.client import LLMClient, LLMMessage
+from llm.local_backend import LocalEndpoint
+
+
+def _completion(text: str):
+    return {
+        "choices": [{"message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+    }
+
+
+class FakeServer:
+    def __init__(self, supports_batch: bool = True):
+        self.supports_batch = supports_batch
+        self.calls = []
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, body, headers, timeout):
+        with self._lock:
+            self.calls.append(url)
+            self.threads.append(threading.current_thread().name)
+        if url.endswith("/batch"):
+            if not self.supports_batch:
+                return 404, {"error": "not found"}
+            return 200, {
+                "responses": [_completion(r["messages"][-1]["content"]) for r in body["requests"]]
+            }
+        return 200, _completion(body["messages"][-1]["content"])
+
+
+def _fire(endpoint: LocalEndpoint, n: int):
+    def one(i):
+        return endpoint.chat([{"role": "user", "content": f"q{i}"}], {"model": "m"})
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(one, range(n)))
+
+
+def test_concurrent_calls_are_grouped_into_one_batch():
+    server = FakeServer()
+    endpoint = LocalEndpoint(base_url="http://x/v1", batch_window_ms=100, transport=server)
+
+    results = _fire(endpoint, 4)
+
+    assert [r[0] for r in results] == ["q0", "q1", "q2", "q3"]
+    assert results[0][1]["total_tokens"] == 7
+    assert endpoint.batch_supported is True
+    assert sum(1 for u in server.calls if u.endswith("/batch")) >= 1
+    assert len(server.calls) < 4
+
+
+def test_batch_unsupported_falls_back_to_single_requests():
+    server = FakeServer(supports_batch=False)
+    endpoint = LocalEndpoint(base_url="http://x/v1", batch_window_ms=100, transport=server)
+
+    results = _fire(endpoint, 3)
+
+    assert sorted(r[0] for r in results) == ["q0", "q1", "q2"]
+    assert endpoint.batch_supported is False
+    assert sum(1 for u in server.calls if u.endswith("/chat/completions")) == 3
+    # jednotlivé requesty jdou vlastním poolem, ne za dispatch joby skupin
+    singles = [t for u, t in zip(server.calls, server.threads) if u.endswith("/chat/completions")]
+    assert all(t.startswith("llm-local-single") for t in singles)
+    assert endpoint.stats["requests"] == 3
+
+
+def test_client_local_backend_degrades_to_error_string(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "local")
+    monkeypatch.setenv("LLM_LOCAL_BASE_URL", "http://127.0.0.1:9/v1")
+    monkeypatch.setenv("LLM_LOCAL_BATCH_WINDOW_MS", "0")
+    monkeypatch.setenv("LLM_LOCAL_TIMEOUT", "0.5")
+
+    client = LLMClient()
+    out = client.chat("legal_analysis", [LLMMessage(role="user", content="dotaz")])
+
+    assert client.backend == "local"
+    assert out.startswith("[LLM ERROR]")
+
+
+def test_shared_client_keeps_usage_per_call(monkeypatch):
+    from llm.ledger import request_ledger
+
+    monkeypatch.setenv("LLM_BACKEND", "local")
+    monkeypatch.setenv("LLM_LOCAL_BASE_URL", "http://127.0.0.1:9/v1")
+    from llm.routing import get_router
+
+    client = LLMClient()
+    both_answered = threading.Barrier(2)
+    record = get_router().record
+
+    def record_after_both(*args, **kwargs):
+        # obě odpovědi jsou venku dřív, než se spotřeba zapíše do účtu
+        both_answered.wait(timeout=5)
+        record(*args, **kwargs)
+
+    class FakeEndpoint:
+        def chat(self, messages, params, timeout=None):
+            tokens = int(messages[-1]["content"])
+            return "ok", {"prompt_tokens": tokens, "completion_tokens": tokens}
+
+    client._local = FakeEndpoint()
+    monkeypatch.setattr(get_router(), "record", record_after_both)
+
+    def one(tokens):
+        with request_ledger() as ledger:
+            client.chat("helper", [LLMMessage(role="user", content=str(tokens))])
+            return ledger.summary()["prompt_tokens"]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(one, [11, 22])) == [11, 22]
+
+
+def test_node_deadline_limits_and_stops_llm_calls(monkeypatch):
+    from llm.deadline import Deadline, node_deadline
+
+    monkeypatch.setenv("LLM_BACKEND", "local")
+    monkeypatch.setenv("LLM_LOCAL_BATCH_WINDOW_MS", "0")
+    server = FakeServer()
+    timeouts = []
+
+    def transport(url, body, headers, timeout):
+        timeouts.append(timeout)
+        return server(url, body, headers, timeout)
+
+    client = LLMClient()
+    client._local = LocalEndpoint(
+        base_url="http://fake/v1", timeout=30.0, batch_window_ms=0, transport=transport
+    )
+
+    deadline = Deadline(time.monotonic() + 2.0)
+    with node_deadline(deadline):
+        assert client.chat("helper", [LLMMessage(role="user", content="a")]) == "a"
+        # zrušený uzel (timeout v executoru) už nic neposílá
+        deadline.cancel()
+        out = client.chat("helper", [LLMMessage(role="user", content="b")])
+
+    assert out.startswith("[LLM ERROR]")
+    assert len(timeouts) == 1 and 0 < timeouts[0] <= 2.0
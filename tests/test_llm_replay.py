@@ -0,0 +1,99 @@
+"""
+Testy pro record & replay LLM backend.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from llm.client import LLMClient, LLMMessage, get_llm_params_for_use_case
+from llm.replay import (
+    LatencyModel,
+    ReplayBackend,
+    ReplayInjectedError,
+    ReplayRecord,
+    ReplayStore,
+    request_hash,
+)
+
+
+def _messages(text: str = "Dostal jsem pokutu za rychlost."):
+    return [
+        LLMMessage(role="system", content="Jsi právní asistent."),
+        LLMMessage(role="user", content=text),
+    ]
+
+
+def _recorded_store(tmp_path: Path) -> ReplayStore:
+    params = get_llm_params_for_use_case("legal_analysis")
+    store = ReplayStore(tmp_path / "replay.jsonl")
+    store.append(
+        ReplayRecord(
+            request_hash=request_hash("legal_analysis", _messages(), params),
+            use_case="legal_analysis",
+            response="Nahraná odpověď.",
+            latency_ms=120.0,
+            usage={"prompt_tokens": 40, "completion_tokens": 10, "total_tokens": 50},
+        )
+    )
+    return store
+
+
+def test_replay_returns_recorded_response_with_recorded_latency(tmp_path: Path):
+    store = _recorded_store(tmp_path)
+    sleeps = []
+    backend = ReplayBackend(store, LatencyModel("recorded"), sleep=sleeps.append)
+
+    params = get_llm_params_for_use_case("legal_analysis")
+    out = backend.chat("legal_analysis", _messages(), params)
+
+    assert out == "Nahraná odpověď."
+    assert sleeps == [pytest.approx(0.12)]
+
+    # záznam přežije znovunačtení ze souboru
+    reloaded = ReplayStore(tmp_path / "replay.jsonl")
+    assert len(reloaded) == 1
+    # latence se nekopírují při každém dotazu, přestaví se jen po append
+    pool = reloaded.latencies()
+    assert pool == (120.0,) and reloaded.latencies() is pool
+    reloaded.append(ReplayRecord("x", "helper", "ok", 80.0))
+    assert reloaded.latencies() == (120.0, 80.0)
+
+
+def test_replay_error_injection(tmp_path: Path):
+    store = _recorded_store(tmp_path)
+    params = get_llm_params_for_use_case("legal_analysis")
+
+    backend = ReplayBackend(store, LatencyModel("none"), error_rate=1.0)
+    assert backend.chat("legal_analysis", _messages(), params).startswith("[LLM ERROR]")
+
+    raising = ReplayBackend(store, LatencyModel("none"), error_rate=1.0, error_mode="raise")
+    with pytest.raises(ReplayInjectedError):
+        raising.chat("legal_analysis", _messages(), params)
+
+
+def test_replay_missing_record_strict_and_synthetic(tmp_path: Path):
+    store = _recorded_store(tmp_path)
+    params = get_llm_params_for_use_case("legal_analysis")
+
+    lenient = ReplayBackend(store, LatencyModel("none"))
+    assert "bez záznamu" in lenient.chat("legal_analysis", _messages("jiný dotaz"), params)
+
+    strict = ReplayBackend(store, LatencyModel("none"), strict=True)
+    assert strict.chat("legal_analysis", _messages("jiný dotaz"), params).startswith("[LLM ERROR]")
+
+
+def test_client_uses_replay_backend(tmp_path: Path, monkeypatch):
+    _recorded_store(tmp_path)
+    monkeypatch.setenv("LLM_BACKEND", "replay")
+    monkeypatch.setenv("LLM_REPLAY_FILE", str(tmp_path / "replay.jsonl"))
+    monkeypatch.setenv("LLM_REPLAY_LATENCY", "none")
+
+    client = LLMClient()
+    assert client.backend == "replay"
+    assert client.chat("legal_analysis", _messages()) == "Nahraná odpověď."
+
+
+def test_latency_model_rejects_invalid_spec():
+    with pytest.raises(ValueError):
+        LatencyModel("lognormal:100")
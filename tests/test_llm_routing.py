@@ -0,0 +1,81 @@
+"""
+Testy pro router modelů (tier podle kroku, demotace při zátěži a rozpočtu).
+"""
+
+from llm.ledger import RequestLedger
+from llm.routing import ModelRouter
+from runtime.config_loader import load_yaml
+from runtime.orchestrator import run_pipeline
+
+
+def _router() -> ModelRouter:
+    return ModelRouter(load_yaml("llm/config.yaml"))
+
+
+def test_step_tier_overrides_use_case():
+    router = _router()
+    core_models = {"legal_analysis_model": "gpt-4.1", "helper_model": "gpt-4.1-mini"}
+
+    conclusion = router.route("legal_analysis", step="conclusion", model_defaults=core_models)
+    certainty = router.route("legal_analysis", step="certainty", model_defaults=core_models)
+    fallback = router.route("helper", step="intent_fallback")
+
+    assert (conclusion.tier, conclusion.model) == ("large", "gpt-4.1")
+    assert (certainty.tier, certainty.model) == ("small", "gpt-4.1-mini")
+    assert fallback.tier == "small"
+
+
+def test_demotion_under_load():
+    router = _router()
+    models = {"legal_analysis_model": "big-model", "helper_model": "small-model"}
+
+    for _ in range(router.min_samples):
+        router.record("big-model", router.max_p95_ms * 2, ok=True)
+
+    decision = router.route("legal_analysis", step="conclusion", model_defaults=models)
+    assert decision.model == "small-model"
+    assert decision.reason.startswith("demoted: p95")
+
+
+def test_demotion_recovers_via_probes_and_sample_expiry():
+    now = [1000.0]
+    router = ModelRouter(load_yaml("llm/config.yaml"), clock=lambda: now[0])
+    models = {"legal_analysis_model": "big-model", "helper_model": "small-model"}
+
+    def route():
+        return router.route("legal_analysis", step="conclusion", model_defaults=models)
+
+    for _ in range(router.min_samples):
+        router.record("big-model", router.max_p95_ms * 2, ok=True)
+    assert route().model == "small-model"
+    # přehled počítá stejně jako demotace
+    assert router.stats()["big-model"]["p95_ms"] == router.max_p95_ms * 2
+
+    # po intervalu jedno zkušební volání na deklarovaný model, pak zase demotace
+    now[0] += router.probe_interval_s
+    probe = route()
+    assert probe.model == "big-model" and probe.reason.startswith("probe:")
+    assert route().model == "small-model"
+
+    # staré vzorky vyprší – model se vrátí i bez nových volání
+    now[0] += router.sample_max_age_s + 1
+    assert route().reason == "declared"
+    assert router.stats()["big-model"]["samples"] == 0
+
+
+def test_demotion_when_budget_is_exhausted():
+    router = _router()
+    ledger = RequestLedger(budget_usd=0.0001)
+
+    decision = router.route("legal_analysis", prompt_tokens=2000, ledger=ledger)
+    assert decision.tier == "small"
+    assert "budget" in decision.reason
+
+
+def test_pipeline_reports_llm_usage():
+    res = run_pipeline("Dostal jsem pokutu za překročení rychlosti.", use_llm=True, cost_budget_usd=1.0, use_cache=False)
+    usage = res["metadata"]["llm_usage"]
+
+    assert usage["budget_usd"] == 1.0
+    steps = {c["step"] for c in usage["calls"]}
+    assert {"conclusion", "certainty"} <= steps
@@ -0,0 +1,53 @@
+"""
+Testy pro odhad tokenů a hlídání velikosti promptu.
+"""
+
+from llm.client import (
+    TRIM_MARKER,
+    LLMMessage,
+    count_message_tokens,
+    enforce_input_budget,
+    estimate_tokens,
+)
+from runtime.orchestrator import run_pipeline
+
+
+def test_estimate_tokens_is_monotonic():
+    assert estimate_tokens("") == 0
+    short = estimate_tokens("pokuta za rychlost")
+    long = estimate_tokens("pokuta za rychlost " * 20)
+    assert 0 < short < long
+
+
+def test_oversized_query_is_trimmed_to_budget():
+    decision_text = "Odůvodnění rozsudku. " * 2000
+    messages = [
+        LLMMessage(role="system", content="Jsi právní asistent."),
+        LLMMessage(role="user", content=decision_text),
+    ]
+
+    trimmed, info = enforce_input_budget(messages, budget_tokens=500)
+
+    assert info is not None
+    assert info["original_tokens"] > 500
+    assert count_message_tokens(trimmed) <= 500
+    assert TRIM_MARKER.strip() in trimmed[1].content
+    # systémový prompt se nemění
+    assert trimmed[0].content == messages[0].content
+
+
+def test_small_query_is_left_alone():
+    messages = [LLMMessage(role="user", content="Krátký dotaz.")]
+    same, info = enforce_input_budget(messages, budget_tokens=500)
+    assert info is None
+    assert same is messages
+
+
+def test_pipeline_metadata_aggregates_tokens():
+    query = "Přikládám celé rozhodnutí soudu: " + "Soud rozhodl takto. " * 3000
+    res = run_pipeline(query, use_llm=True, use_cache=False)
+    usage = res["metadata"]["llm_usage"]
+
+    assert usage["call_count"] == len(usage["calls"]) > 0
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+    assert usage["trimmed_calls"] >= 1
@@ -0,0 +1,250 @@
+# tests/test_pipeline_executor.py
+import threading
+import time
+from contextvars import ContextVar
+
+import pytest
+
+from engines.shared_types import EngineOutput
+from runtime.orchestrator import run_pipeline
+from runtime.pipeline import PipelineExecutor, PipelineSpec, load_pipeline_spec
+from runtime.scheduler import LLMScheduler, SchedulerConfig
+
+_REQUEST_ID: ContextVar[str] = ContextVar("test_request_id", default="-")
+
+
+class _FakeRegistry:
+    """Minimální náhrada EngineRegistry – enginy jsou obyčejné funkce."""
+
+    def __init__(self, engines, disabled=()):
+        self.engines = engines
+        self.disabled = set(disabled)
+        self.calls = []
+
+    def is_enabled(self, key):
+        return key not in self.disabled
+
+    def get(self, key):
+        def run(engine_input):
+            self.calls.append(key)
+            return self.engines[key](engine_input)
+
+        return run
+
+
+def _spec(nodes, **kw):
+    return PipelineSpec.from_dict({"nodes": nodes, **kw})
+
+
+def test_product_pipeline_wires_intent_into_risk():
+    spec = load_pipeline_spec("e_advokat_pro")
+    assert spec.nodes["risk"].depends_on == ("intent",)
+    assert spec.closure(["risk"]) == {"risk", "intent"}
+    order = spec.topological_order()
+    assert order.index("intent") < order.index("risk")
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(ValueError):
+        _spec({"a": {"inputs": {"x": "neexistuje"}}})
+    with pytest.raises(ValueError):
+        _spec({"a": {"inputs": {"x": "b"}}, "b": {"inputs": {"y": "a"}}})
+    with pytest.raises(ValueError):
+        _spec({"a": {"inputs": {"case": "case"}, "cache": True, "cache_bypass": ["session_id"]}})
+
+
+def test_executor_passes_outputs_constants_and_contextvars():
+    seen = {}
+
+    def first(inp):
+        return EngineOutput("first", {"value": inp.context["case"]["user_query"]})
+
+    def second(inp):
+        seen["ctx"] = inp.context
+        seen["request_id"] = _REQUEST_ID.get()
+        return EngineOutput("second", {})
+
+    registry = _FakeRegistry({"first": first, "second": second})
+    spec = _spec(
+        {
+            "first": {"engine": "first", "inputs": {"case": "case"}, "parallel": True},
+            "second": {
+                "engine": "second",
+                "inputs": {"prev": "first", "flag": False},
+                "parallel": True,
+            },
+        }
+    )
+    token = _REQUEST_ID.set("req-42")
+    try:
+        run = PipelineExecutor(spec, registry).run({"case": {"user_query": "dotaz"}})
+    finally:
+        _REQUEST_ID.reset(token)
+
+    assert seen["ctx"] == {"prev": {"value": "dotaz"}, "flag": False}
+    assert seen["request_id"] == "req-42"
+    assert run.summary()["second"]["status"] == "ok"
+
+
+def test_executor_timeout_error_disabled_and_cache():
+    def slow(inp):
+        time.sleep(0.5)
+        return EngineOutput("slow", {})
+
+    def broken(inp):
+        raise RuntimeError("boom")
+
+    def cached(inp):
+        return EngineOutput("cached", {"n": 1})
+
+    registry = _FakeRegistry(
+        {"slow": slow, "broken": broken, "cached": cached, "off": cached}, disabled={"off"}
+    )
+    spec = _spec(
+        {
+            "slow": {"engine": "slow", "parallel": True, "timeout_s": 0.05},
+            "broken": {"engine": "broken"},
+            "cached": {"engine": "cached", "inputs": {"case": "case"}, "cache": True},
+            "off": {"engine": "off"},
+        }
+    )
+    executor = PipelineExecutor(spec, registry)
+
+    started = time.perf_counter()
+    run = executor.run({"case": {"user_query": "x"}})
+    assert time.perf_counter() - started < 0.4
+
+    statuses = {name: r.status for name, r in run.nodes.items()}
+    assert statuses == {"slow": "timeout", "broken": "error", "cached": "ok", "off": "disabled"}
+    assert run.output("slow") is None
+
+    again = executor.run({"case": {"user_query": "x"}}, targets=["cached"])
+    assert again.nodes["cached"].status == "cached"
+    assert registry.calls.count("cached") == 1
+
+
+def test_timed_out_node_is_cancelled_and_counted_as_abandoned():
+    from llm.deadline import current_deadline
+
+    seen = {}
+    release = threading.Event()
+
+    def stuck(inp):
+        seen["deadline"] = current_deadline()
+        release.wait(2.0)
+        # po timeoutu už uzel nemá čas na další LLM volání
+        seen["expired"] = current_deadline().expired()
+        return EngineOutput("stuck", {})
+
+    registry = _FakeRegistry({"stuck": stuck})
+    spec = _spec({"stuck": {"engine": "stuck", "parallel": True, "llm": True, "timeout_s": 0.05}})
+    executor = PipelineExecutor(spec, registry)
+
+    run = executor.run({})
+    assert run.nodes["stuck"].status == "timeout"
+    assert seen["deadline"].cancelled
+    assert executor.stats()["llm"]["abandoned"] == 1
+
+    release.set()
+    for _ in range(100):
+        if executor.stats()["llm"]["abandoned"] == 0:
+            break
+        time.sleep(0.01)
+    assert executor.stats()["llm"]["abandoned"] == 0
+    assert seen["expired"] is True
+
+
+def test_node_cache_skips_outputs_with_llm_vote():
+    def intent(inp):
+        vote = {"intent": "x"} if inp.context["use_llm"] else None
+        return EngineOutput("intent", {"llm_vote": vote})
+
+    registry = _FakeRegistry({"intent": intent})
+    spec = _spec(
+        {"intent": {"engine": "intent", "inputs": {"use_llm": "use_llm"}, "cache": True}}
+    )
+    executor = PipelineExecutor(spec, registry)
+
+    for _ in range(2):
+        executor.run({"use_llm": True})
+    assert registry.calls.count("intent") == 2
+
+    # heuristický výstup se cachuje
+    executor.run({"use_llm": False})
+    assert executor.run({"use_llm": False}).nodes["intent"].status == "cached"
+    assert registry.calls.count("intent") == 3
+
+
+def test_timeout_counts_from_node_start_not_pool_queue():
+    def busy(inp):
+        time.sleep(0.2)
+        return EngineOutput("busy", {})
+
+    def quick(inp):
+        return EngineOutput("quick", {})
+
+    spec = _spec(
+        {
+            "busy": {"engine": "busy", "parallel": True},
+            # čeká na jediné vlákno déle, než je jeho timeout – přesto doběhne
+            "quick": {"engine": "quick", "parallel": True, "timeout_s": 0.1},
+        },
+        max_workers=1,
+    )
+    run = PipelineExecutor(spec, _FakeRegistry({"busy": busy, "quick": quick})).run({})
+    assert run.nodes["quick"].status == "ok"
+
+
+def test_heuristic_nodes_do_not_queue_behind_llm_nodes():
+    release = threading.Event()
+
+    def slow_llm(inp):
+        release.wait(2)
+        return EngineOutput("slow_llm", {})
+
+    def heuristic(inp):
+        return EngineOutput("heuristic", {})
+
+    spec = _spec(
+        {
+            "slow_llm": {"engine": "slow_llm", "parallel": True, "llm": True, "timeout_s": 0.1},
+            # jediné LLM vlákno je obsazené – heuristika má vlastní pool
+            "heuristic": {"engine": "heuristic", "parallel": True, "timeout_s": 0.5},
+        },
+        max_workers=1,
+    )
+    executor = PipelineExecutor(spec, _FakeRegistry({"slow_llm": slow_llm, "heuristic": heuristic}))
+    blocker = executor._get_pool(True).submit(release.wait, 0.3)
+    try:
+        run = executor.run({})
+    finally:
+        release.set()
+        blocker.result()
+    assert run.nodes["heuristic"].status == "ok"
+
+
+def test_llm_node_gives_up_its_scheduler_wait_at_timeout():
+    sched = LLMScheduler(SchedulerConfig.from_dict({"llm_slots": 1}))
+    calls = []
+
+    def llm(inp):
+        calls.append("llm")
+        return EngineOutput("llm", {})
+
+    spec = _spec({"llm": {"engine": "llm", "llm": True, "timeout_s": 0.05}})
+    executor = PipelineExecutor(spec, _FakeRegistry({"llm": llm}), scheduler=sched)
+    with sched.slot(0):
+        run = executor.run({"use_llm": True})
+    assert run.nodes["llm"].status == "timeout"
+    # odpadlý uzel slot později nezabral a engine se nevolal
+    assert sched.stats()["waiting"] == 0 and calls == []
+
+
+def test_full_pipeline_reports_node_statuses():
+    q = "Dostal jsem výzvu k podání vysvětlení, fotka z radaru, úsekové měření."
+    res = run_pipeline(q, use_cache=False)
+    nodes = res["metadata"]["pipeline"]
+    assert set(nodes) == {"intent", "core_legal", "risk", "judikatura"}
+    assert all(n["status"] in ("ok", "cached") for n in nodes.values())
+    # risk engine dostává intent z grafu (dřív "no intent provided")
+    assert res["risk"].payload["intent_id"] == res["metadata"]["intent"]
@@ -0,0 +1,53 @@
+"""
+Testy pro registr promptů (policy merge, verze, hot reload).
+"""
+
+import os
+from pathlib import Path
+
+from llm.prompt_registry import PromptRegistry, get_prompt_registry
+
+
+def _mini_repo(tmp_path: Path) -> Path:
+    (tmp_path / "prompts" / "policy").mkdir(parents=True)
+    (tmp_path / "prompts" / "policy" / "policy_global.md").write_text(
+        "# GLOBAL POLICY – e-Advokát (baseline)\n/no_hallucinations\n", encoding="utf-8"
+    )
+    (tmp_path / "prompts" / "policy" / "policy_core_legal.md").write_text(
+        "# CORE LEGAL POLICY – právní jádro (IRAC)\n", encoding="utf-8"
+    )
+    prompt_dir = tmp_path / "engines" / "core_legal" / "prompts"
+    prompt_dir.mkdir(parents=True)
+    (prompt_dir / "conclusion.md").write_text("## Závěr\nNapiš závěr.\n", encoding="utf-8")
+    return prompt_dir / "conclusion.md"
+
+
+def test_policies_are_merged_once(tmp_path: Path):
+    _mini_repo(tmp_path)
+    prompt = PromptRegistry(base_dir=tmp_path).get("core_legal", "conclusion")
+
+    assert prompt.text.count("GLOBAL POLICY – e-Advokát") == 1
+    assert prompt.text.count("CORE LEGAL POLICY –") == 1
+    assert prompt.text.endswith("Napiš závěr.\n")
+    assert prompt.tokens > 0
+    assert len(prompt.version) == 12
+
+
+def test_dev_mode_hot_reload(tmp_path: Path):
+    path = _mini_repo(tmp_path)
+    registry = PromptRegistry(base_dir=tmp_path, dev_mode=True)
+    before = registry.get("core_legal", "conclusion")
+
+    path.write_text("## Závěr\nNová verze.\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    after = registry.get("core_legal", "conclusion")
+    assert after.version != before.version
+    assert "Nová verze." in after.text
+
+
+def test_repo_prompts_are_registered():
+    versions = get_prompt_registry().versions()
+    assert "core_legal/conclusion" in versions
+    assert "judikatura/judikatura_lookup" in versions
@@ -0,0 +1,112 @@
+# tests/test_result_cache.py
+import json
+
+from engines.shared_types import EngineOutput
+from runtime.orchestrator import run_pipeline
+from runtime.result_cache import DataFingerprint, ResultCache, normalize_query
+
+
+def _cache(tmp_path, **kw):
+    (tmp_path / "data").mkdir(exist_ok=True)
+    if not (tmp_path / "data" / "a.json").exists():
+        (tmp_path / "data" / "a.json").write_text("{}", encoding="utf-8")
+    fp = DataFingerprint(base_dir=tmp_path, globs=("data/*.json",), ttl_s=0.0)
+    return ResultCache(fingerprint=fp, **kw)
+
+
+def test_normalize_query_ignores_whitespace_and_diacritics():
+    assert normalize_query("  Pokuta  za rychlost\tradar ") == normalize_query("pokuta za rychlost radar")
+    assert normalize_query("Překročení rychlosti") == "prekroceni rychlosti"
+
+
+def test_hit_returns_independent_copy(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.make_key("pokuta radar", mode="full", use_llm=False)
+    cache.put(key, {"final_answer": "x", "metadata": {"mode": "full"}})
+
+    first = cache.get(cache.make_key("pokuta radar", mode="full", use_llm=False))
+    assert first["metadata"]["cache"]["hit"] is True
+    first["final_answer"] = "změněno"
+
+    second = cache.get(key)
+    assert second["final_answer"] == "x"
+    assert cache.get(cache.make_key("pokuta radar", mode="short", use_llm=False)) is None
+    # jiné znění (velikost písmen, mezery) je stejný klíč, rozpočet ne
+    assert cache.make_key("Pokuta  radar", mode="full", use_llm=False) == key
+    assert cache.get(cache.make_key("pokuta radar", mode="full", use_llm=False, cost_budget_usd=0.5)) is None
+
+
+def test_hit_requotes_the_current_query(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.make_key("Soused POŠKODIL plot", mode="full", use_llm=False)
+    intent = EngineOutput(name="intent_engine", payload={"q": "Soused POŠKODIL plot"}, notes=[])
+    result = {"final_answer": "Vstup: Soused POŠKODIL plot", "intent": intent, "metadata": {}}
+    cache.put(key, result, user_query="Soused POŠKODIL plot")
+
+    hit = cache.get(key, user_query="soused poškodil  plot")
+    assert hit["final_answer"] == "Vstup: soused poškodil  plot"
+    assert hit["intent"].payload == {"q": "soused poškodil  plot"}
+    assert cache.get(key, user_query="Soused POŠKODIL plot")["final_answer"] == result["final_answer"]
+
+
+def test_disk_tier_is_bounded_and_drops_old_data_versions(tmp_path):
+    cache = _cache(tmp_path, persist_dir=tmp_path / "cache", max_disk_entries=10)
+    for i in range(15):
+        cache.put(cache.make_key(f"dotaz {i}", mode="full", use_llm=False), {"metadata": {}})
+    assert len(list((tmp_path / "cache").rglob("*.json"))) <= 10
+
+    # změna dat → podsložka starého otisku zmizí
+    [old_dir] = (tmp_path / "cache").iterdir()
+    (tmp_path / "data" / "b.json").write_text("{}", encoding="utf-8")
+    cache.put(cache.make_key("nový", mode="full", use_llm=False), {"metadata": {}})
+    assert not old_dir.exists()
+    assert len(list((tmp_path / "cache").rglob("*.json"))) == 1
+
+
+def test_lru_eviction_and_data_change_invalidation(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    keys = [cache.make_key(q, mode="full", use_llm=False) for q in ("a", "b", "c")]
+    for k in keys:
+        cache.put(k, {"metadata": {}})
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+
+    (tmp_path / "data" / "b.json").write_text("{}", encoding="utf-8")
+    new_key = cache.make_key("c", mode="full", use_llm=False)
+    assert new_key != keys[2]
+    assert len(cache) == 0
+
+
+def test_persistent_tier_survives_new_instance(tmp_path):
+    cache = _cache(tmp_path, persist_dir=tmp_path / "cache")
+    key = cache.make_key("dotaz", mode="full", use_llm=False)
+    intent = EngineOutput(name="intent_engine", payload={"intent": "x"}, notes=["n"])
+    cache.put(key, {"final_answer": "uloženo", "intent": intent, "metadata": {}})
+
+    # na disku je čistý JSON, žádný pickle
+    [path] = (tmp_path / "cache").rglob("*.json")
+    assert path.suffix == ".json" and json.loads(path.read_text(encoding="utf-8"))["stored_at"]
+
+    fresh = _cache(tmp_path, persist_dir=tmp_path / "cache")
+    hit = fresh.get(key)
+    assert hit["final_answer"] == "uloženo"
+    assert hit["intent"] == intent
+    assert hit["metadata"]["cache"]["tier"] == "disk"
+
+
+def test_pipeline_repeat_query_is_served_from_cache():
+    q = "Dostal jsem pokutu za rychlost, radar mě změřil."
+    first = run_pipeline(q)
+    second = run_pipeline(q)
+
+    assert second["metadata"]["cache"]["hit"] is True
+    assert second["final_answer"] == first["final_answer"]
+    assert second["metadata"]["timestamp_utc"] >= first["metadata"]["timestamp_utc"]
+
+    # jinak napsaný dotaz trefí cache, citace dotazu se ale přepíše
+    upper = run_pipeline("Soused mi POŠKODIL plot.", use_llm=True)
+    lower = run_pipeline("soused mi  poškodil plot.", use_llm=True)
+    assert "POŠKODIL" in upper.to_json()
+    assert lower["metadata"]["cache"]["hit"] is True
+    assert "POŠKODIL" not in lower.to_json()
+    assert "soused mi  poškodil plot." in lower["final_answer"]
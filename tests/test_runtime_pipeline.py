@@ -43,4 +43,19 @@ def test_final_answer_includes_risk_level():
     res = run_pipeline(q)
     text = res["final_answer"]
 
-    assert "Úroveň rizika" in text
\ No newline at end of file
+    assert "Úroveň rizika" in text
+
+def test_short_mode_is_fast_and_skips_expensive_engines():
+    q = "Dostal jsem výzvu k podání vysvětlení, fotka z radaru, úsekové měření."
+    run_pipeline(q, mode="short", use_cache=False)  # zahřátí cache intentů a šablon
+
+    res = run_pipeline(q, mode="short", use_cache=False)
+    meta = res["metadata"]
+
+    assert res["judikatura"] is None
+    assert res["core_legal"] is None
+    assert meta["mode"] == "short"
+    assert meta["intent"] == "traffic_law_traffic_speed_camera_notice"
+    assert meta["latency_ms"] < meta["latency_target_ms"]
+    assert "# 🧩 Shrnutí" in res["final_answer"]
+    assert "## 🧭 Doporučený další postup" in res["final_answer"]
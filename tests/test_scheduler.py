@@ -0,0 +1,97 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+from runtime.orchestrator import run_pipeline
+import pytest
+
+from runtime.scheduler import LLMScheduler, SchedulerConfig, SlotTimeout, load_scheduler_config
+
+
+def _scheduler(**raw):
+    return LLMScheduler(SchedulerConfig.from_dict(raw))
+
+
+def test_priority_from_risk_deadline_and_domain():
+    sched = _scheduler()
+    assert sched.priority_for([{"risk_level": "low"}]) == 3
+    assert sched.priority_for([{"risk_level": "medium", "dimensions": {"deadline": 1}}]) == 1
+    assert sched.priority_for([{"risk_level": "high"}]) == 0
+    assert sched.priority_for([{"domain": "criminal_law"}, {"risk_level": "low"}]) == 0
+
+
+def test_product_scheduler_config():
+    config = load_scheduler_config("e_advokat_pro")
+    assert config.llm_slots >= 1
+    assert config.risk_priority["high"] < config.risk_priority["low"]
+
+
+def _run_contended(sched, priorities, hold_s=0.05):
+    """Obsadí jediný slot, pak zařadí čekající a vrátí pořadí obsloužení."""
+    order = []
+    blocker = threading.Event()
+
+    def hold():
+        with sched.slot(99):
+            blocker.wait(2)
+
+    def worker(name, prio):
+        with sched.slot(prio):
+            order.append(name)
+            time.sleep(0.001)
+
+    t0 = threading.Thread(target=hold)
+    t0.start()
+    while sched.stats()["active"] == 0:
+        time.sleep(0.001)
+
+    threads = []
+    for name, prio, delay in priorities:
+        time.sleep(delay)
+        t = threading.Thread(target=worker, args=(name, prio))
+        t.start()
+        threads.append(t)
+    while sched.stats()["waiting"] < len(priorities):
+        time.sleep(0.001)
+
+    blocker.set()
+    for t in [t0, *threads]:
+        t.join()
+    return order
+
+
+def test_high_priority_jumps_the_queue():
+    sched = _scheduler(llm_slots=1, aging_s=60)
+    order = _run_contended(sched, [("low", 3, 0), ("medium", 2, 0), ("high", 0, 0)])
+    assert order == ["high", "medium", "low"]
+
+
+def test_aging_prevents_starvation():
+    # low čeká o 0.2 s déle; s aging_s=0.05 to jsou 4 třídy → předběhne high
+    sched = _scheduler(llm_slots=1, aging_s=0.05)
+    order = _run_contended(sched, [("low", 3, 0), ("high", 0, 0.2)])
+    assert order == ["low", "high"]
+
+
+def test_slot_timeout_drops_abandoned_waiter():
+    sched = _scheduler(llm_slots=1)
+    served = []
+    with sched.slot(0):
+        with pytest.raises(SlotTimeout):
+            with sched.slot(0, timeout_s=0.05):
+                served.append("late")
+        # zahozený čekající ve frontě nezůstal
+        assert sched.stats()["waiting"] == 0
+    assert sched.stats()["active"] == 0
+    with sched.slot(0, timeout_s=0.05):
+        served.append("next")
+    assert served == ["next"]
+
+
+def test_llm_nodes_report_priority_in_metadata():
+    q = "Dostal jsem výzvu k podání vysvětlení, fotka z radaru, úsekové měření."
+    res = run_pipeline(q, use_llm=True, use_cache=False)
+    nodes = res["metadata"]["pipeline"]
+    assert "priority" in nodes["core_legal"]
+    assert "priority" in nodes["judikatura"]
+    assert "priority" not in nodes["risk"]
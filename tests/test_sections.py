@@ -0,0 +1,49 @@
+# tests/test_sections.py
+import pytest
+
+from runtime.orchestrator import SECTION_KEYS, required_engines, run_pipeline
+
+
+def test_required_engines_follow_section_dependencies():
+    # LLM stadia čekají na levné heuristiky (priorita plánovače)
+    assert required_engines(["legal_analysis"]) == {"core_legal", "risk", "intent"}
+    assert required_engines(["judikatura"]) == {"judikatura", "risk", "intent"}
+    # risk engine potřebuje intent
+    assert required_engines(["risk"]) == {"risk", "intent"}
+    assert required_engines(["client_questions"]) == set()
+    assert required_engines(None) == {"intent", "core_legal", "risk", "judikatura"}
+
+
+def test_risk_section_runs_only_needed_engines():
+    q = "Dostal jsem pokutu za překročení rychlosti o 40 km/h."
+    res = run_pipeline(q, sections=["risk"], use_cache=False)
+
+    assert res["core_legal"] is None
+    assert res["judikatura"] is None
+    assert res["risk"] is not None
+    assert res["final_answer"].startswith("## ⚠️ Rizika a naléhavost")
+    assert "Judikatura" not in res["final_answer"]
+    assert set(res["metadata"]["skipped_engines"]) == {"core_legal", "judikatura"}
+
+
+def test_sections_render_in_answer_order_and_match_full_answer():
+    q = "Soused mi poškodil plot, co mám dělat?"
+    full = run_pipeline(q, use_cache=False)["final_answer"]
+    part = run_pipeline(q, sections=["judikatura", "legal_analysis"], use_cache=False)
+
+    text = part["final_answer"]
+    assert text.index("Právní analýza") < text.index("Judikatura")
+    assert text in full
+    assert part["metadata"]["sections"] == ["legal_analysis", "judikatura"]
+
+
+def test_all_sections_equal_full_answer():
+    q = "Zaměstnavatel mi nevyplatil mzdu."
+    full = run_pipeline(q, use_cache=False)["final_answer"]
+    explicit = run_pipeline(q, sections=list(SECTION_KEYS), use_cache=False)["final_answer"]
+    assert explicit == full
+
+
+def test_unknown_section_is_rejected():
+    with pytest.raises(ValueError):
+        run_pipeline("dotaz", sections=["neexistuje"])
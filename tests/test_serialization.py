@@ -0,0 +1,44 @@
+# tests/test_serialization.py
+import json
+
+from engines.shared_types import EngineOutput
+from runtime.context import CaseContext, LegalDomain
+from runtime.orchestrator import run_pipeline
+from runtime.serialization import RESULT_SCHEMA_VERSION, PipelineResult, dumps
+
+
+def test_pipeline_result_serializes_with_versioned_schema():
+    res = run_pipeline("Dostal jsem pokutu za rychlost.", use_cache=False)
+    assert isinstance(res, PipelineResult)
+
+    data = json.loads(res.to_bytes())
+    assert data["schema_version"] == RESULT_SCHEMA_VERSION
+    assert list(data)[:7] == [
+        "schema_version", "final_answer", "core_legal", "risk", "judikatura", "intent", "metadata",
+    ]
+    assert data["risk"]["name"] == "risk_engine"
+    assert data["final_answer"] == res["final_answer"]
+    assert json.loads(res.to_json()) == data
+
+
+def test_skipped_engines_serialize_as_null():
+    res = run_pipeline("Dostal jsem pokutu za rychlost.", mode="short", use_cache=False)
+    data = json.loads(res.to_json())
+    assert data["core_legal"] is None
+    assert data["judikatura"] is None
+
+
+def test_dumps_handles_dataclasses_enums_and_czech_text():
+    ctx = CaseContext(user_query="Převod bytu", domain=LegalDomain.CIVIL, facts={"cena": 1})
+    raw = dumps({"ctx": ctx, "out": EngineOutput("x", {"tags": {"a"}}), "text": "žluťoučký"})
+    data = json.loads(raw)
+
+    assert data["ctx"]["domain"] == "civil"
+    assert data["out"] == {"name": "x", "payload": {"tags": ["a"]}, "notes": []}
+    assert "žluťoučký".encode("utf-8") in raw
+
+
+def test_case_context_to_dict_is_shallow():
+    facts = {"a": [1]}
+    ctx = CaseContext(user_query="q", facts=facts)
+    assert ctx.to_dict()["facts"] is facts
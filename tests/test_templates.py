@@ -0,0 +1,57 @@
+# tests/test_templates.py
+from engines.output.modular_output import run as modular_output
+from engines.shared_types import EngineInput
+from runtime.templates import TemplateStore, compile_template
+
+
+def test_compiled_template_renders_placeholders_in_one_pass():
+    tpl = compile_template("# {{title}}\n\n{{ body }}\n{{missing}}konec")
+    assert tpl.placeholders == ("title", "body", "missing")
+    assert tpl.render({"title": "Nadpis", "body": "{{title}}"}) == "# Nadpis\n\n{{title}}\nkonec"
+
+
+def test_store_caches_and_prefers_product_override(tmp_path):
+    (tmp_path / "templates" / "answers").mkdir(parents=True)
+    (tmp_path / "templates" / "answers" / "a.md").write_text("výchozí {{x}}", encoding="utf-8")
+    override = tmp_path / "product" / "firma" / "templates" / "answers"
+    override.mkdir(parents=True)
+    (override / "a.md").write_text("firma {{x}}", encoding="utf-8")
+
+    store = TemplateStore(base_dir=tmp_path, dev_mode=False)
+    assert store.render("answers/a.md", {"x": "1"}, product_id="jiny") == "výchozí 1"
+    assert store.render("answers/a.md", {"x": "1"}, product_id="firma") == "firma 1"
+    assert store.get("answers/a.md", "jiny") is store.get("answers/a.md", "jiny")
+
+
+def test_dev_mode_recompiles_changed_template(tmp_path):
+    import os
+
+    (tmp_path / "templates").mkdir()
+    path = tmp_path / "templates" / "t.md"
+    path.write_text("v1 {{x}}", encoding="utf-8")
+
+    store = TemplateStore(base_dir=tmp_path, dev_mode=True)
+    assert store.render("t.md", {"x": "a"}, product_id="p") == "v1 a"
+
+    path.write_text("v2 {{x}}", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert store.render("t.md", {"x": "a"}, product_id="p") == "v2 a"
+
+
+def test_modular_output_fills_answer_template():
+    out = modular_output(
+        EngineInput(
+            context={
+                "case": {},
+                "engine_results": [
+                    {"name": "core_legal_engine", "data": {"issues": [{"label": "Otázka 1", "text": "text"}]}},
+                    {"name": "legal_safety_layer", "data": {"risk_level": "high", "warnings": ["lhůta"]}},
+                ],
+            }
+        )
+    )
+    text = out.payload["rendered_text"]
+    assert "### Otázka 1" in text
+    assert "- Úroveň rizika: **high**" in text
+    assert "{{" not in text
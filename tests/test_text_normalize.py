@@ -0,0 +1,58 @@
+"""
+Testy sdílené normalizace textu (engines/text_normalize.py).
+"""
+
+from engines.intent.engine import get_intent_definitions
+from engines.text_normalize import (
+    _normalize_cached,
+    clear_text_caches,
+    fold_text,
+    lower_text,
+    normalize_text,
+)
+
+
+def test_normalize_text_czech_slovak_diacritics():
+    assert normalize_text("Překročení  RYCHLOSTI\t\n") == "prekroceni rychlosti"
+    assert normalize_text("Ľudový ôsmy ŕ ä") == "ludovy osmy r a"
+    assert normalize_text(None) == ""
+
+
+def test_fold_text_falls_back_to_nfd_for_other_scripts():
+    # znaky mimo překladovou tabulku (polština, francouzština)
+    assert fold_text("Łódź café") == "łodz cafe"
+    assert fold_text("Straße") == "strasse"
+
+
+def test_normalize_matches_nfd_reference():
+    import unicodedata
+
+    def reference(s: str) -> str:
+        s = " ".join(s.lower().split())
+        return "".join(
+            c for c in unicodedata.normalize("NFD", s)
+            if unicodedata.category(c) != "Mn"
+        )
+
+    for s in ("Žluťoučký kůň úpěl ďábelské ódy", "ŘÍZENÍ o přestupku", "ěščřžýáíéůú"):
+        assert normalize_text(s) == reference(s)
+
+
+def test_lower_text_keeps_diacritics():
+    assert lower_text("Výzva K PODÁNÍ") == "výzva k podání"
+
+
+def test_only_short_texts_are_memoized():
+    clear_text_caches()
+    normalize_text("Krátký dotaz")
+    long_query = "Přikládám rozsudek: " + "Soud rozhodl takto. " * 500
+    assert normalize_text(long_query).startswith("prikladam rozsudek")
+    lower_text(long_query)
+    # dlouhý dotaz se spočítá, ale v cache nezůstane
+    assert _normalize_cached.cache_info().currsize == 1
+
+
+def test_keywords_are_normalized_at_load_time():
+    for intent_def in get_intent_definitions():
+        assert len(intent_def.keywords_norm) == len(intent_def.keywords)
+        assert all(kw == normalize_text(kw) for kw in intent_def.keywords_norm)
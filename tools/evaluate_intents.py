@@ -0,0 +1,300 @@
+# tools/evaluate_intents.py
+"""
+Offline vyhodnocení heuristické klasifikace intentů.
+
+Prožene klasifikátorem všechny `examples` z data/intents/**/*.json
+(očekávaný intent = intent, u kterého příklad leží) a volitelně i
+označený korpus (JSONL: {"query": "...", "intent": "..."}; "general" =
+dotaz, který nemá trefit žádný intent) a vypíše:
+
+- přesnost (accuracy) a nejčastější záměny mezi intenty,
+- kalibraci confidence (přesnost v pásmech confidence),
+- propustnost (dotazy/s, bez načítání dat – shardy se předem zahřejí),
+- podíl dotazů, které by šly do LLM fallbacku (confidence < práh).
+
+Dvě konfigurace klasifikátoru lze porovnat vedle sebe:
+
+    python -m tools.evaluate_intents
+    python -m tools.evaluate_intents --corpus eval/intents.jsonl
+    python -m tools.evaluate_intents --a fuzzy=true --b fuzzy=false top_domains=1
+    python -m tools.evaluate_intents --b weighted=false
+    python -m tools.evaluate_intents --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from engines.intent.catalog import DEFAULT_TOP_DOMAINS, SECOND_CHANCE_BELOW, IntentCatalog
+from engines.intent.engine import LLM_FALLBACK_CONFIDENCE, classify_query
+from engines.intent.loader import BASE_DIR, load_intents
+from engines.text_normalize import clear_text_caches
+
+GENERAL_INTENT = "general"
+
+# hranice pásem confidence (poslední pásmo zahrnuje 1.0)
+CALIBRATION_EDGES: Tuple[float, ...] = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+@dataclass(frozen=True)
+class ClassifierConfig:
+    name: str = "default"
+    top_domains: int = DEFAULT_TOP_DOMAINS
+    fuzzy: bool = True
+    weighted: bool = True
+    llm_threshold: float = LLM_FALLBACK_CONFIDENCE
+    second_chance_below: float = SECOND_CHANCE_BELOW
+
+    @classmethod
+    def parse(cls, name: str, items: Sequence[str]) -> "ClassifierConfig":
+        """Konfigurace z položek "klíč=hodnota" (např. fuzzy=false top_domains=1)."""
+        types = {f.name: f.type for f in fields(cls)}
+        values: Dict[str, Any] = {"name": name}
+        for item in items:
+            key, sep, raw = item.partition("=")
+            key = key.strip()
+            if not sep or key not in types or key == "name":
+                raise ValueError(f"Neznámá položka konfigurace: {item!r}")
+            kind = types[key]
+            if kind in (bool, "bool"):
+                values[key] = raw.strip().lower() in ("1", "true", "yes", "on")
+            elif kind in (int, "int"):
+                values[key] = int(raw)
+            else:
+                values[key] = float(raw)
+        return cls(**values)
+
+    def build_catalog(self, base_dir: str = BASE_DIR) -> IntentCatalog:
+        return IntentCatalog(
+            base_dir,
+            top_domains=self.top_domains,
+            fuzzy=self.fuzzy,
+            weighted=self.weighted,
+            second_chance_below=self.second_chance_below,
+        )
+
+
+@dataclass(frozen=True)
+class Sample:
+    query: str
+    expected: str
+    source: str
+
+
+def load_examples(base_dir: str = BASE_DIR) -> List[Sample]:
+    samples: List[Sample] = []
+    for intent_def in load_intents(base_dir=base_dir):
+        for example in intent_def.examples or []:
+            samples.append(Sample(example, intent_def.intent_id, "examples"))
+    return samples
+
+
+def load_corpus(path: str) -> List[Sample]:
+    """JSONL korpus; prázdné řádky a řádky začínající "#" se přeskočí."""
+    samples: List[Sample] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            raw = json.loads(line)
+            if not raw.get("query"):
+                raise ValueError(f"{path}:{lineno}: chybí 'query'")
+            samples.append(Sample(raw["query"], raw.get("intent") or GENERAL_INTENT, path))
+    return samples
+
+
+@dataclass
+class Prediction:
+    sample: Sample
+    predicted: str
+    confidence: float
+
+    @property
+    def correct(self) -> bool:
+        return self.predicted == self.sample.expected
+
+
+@dataclass
+class EvaluationReport:
+    config: ClassifierConfig
+    total: int
+    correct: int
+    llm_fallbacks: int
+    elapsed_s: float
+    passes: int
+    # očekávaný → předpovězený → počet
+    confusion: Dict[str, Dict[str, int]]
+    calibration: List[Dict[str, Any]]
+    errors: List[Dict[str, Any]]
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.total if self.total else 0.0
+
+    @property
+    def llm_fallback_rate(self) -> float:
+        return self.llm_fallbacks / self.total if self.total else 0.0
+
+    @property
+    def queries_per_s(self) -> float:
+        return self.total * self.passes / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def confused_pairs(self) -> List[Tuple[str, str, int]]:
+        pairs = [
+            (expected, predicted, count)
+            for expected, row in self.confusion.items()
+            for predicted, count in row.items()
+            if expected != predicted
+        ]
+        return sorted(pairs, key=lambda p: (-p[2], p[0], p[1]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "config": asdict(self.config),
+            "total": self.total,
+            "correct": self.correct,
+            "accuracy": round(self.accuracy, 4),
+            "llm_fallback_rate": round(self.llm_fallback_rate, 4),
+            "queries_per_s": round(self.queries_per_s, 1),
+            "confusion": self.confusion,
+            "calibration": self.calibration,
+            "errors": self.errors,
+        }
+
+
+def _calibration(predictions: Sequence[Prediction]) -> List[Dict[str, Any]]:
+    bins: List[Dict[str, Any]] = []
+    last = len(CALIBRATION_EDGES) - 2
+    for i, (low, high) in enumerate(zip(CALIBRATION_EDGES, CALIBRATION_EDGES[1:])):
+        in_bin = [
+            p for p in predictions
+            if low <= p.confidence < high or (i == last and p.confidence == high)
+        ]
+        bins.append(
+            {
+                "range": f"{low:.1f}-{high:.1f}",
+                "count": len(in_bin),
+                "mean_confidence": round(sum(p.confidence for p in in_bin) / len(in_bin), 3) if in_bin else None,
+                "accuracy": round(sum(p.correct for p in in_bin) / len(in_bin), 3) if in_bin else None,
+            }
+        )
+    return bins
+
+
+def evaluate(
+    samples: Sequence[Sample],
+    config: ClassifierConfig,
+    base_dir: str = BASE_DIR,
+    passes: int = 1,
+) -> EvaluationReport:
+    catalog = config.build_catalog(base_dir)
+    # zahřátí – načtení shardů se do propustnosti nepočítá
+    for sample in samples:
+        classify_query(sample.query, catalog)
+
+    predictions: List[Prediction] = []
+    elapsed = 0.0
+    for _ in range(max(1, passes)):
+        # memoizace normalizace by jinak měřila jen cache
+        clear_text_caches()
+        predictions = []
+        started = time.perf_counter()
+        for sample in samples:
+            h = classify_query(sample.query, catalog)
+            predictions.append(Prediction(sample, h["intent"], h["confidence"]))
+        elapsed += time.perf_counter() - started
+
+    confusion: Dict[str, Dict[str, int]] = {}
+    for p in predictions:
+        row = confusion.setdefault(p.sample.expected, {})
+        row[p.predicted] = row.get(p.predicted, 0) + 1
+
+    return EvaluationReport(
+        config=config,
+        total=len(predictions),
+        correct=sum(p.correct for p in predictions),
+        llm_fallbacks=sum(p.confidence < config.llm_threshold for p in predictions),
+        elapsed_s=elapsed,
+        passes=max(1, passes),
+        confusion=confusion,
+        calibration=_calibration(predictions),
+        errors=[
+            {
+                "query": p.sample.query,
+                "expected": p.sample.expected,
+                "predicted": p.predicted,
+                "confidence": round(p.confidence, 3),
+            }
+            for p in predictions
+            if not p.correct
+        ],
+    )
+
+
+def format_report(reports: Sequence[EvaluationReport], max_pairs: int = 10) -> str:
+    names = [r.config.name for r in reports]
+    width = max(12, *(len(n) for n in names))
+    rows = [
+        ("vzorků", [str(r.total) for r in reports]),
+        ("accuracy", [f"{r.accuracy:.1%}" for r in reports]),
+        ("LLM fallback", [f"{r.llm_fallback_rate:.1%}" for r in reports]),
+        ("dotazů/s", [f"{r.queries_per_s:,.0f}" for r in reports]),
+    ]
+
+    lines = ["== Vyhodnocení klasifikace intentů ==", ""]
+    lines.append(f"{'':<16}" + "".join(f"{n:>{width + 2}}" for n in names))
+    for label, values in rows:
+        lines.append(f"{label:<16}" + "".join(f"{v:>{width + 2}}" for v in values))
+
+    for r in reports:
+        lines += ["", f"-- {r.config.name}: {asdict(r.config)}"]
+        lines.append("kalibrace (pásmo confidence: počet, přesnost):")
+        for b in r.calibration:
+            if b["count"]:
+                lines.append(f"  {b['range']}: {b['count']:>4}  {b['accuracy']:.0%}")
+        pairs = r.confused_pairs()[:max_pairs]
+        if pairs:
+            lines.append("nejčastější záměny (očekávaný → předpovězený):")
+            for expected, predicted, count in pairs:
+                lines.append(f"  {count:>3}× {expected} → {predicted}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline vyhodnocení klasifikace intentů")
+    parser.add_argument("--corpus", action="append", default=[], help="JSONL korpus (lze opakovat)")
+    parser.add_argument("--no-examples", action="store_true", help="nepoužít examples z intent JSONů")
+    parser.add_argument("--a", nargs="*", default=None, metavar="KEY=VALUE", help="konfigurace A")
+    parser.add_argument("--b", nargs="*", default=None, metavar="KEY=VALUE", help="konfigurace B (porovnání)")
+    parser.add_argument("--passes", type=int, default=3, help="počet měřených průchodů")
+    parser.add_argument("--base-dir", default=BASE_DIR)
+    parser.add_argument("--json", action="store_true", help="výstup jako JSON")
+    args = parser.parse_args(argv)
+
+    samples: List[Sample] = [] if args.no_examples else load_examples(args.base_dir)
+    for path in args.corpus:
+        samples += load_corpus(path)
+    if not samples:
+        print("[WARN ] Žádné vzorky k vyhodnocení (examples ani korpus)")
+        return 1
+
+    configs = [ClassifierConfig.parse("A", args.a or [])]
+    if args.b is not None:
+        configs.append(ClassifierConfig.parse("B", args.b))
+
+    reports = [evaluate(samples, cfg, args.base_dir, args.passes) for cfg in configs]
+    if args.json:
+        print(json.dumps([r.to_dict() for r in reports], ensure_ascii=False, indent=2))
+    else:
+        print(format_report(reports))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,10 @@ import sys
 from typing import Any, Dict, List
 
 import yaml  # používáme stejnou knihovnu jako config_loader
+from engines.intent.catalog import DOMAIN_MANIFEST
 from engines.intent.definition import IntentDefinition
+from engines.intent.index import definitions_df
+from engines.intent.loader import intent_files, list_intent_domains, load_intents
 
 from pathlib import Path
 
@@ -59,6 +62,10 @@ def _normalize_intent(
         "version": raw_intent.get("version", "1.0.0"),
     }
 
+    # ruční váhy klíčových slov IntentDefinition zná – přeneseme, jsou-li
+    if raw_intent.get("keyword_weights"):
+        out["keyword_weights"] = dict(raw_intent["keyword_weights"])
+
     # POZOR: YAML může mít další pole (examples, intent_group, ...),
     # ale ta schválně do JSONu nedáváme, protože IntentDefinition je nezná
     # a validate_intents by na nich spadnul.
@@ -69,6 +76,32 @@ def _normalize_intent(
     return out
 
 
+def write_domain_stats(domain: str, output_base: str = DEFAULT_OUTPUT_BASE) -> str:
+    """
+    Do _domain.json domény zapíše četnosti kmenů klíčových slov přes její
+    intenty (stem_df, intent_count, intent_files). Katalog z nich skládá
+    IDF celého katalogu, aniž by četl JSONy intentů; ostatní klíče
+    manifestu zůstávají. Spouští se po každé změně intentů nebo stemmeru.
+    """
+    definitions = load_intents(domain, output_base)
+    path = os.path.join(output_base, domain, DOMAIN_MANIFEST)
+
+    raw: Dict[str, Any] = {"domain": domain}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f) or raw
+
+    raw["stem_df"] = dict(sorted(definitions_df(definitions).items()))
+    raw["intent_count"] = len(definitions)
+    raw["intent_files"] = list(intent_files(domain, output_base))
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(raw, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"[generate_intents] wrote stats {path}")
+    return path
+
+
 def generate_from_yaml(
     yaml_path: str,
     output_base: str = DEFAULT_OUTPUT_BASE,
@@ -130,20 +163,29 @@ def generate_from_yaml(
         generated_paths.append(target_path)
         print(f"[generate_intents] wrote {target_path}")
 
+    for domain in sorted({os.path.basename(os.path.dirname(p)) for p in generated_paths}):
+        write_domain_stats(domain, output_base)
+
     return generated_paths
 
 
 def main(argv: List[str] | None = None) -> int:
     """
     CLI vstup: python -m tools.generate_intents_from_yaml path/to/file.yaml
+    (--stats jen přepočítá četnosti kmenů ve všech _domain.json)
     """
     if argv is None:
         argv = sys.argv[1:]
 
     if not argv:
-        print("Použití: python -m tools.generate_intents_from_yaml <yaml_path>")
+        print("Použití: python -m tools.generate_intents_from_yaml <yaml_path> | --stats")
         return 1
 
+    if argv[0] == "--stats":
+        for domain in list_intent_domains(DEFAULT_OUTPUT_BASE):
+            write_domain_stats(domain)
+        return 0
+
     yaml_path = argv[0]
     try:
         generated = generate_from_yaml(yaml_path)
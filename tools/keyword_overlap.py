@@ -0,0 +1,267 @@
+# tools/keyword_overlap.py
+"""
+Překryvy a kolize klíčových slov v katalogu intentů.
+
+Klíčová slova se porovnávají stejně, jak je páruje index
+(engines/intent/index.py): jako množiny kmenů, takže "bloková pokuta" a
+"blokovou pokutu" jsou totéž slovo. Matice intent × klíčové slovo je
+řídká a drží se jako bitové množiny v Python int (bit i = intent i,
+resp. příklad i) – průniky, sjednocení i "na kterých příkladech slovo
+zabere" jsou pak jen &, | a bit_count() nad celými řádky.
+
+Report:
+
+- dvojice intentů se společnými klíčovými slovy (Jaccard),
+- klíčová slova sdílená více intenty,
+- zastíněná slova – jejich kmeny obsahují jiné slovo téhož intentu, takže
+  bez něj nikdy nezaberou (jen zdvojují skóre),
+- slova, která zároveň trefí negativní slovo téhož intentu,
+- slova, která na korpusu příkladů nikdy nezaberou,
+- příklady, kde mají dva intenty stejné nejvyšší skóre (rozhoduje pořadí).
+
+    python -m tools.keyword_overlap
+    python -m tools.keyword_overlap --corpus eval/intents.jsonl --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from engines.intent.definition import IntentDefinition
+from engines.intent.index import IntentIndex, KeywordEntry
+from engines.intent.loader import BASE_DIR, load_intents
+from engines.intent.stemmer import stem_tokens
+from tools.evaluate_intents import Sample, load_corpus, load_examples
+
+DEFAULT_MIN_JACCARD = 0.0
+
+
+def _bits(mask: int) -> List[int]:
+    out: List[int] = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+@dataclass
+class OverlapReport:
+    intents: List[str]
+    keyword_count: int
+    sample_count: int
+    overlaps: List[Dict[str, Any]] = field(default_factory=list)
+    shared_keywords: List[Dict[str, Any]] = field(default_factory=list)
+    shadowed: List[Dict[str, Any]] = field(default_factory=list)
+    self_negated: List[Dict[str, Any]] = field(default_factory=list)
+    never_fire: List[Dict[str, Any]] = field(default_factory=list)
+    ties: List[Dict[str, Any]] = field(default_factory=list)
+
+    def pruning_candidates(self) -> List[Dict[str, Any]]:
+        """Slova, která jde nejspíš bezpečně odebrat (s důvodem)."""
+        out: List[Dict[str, Any]] = []
+        for reason, items in (
+            ("self_negated", self.self_negated),
+            ("shadowed", self.shadowed),
+            ("never_fires", self.never_fire),
+        ):
+            for item in items:
+                out.append({"intent": item["intent"], "keyword": item["keyword"], "reason": reason})
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "intents": len(self.intents),
+            "keywords": self.keyword_count,
+            "samples": self.sample_count,
+            "overlaps": self.overlaps,
+            "shared_keywords": self.shared_keywords,
+            "shadowed": self.shadowed,
+            "self_negated": self.self_negated,
+            "never_fire": self.never_fire,
+            "ties": self.ties,
+            "pruning_candidates": self.pruning_candidates(),
+        }
+
+
+def build_report(
+    definitions: Sequence[IntentDefinition],
+    samples: Sequence[Sample] = (),
+    min_jaccard: float = DEFAULT_MIN_JACCARD,
+) -> OverlapReport:
+    index = IntentIndex(definitions)
+    intents = [d.intent_id for d in index.definitions]
+    positives = [e for e in index.entries if not e.negative]
+    negatives = [e for e in index.entries if e.negative]
+
+    # --- řídká matice: klíčové slovo (množina kmenů) → bitset intentů ---
+    keyword_ids: Dict[FrozenSet[str], int] = {}
+    keyword_label: List[str] = []
+    keyword_intents: List[int] = []
+    intent_keywords: List[int] = [0] * len(intents)
+    for entry in positives:
+        kid = keyword_ids.get(entry.stems)
+        if kid is None:
+            kid = keyword_ids[entry.stems] = len(keyword_label)
+            keyword_label.append(entry.keyword)
+            keyword_intents.append(0)
+        keyword_intents[kid] |= 1 << entry.intent_pos
+        intent_keywords[entry.intent_pos] |= 1 << kid
+
+    report = OverlapReport(intents=intents, keyword_count=len(keyword_label), sample_count=len(samples))
+
+    # --- páry intentů: Jaccard přes bitsety ---
+    for a in range(len(intents)):
+        for b in range(a + 1, len(intents)):
+            shared = intent_keywords[a] & intent_keywords[b]
+            if not shared:
+                continue
+            union = (intent_keywords[a] | intent_keywords[b]).bit_count()
+            jaccard = shared.bit_count() / union
+            if jaccard < min_jaccard:
+                continue
+            report.overlaps.append(
+                {
+                    "a": intents[a],
+                    "b": intents[b],
+                    "shared": shared.bit_count(),
+                    "jaccard": round(jaccard, 3),
+                    "keywords": [keyword_label[k] for k in _bits(shared)],
+                }
+            )
+    report.overlaps.sort(key=lambda o: (-o["jaccard"], o["a"], o["b"]))
+
+    for kid, mask in enumerate(keyword_intents):
+        if mask.bit_count() > 1:
+            report.shared_keywords.append(
+                {"keyword": keyword_label[kid], "intents": [intents[i] for i in _bits(mask)]}
+            )
+
+    # --- zastínění a kolize s negativními slovy v rámci intentu ---
+    by_intent: Dict[int, List[KeywordEntry]] = {}
+    for entry in positives:
+        by_intent.setdefault(entry.intent_pos, []).append(entry)
+    neg_by_intent: Dict[int, List[KeywordEntry]] = {}
+    for entry in negatives:
+        neg_by_intent.setdefault(entry.intent_pos, []).append(entry)
+
+    for pos, entries in by_intent.items():
+        for entry in entries:
+            shadow = [o.keyword for o in entries if o is not entry and o.stems < entry.stems]
+            if shadow:
+                report.shadowed.append(
+                    {"intent": intents[pos], "keyword": entry.keyword, "shadowed_by": shadow}
+                )
+            negated = [n.keyword for n in neg_by_intent.get(pos, ()) if n.stems <= entry.stems]
+            if negated:
+                report.self_negated.append(
+                    {"intent": intents[pos], "keyword": entry.keyword, "negative": negated}
+                )
+
+    # --- korpus: kmen → bitset příkladů; slovo zabere = AND přes jeho kmeny ---
+    if samples:
+        everyone = (1 << len(samples)) - 1
+        stem_samples: Dict[str, int] = {}
+        for i, sample in enumerate(samples):
+            for s in set(stem_tokens(sample.query)):
+                stem_samples[s] = stem_samples.get(s, 0) | (1 << i)
+
+        def fires_on(entry: KeywordEntry) -> int:
+            mask = everyone
+            for s in entry.stems:
+                mask &= stem_samples.get(s, 0)
+                if not mask:
+                    break
+            return mask
+
+        # skóre intentů na příkladech (stejná pravidla jako index, bez překlepů)
+        scores: List[Dict[int, float]] = [dict() for _ in samples]
+        for entry in index.entries:
+            mask = fires_on(entry)
+            if not mask and not entry.negative:
+                report.never_fire.append({"intent": intents[entry.intent_pos], "keyword": entry.keyword})
+            for i in _bits(mask):
+                scores[i][entry.intent_pos] = scores[i].get(entry.intent_pos, 0.0) + entry.score
+
+        for sample, sample_scores in zip(samples, scores):
+            best = max((s for s in sample_scores.values() if s > 0), default=0.0)
+            top = [intents[p] for p, s in sorted(sample_scores.items()) if s == best and s > 0]
+            if len(top) > 1:
+                report.ties.append({"query": sample.query, "expected": sample.expected, "intents": top})
+
+    return report
+
+
+def format_report(report: OverlapReport, max_rows: int = 20) -> str:
+    lines = [
+        "== Překryvy klíčových slov intentů ==",
+        f"intentů: {len(report.intents)}, klíčových slov: {report.keyword_count}, "
+        f"příkladů: {report.sample_count}",
+    ]
+
+    def section(title: str, rows: List[str]) -> None:
+        lines.append("")
+        lines.append(f"{title} ({len(rows)})")
+        lines.extend(f"  {row}" for row in rows[:max_rows])
+        if len(rows) > max_rows:
+            lines.append(f"  … a dalších {len(rows) - max_rows}")
+
+    section(
+        "páry intentů se společnými slovy (Jaccard)",
+        [f"{o['jaccard']:.2f}  {o['a']} × {o['b']}: {', '.join(o['keywords'])}" for o in report.overlaps],
+    )
+    section(
+        "sdílená klíčová slova",
+        [f"'{k['keyword']}': {', '.join(k['intents'])}" for k in report.shared_keywords],
+    )
+    section(
+        "zastíněná slova",
+        [f"{s['intent']}: '{s['keyword']}' ⊇ {s['shadowed_by']}" for s in report.shadowed],
+    )
+    section(
+        "slova trefující vlastní negativní slovo",
+        [f"{s['intent']}: '{s['keyword']}' ⊇ {s['negative']}" for s in report.self_negated],
+    )
+    if report.sample_count:
+        section(
+            "slova, která na příkladech nikdy nezaberou",
+            [f"{n['intent']}: '{n['keyword']}'" for n in report.never_fire],
+        )
+        section(
+            "remízy (rozhoduje pořadí intentů)",
+            [f"{t['query'][:60]!r} → {', '.join(t['intents'])}" for t in report.ties],
+        )
+    section(
+        "kandidáti na odebrání",
+        [f"{c['intent']}: '{c['keyword']}' ({c['reason']})" for c in report.pruning_candidates()],
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Překryvy a kolize klíčových slov intentů")
+    parser.add_argument("--corpus", action="append", default=[], help="JSONL korpus (lze opakovat)")
+    parser.add_argument("--no-examples", action="store_true", help="nepoužít examples z intent JSONů")
+    parser.add_argument("--min-jaccard", type=float, default=DEFAULT_MIN_JACCARD)
+    parser.add_argument("--base-dir", default=BASE_DIR)
+    parser.add_argument("--json", action="store_true", help="výstup jako JSON")
+    args = parser.parse_args(argv)
+
+    samples: List[Sample] = [] if args.no_examples else load_examples(args.base_dir)
+    for path in args.corpus:
+        samples += load_corpus(path)
+
+    report = build_report(load_intents(base_dir=args.base_dir), samples, args.min_jaccard)
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -107,6 +107,8 @@ def main() -> None:
             continue
 
         for path in sorted(domain_dir.glob("*.json")):
+            if path.name.startswith("_"):
+                continue  # metadata domény (_domain.json)
             errors = validate_intent_file(path, domain_ids, domain_subs)
             all_errors.extend(errors)
 
@@ -63,7 +63,8 @@ def iter_intent_files() -> List[str]:
     paths: List[str] = []
     for root, dirs, files in os.walk(BASE_DIR):
         for fname in files:
-            if fname.endswith(".json"):
+            # _domain.json a jiná metadata (prefix "_") nejsou intenty
+            if fname.endswith(".json") and not fname.startswith("_"):
                 paths.append(os.path.join(root, fname))
     paths.sort()
     return paths
@@ -237,6 +238,21 @@ def validate_single_file(
             print(f"[WARN ] {rel}: pole 'keywords' má jen {len(val)} položky (doporučeno ≥ 3)")
             warnings += 1
 
+    # keyword_weights – volitelně dict[str, číslo], klíče by měly být mezi keywords
+    weights = raw.get("keyword_weights", {})
+    if not isinstance(weights, dict):
+        print(f"[ERROR] {rel}: pole 'keyword_weights' má typ {type(weights).__name__}, očekáván dict")
+        errors += 1
+    else:
+        known = set(raw.get("keywords") or []) | set(raw.get("negative_keywords") or [])
+        for kw, weight in weights.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                print(f"[ERROR] {rel}: keyword_weights['{kw}'] není číslo")
+                errors += 1
+            elif kw not in known:
+                print(f"[WARN ] {rel}: keyword_weights['{kw}'] není mezi keywords ani negative_keywords")
+                warnings += 1
+
     # risk_patterns – list[dict]
     risk_patterns = raw.get("risk_patterns", [])
     if isinstance(risk_patterns, list):
@@ -31,6 +31,7 @@ OPTIONAL_FIELDS = [
     "version",
     "intent_group",
     "examples",
+    "keyword_weights",
 ]
 
 
@@ -108,6 +109,15 @@ def validate_file(path: Path, domain_from_dir: str) -> Tuple[List[str], str | No
                         f"{path}: field 'examples[{i}]' must be str, got {_type_name(ex)}"
                     )
 
+    if "keyword_weights" in data:
+        expect_type("keyword_weights", dict)
+        if isinstance(data.get("keyword_weights"), dict):
+            for kw, weight in data["keyword_weights"].items():
+                if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                    errors.append(
+                        f"{path}: field 'keyword_weights[{kw!r}]' must be number, got {_type_name(weight)}"
+                    )
+
     # 4) Konzistence domain vs adresář
     domain = data.get("domain")
     if domain != domain_from_dir:
@@ -162,6 +172,8 @@ def main() -> int:
         domain_name = domain_dir.name
 
         for json_path in sorted(domain_dir.glob("*.json")):
+            if json_path.name.startswith("_"):
+                continue  # metadata domény (_domain.json)
             errors, intent_id = validate_file(json_path, domain_name)
             all_errors.extend(errors)
 